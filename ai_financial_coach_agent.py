@@ -10,14 +10,20 @@ from dotenv import load_dotenv
 import json
 import logging
 from pydantic import BaseModel, Field
-import csv
-from io import StringIO
+import sys
 
 from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from google.genai import types
 
+# Transaction ingestion and category normalization are shared with the FastAPI backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from category_index import default_category_index
+from transaction_ingest import ingest_transactions_csv
+from transaction_netting import net_spending
+from transaction_table import TransactionTable, as_transaction_table
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -204,12 +210,16 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
 
     async def analyze_finances(self, financial_data: Dict[str, Any]) -> Dict[str, Any]:
         session_id = f"finance_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        transactions = as_transaction_table(financial_data.get("transactions"))
+        financial_data = {**financial_data, "transactions": transactions}
+        # Agents see a digest of the transactions rather than every row
+        summary = transactions.summary() if transactions is not None else []
         
         try:
             initial_state = {
                 "monthly_income": financial_data.get("monthly_income", 0),
                 "dependants": financial_data.get("dependants", 0),
-                "transactions": financial_data.get("transactions", []),
+                "transactions": summary,
                 "manual_expenses": financial_data.get("manual_expenses", {}),
                 "debts": financial_data.get("debts", [])
             }
@@ -221,8 +231,8 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
                 state=initial_state
             )
             
-            if session.state.get("transactions"):
-                self._preprocess_transactions(session)
+            if transactions is not None:
+                self._preprocess_transactions(session, transactions)
             
             if session.state.get("manual_expenses"):
                 self._preprocess_manual_expenses(session)
@@ -231,7 +241,7 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             
             user_content = types.Content(
                 role='user',
-                parts=[types.Part(text=json.dumps(financial_data))]
+                parts=[types.Part(text=json.dumps({**financial_data, "transactions": summary}))]
             )
             
             async for event in self.runner.run_async(
@@ -265,20 +275,11 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
                 session_id=session_id
             )
     
-    def _preprocess_transactions(self, session):
-        transactions = session.state.get("transactions", [])
-        if not transactions:
-            return
-        
-        df = pd.DataFrame(transactions)
-        
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-        
-        if 'Category' in df.columns and 'Amount' in df.columns:
-            category_spending = df.groupby('Category')['Amount'].sum().to_dict()
-            session.state["category_spending"] = category_spending
-            session.state["total_spending"] = df['Amount'].sum()
+    def _preprocess_transactions(self, session, transactions: TransactionTable):
+        category_spending, netting = net_spending(transactions)
+        session.state["category_spending"] = category_spending
+        session.state["total_spending"] = sum(category_spending.values())
+        session.state["netting"] = netting
     
     def _preprocess_manual_expenses(self, session):
         manual_expenses = session.state.get("manual_expenses", {})
@@ -287,19 +288,16 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
         
         session.state.update({
             "total_manual_spending": sum(manual_expenses.values()),
-            "manual_category_spending": manual_expenses
+            "manual_category_spending": default_category_index.totals(manual_expenses)
         })
 
     def _create_default_results(self, financial_data: Dict[str, Any]) -> Dict[str, Any]:
         monthly_income = financial_data.get("monthly_income", 0)
-        expenses = financial_data.get("manual_expenses", {})
+        expenses = default_category_index.totals(financial_data.get("manual_expenses") or {})
         
-        if not expenses and financial_data.get("transactions"):
-            expenses = {}
-            for transaction in financial_data["transactions"]:
-                category = transaction.get("Category", "Uncategorized")
-                amount = transaction.get("Amount", 0)
-                expenses[category] = expenses.get(category, 0) + amount
+        transactions = as_transaction_table(financial_data.get("transactions"))
+        if not expenses and transactions is not None:
+            expenses, _ = net_spending(transactions)
         
         total_expenses = sum(expenses.values())
         
@@ -509,83 +507,14 @@ def display_debt_reduction(plan: Dict[str, Any]):
             if "impact" in rec:
                 st.markdown(f"_Impact: {rec['impact']}_")
 
-def parse_csv_transactions(file_content) -> List[Dict[str, Any]]:
-    """Parse CSV file content into a list of transactions"""
-    try:
-        # Read CSV content
-        df = pd.read_csv(StringIO(file_content.decode('utf-8')))
-        
-        # Validate required columns
-        required_columns = ['Date', 'Category', 'Amount']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
-        
-        # Convert date strings to datetime and then to string format YYYY-MM-DD
-        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-        
-        # Convert amount strings to float, handling currency symbols and commas
-        df['Amount'] = df['Amount'].replace('[\$,]', '', regex=True).astype(float)
-        
-        # Group by category and calculate totals
-        category_totals = df.groupby('Category')['Amount'].sum().reset_index()
-        
-        # Convert to list of dictionaries
-        transactions = df.to_dict('records')
-        
-        return {
-            'transactions': transactions,
-            'category_totals': category_totals.to_dict('records')
-        }
-    except Exception as e:
-        raise ValueError(f"Error parsing CSV file: {str(e)}")
-
-def validate_csv_format(file) -> bool:
-    """Validate CSV file format and content"""
-    try:
-        content = file.read().decode('utf-8')
-        dialect = csv.Sniffer().sniff(content)
-        has_header = csv.Sniffer().has_header(content)
-        file.seek(0)  # Reset file pointer
-        
-        if not has_header:
-            return False, "CSV file must have headers"
-            
-        df = pd.read_csv(StringIO(content))
-        required_columns = ['Date', 'Category', 'Amount']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            return False, f"Missing required columns: {', '.join(missing_columns)}"
-            
-        # Validate date format
-        try:
-            pd.to_datetime(df['Date'])
-        except:
-            return False, "Invalid date format in Date column"
-            
-        # Validate amount format (should be numeric after removing currency symbols)
-        try:
-            df['Amount'].replace('[\$,]', '', regex=True).astype(float)
-        except:
-            return False, "Invalid amount format in Amount column"
-            
-        return True, "CSV format is valid"
-    except Exception as e:
-        return False, f"Invalid CSV format: {str(e)}"
-
 def display_csv_preview(df: pd.DataFrame):
-    """Display a preview of the CSV data with basic statistics"""
+    """Display a preview of the ingested CSV data (Date already parsed) with basic statistics"""
     st.subheader("CSV Data Preview")
     
     # Show basic statistics
     total_transactions = len(df)
     total_amount = df['Amount'].sum()
-    
-    # Convert dates for display
-    df_dates = pd.to_datetime(df['Date'])
-    date_range = f"{df_dates.min().strftime('%Y-%m-%d')} to {df_dates.max().strftime('%Y-%m-%d')}"
+    date_range = f"{df['Date'].min().strftime('%Y-%m-%d')} to {df['Date'].max().strftime('%Y-%m-%d')}"
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -597,8 +526,8 @@ def display_csv_preview(df: pd.DataFrame):
     
     # Show category breakdown
     st.subheader("Spending by Category")
-    category_totals = df.groupby('Category')['Amount'].agg(['sum', 'count']).reset_index()
-    category_totals.columns = ['Category', 'Total Amount', 'Transaction Count']
+    categories, totals, counts = default_category_index.sum_by_category(df['Category'], df['Amount'])
+    category_totals = pd.DataFrame({'Category': categories, 'Total Amount': totals, 'Transaction Count': counts})
     st.dataframe(category_totals)
     
     # Show sample transactions
@@ -718,28 +647,21 @@ def main():
                     )
                 
                 if transaction_file is not None:
-                    # Validate CSV format
-                    is_valid, message = validate_csv_format(transaction_file)
+                    # Parse once, validate the typed frame and reuse it for the preview
+                    ingested = ingest_transactions_csv(transaction_file.getvalue())
                     
-                    if is_valid:
+                    if not ingested['errors']:
                         try:
-                            # Parse CSV content
-                            transaction_file.seek(0)
-                            file_content = transaction_file.read()
-                            parsed_data = parse_csv_transactions(file_content)
-                            
-                            # Create DataFrame
-                            transactions_df = pd.DataFrame(parsed_data['transactions'])
-                            
-                            # Display preview
-                            display_csv_preview(transactions_df)
+                            display_csv_preview(ingested['frame'])
+                            transactions_df = ingested['frame']
                             
                             st.success("✅ Transaction file uploaded and validated successfully!")
                         except Exception as e:
                             st.error(f"❌ Error processing CSV file: {str(e)}")
                             transactions_df = None
                     else:
-                        st.error(message)
+                        for message in ingested['errors']:
+                            st.error(message)
                         transactions_df = None
             else:
                 use_manual_expenses = True
@@ -891,7 +813,7 @@ def main():
                 financial_data = {
                     "monthly_income": monthly_income,
                     "dependants": dependants,
-                    "transactions": transactions_df.to_dict('records') if transactions_df is not None else None,
+                    "transactions": TransactionTable.from_frame(transactions_df) if transactions_df is not None else None,
                     "manual_expenses": manual_expenses if use_manual_expenses else None,
                     "debts": debts
                 }
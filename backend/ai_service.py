@@ -5,6 +5,7 @@ Integrates the Google ADK-based AI Financial Coach into the FastAPI backend
 
 import os
 import asyncio
+import hashlib
 import logging
 import json
 from datetime import datetime
@@ -12,6 +13,11 @@ from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+from category_index import default_category_index
+from result_cache import ResultCache, canonical_key
+from transaction_netting import net_spending
+from transaction_table import TransactionTable, as_transaction_table
+
 # Load environment variables
 load_dotenv()
 
@@ -32,6 +38,23 @@ logger = logging.getLogger(__name__)
 APP_NAME = "finance_advisor_api"
 USER_ID = "api_user"
 
+# Gemini model all three agents run on
+AI_MODEL = "gemini-2.0-flash-exp"
+
+# Version of the agent instructions and output schemas; bump it whenever they change so cached analyses are not reused
+PROMPT_VERSION = "3"
+
+# Analysis outputs the agents produce, in pipeline order
+ANALYSIS_KEYS = ("budget_analysis", "savings_strategy", "debt_reduction")
+
+# Request fields each stage is sent (as state['<stage>_input']), besides the outputs of the stages before it;
+# a stage's cached output is reused until one of these (or an upstream output) changes
+STAGE_INPUTS = {
+    "budget_analysis": ("monthly_income", "dependants", "transactions", "manual_expenses"),
+    "savings_strategy": ("monthly_income", "dependants"),
+    "debt_reduction": ("monthly_income", "debts"),
+}
+
 # Pydantic models for AI output schemas
 class SpendingCategory(BaseModel):
     category: str = Field(..., description="Expense category name")
@@ -73,15 +96,23 @@ class Debt(BaseModel):
     amount: float = Field(..., description="Current balance")
     interest_rate: float = Field(..., description="Annual interest rate (%)")
     min_payment: Optional[float] = Field(None, description="Minimum monthly payment")
+    promo_rate: Optional[float] = Field(None, description="Promotional annual interest rate (%)")
+    promo_months: Optional[int] = Field(None, description="Months remaining at the promotional rate")
+    variable_rate: Optional[bool] = Field(None, description="Whether the interest rate floats")
+    term_months: Optional[int] = Field(None, description="Remaining term for installment loans such as mortgages")
 
 class PayoffPlan(BaseModel):
     total_interest: float = Field(..., description="Total interest paid")
-    months_to_payoff: int = Field(..., description="Months until debt-free")
+    months_to_payoff: Optional[int] = Field(..., description="Months until debt-free, null when never paid off")
     monthly_payment: Optional[float] = Field(None, description="Recommended monthly payment")
+    paid_off: Optional[bool] = Field(None, description="Whether the payment clears the debts within the horizon")
+    remaining_balance: Optional[float] = Field(None, description="Balance still owed at the horizon")
+    payoff_order: Optional[List[str]] = Field(None, description="Debt names in the order extra payments go to")
 
 class PayoffPlans(BaseModel):
     avalanche: PayoffPlan = Field(..., description="Highest interest first method")
     snowball: PayoffPlan = Field(..., description="Smallest balance first method")
+    optimal: Optional[PayoffPlan] = Field(None, description="Interest-minimizing order under the same budget")
 
 class DebtRecommendation(BaseModel):
     title: str = Field(..., description="Title of recommendation")
@@ -108,6 +139,10 @@ class AIFinanceAdvisorService:
     
     def __init__(self):
         self.gemini_api_key = os.getenv("GOOGLE_API_KEY")
+        # Finished analyses keyed by their canonical input; ANALYSIS_CACHE_DB adds a tier that survives restarts
+        self.result_cache = ResultCache(maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", 256)),
+                                        ttl=float(os.getenv("ANALYSIS_CACHE_TTL", 3600)),
+                                        path=os.getenv("ANALYSIS_CACHE_DB") or None)
         self.ai_available = AI_AVAILABLE and self.gemini_api_key and self.gemini_api_key != "your_api_key_here"
         
         if not self.ai_available:
@@ -125,9 +160,42 @@ class AIFinanceAdvisorService:
     def _initialize_agents(self):
         """Initialize the AI agents for financial analysis"""
         
-        self.budget_analysis_agent = LlmAgent(
+        self.budget_analysis_agent, self.savings_strategy_agent, self.debt_reduction_agent = self._create_stage_agents()
+        
+        self.coordinator_agent = SequentialAgent(
+            name="FinanceCoordinatorAgent",
+            description="Coordinates specialized finance agents to provide comprehensive financial advice",
+            sub_agents=[
+                self.budget_analysis_agent,
+                self.savings_strategy_agent,
+                self.debt_reduction_agent
+            ]
+        )
+        
+        self.runner = Runner(
+            agent=self.coordinator_agent,
+            app_name=APP_NAME,
+            session_service=self.session_service
+        )
+        
+        # Pipelines resuming at each later stage, run when the stages before it come from the cache;
+        # an ADK agent belongs to a single parent, so each gets its own agent instances
+        self.stage_runners = [self.runner]
+        for start in range(1, len(ANALYSIS_KEYS)):
+            agents = self._create_stage_agents()[start:]
+            coordinator = SequentialAgent(
+                name=f"FinanceCoordinatorFrom{agents[0].name}",
+                description="Finishes a financial analysis whose earlier stages were reused",
+                sub_agents=agents
+            )
+            self.stage_runners.append(Runner(agent=coordinator, app_name=APP_NAME, session_service=self.session_service))
+
+    def _create_stage_agents(self) -> List["LlmAgent"]:
+        """New budget, savings and debt agents, in pipeline order"""
+        
+        budget_analysis_agent = LlmAgent(
             name="BudgetAnalysisAgent",
-            model="gemini-2.0-flash-exp",
+            model=AI_MODEL,
             description="Analyzes financial data to categorize spending patterns and recommend budget improvements",
             instruction="""You are a Budget Analysis Agent specialized in reviewing financial transactions and expenses.
 You are the first agent in a sequence of three financial advisor agents.
@@ -154,14 +222,17 @@ For recommendations:
 - Consider the impact on quality of life and long-term financial health
 - Suggest specific implementation steps for each recommendation
 
+User's financial data:
+{budget_analysis_input}
+
 IMPORTANT: Store your analysis in state['budget_analysis'] for use by subsequent agents.""",
             output_schema=BudgetAnalysis,
             output_key="budget_analysis"
         )
         
-        self.savings_strategy_agent = LlmAgent(
+        savings_strategy_agent = LlmAgent(
             name="SavingsStrategyAgent",
-            model="gemini-2.0-flash-exp",
+            model=AI_MODEL,
             description="Recommends optimal savings strategies based on income, expenses, and financial goals",
             instruction="""You are a Savings Strategy Agent specialized in creating personalized savings plans.
 You are the second agent in the sequence. READ the budget analysis from state['budget_analysis'] first.
@@ -180,14 +251,20 @@ Consider:
 - Multiple savings goals (emergency, retirement, specific purchases)
 - Areas of potential savings identified in the budget analysis
 
+User's financial data:
+{savings_strategy_input}
+
+Budget analysis:
+{budget_analysis}
+
 IMPORTANT: Store your strategy in state['savings_strategy'] for use by the Debt Reduction Agent.""",
             output_schema=SavingsStrategy,
             output_key="savings_strategy"
         )
         
-        self.debt_reduction_agent = LlmAgent(
+        debt_reduction_agent = LlmAgent(
             name="DebtReductionAgent",
-            model="gemini-2.0-flash-exp",
+            model=AI_MODEL,
             description="Creates optimized debt payoff plans to minimize interest paid and time to debt freedom",
             instruction="""You are a Debt Reduction Agent specialized in creating debt payoff strategies.
 You are the final agent in the sequence. READ both state['budget_analysis'] and state['savings_strategy'] first.
@@ -206,26 +283,21 @@ Consider:
 - Psychological factors (quick wins vs mathematical optimization)
 - Credit score impact and improvement opportunities
 
+User's financial data:
+{debt_reduction_input}
+
+Budget analysis:
+{budget_analysis}
+
+Savings strategy:
+{savings_strategy}
+
 IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns with the previous analyses.""",
             output_schema=DebtReduction,
             output_key="debt_reduction"
         )
         
-        self.coordinator_agent = SequentialAgent(
-            name="FinanceCoordinatorAgent",
-            description="Coordinates specialized finance agents to provide comprehensive financial advice",
-            sub_agents=[
-                self.budget_analysis_agent,
-                self.savings_strategy_agent,
-                self.debt_reduction_agent
-            ]
-        )
-        
-        self.runner = Runner(
-            agent=self.coordinator_agent,
-            app_name=APP_NAME,
-            session_service=self.session_service
-        )
+        return [budget_analysis_agent, savings_strategy_agent, debt_reduction_agent]
 
     async def analyze_finances_with_ai(self, financial_data: Dict[str, Any]) -> Dict[str, Any]:
         """Perform AI-powered financial analysis"""
@@ -234,15 +306,35 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             raise Exception("AI analysis is not available. Please check your Google API key.")
         
         session_id = f"finance_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        transactions = as_transaction_table(financial_data.get("transactions"))
+        financial_data = {**financial_data, "transactions": transactions}
+        
+        # Identical input (e.g. a refreshed page) reuses the finished analysis instead of re-running the agents
+        cache_key = self.analysis_key(financial_data)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            results, tier = cached
+            metadata = results["analysis_metadata"]
+            results["analysis_metadata"] = {**metadata, "cache_hit": True, "cache_tier": tier,
+                                            "cached_at": metadata["timestamp"], "timestamp": datetime.now().isoformat()}
+            return results
+        
+        # Stages whose inputs are unchanged since an earlier request are seeded from the stage cache
+        fields = self._request_fields(financial_data)
+        reused = self._cached_stages(fields)
+        runner = self.stage_runners[len(reused)] if len(reused) < len(ANALYSIS_KEYS) else None
         
         try:
-            # Prepare initial state
+            # Prepare initial state; transactions are summarized rather than copied row by row
+            summary = transactions.summary() if transactions is not None else []
             initial_state = {
                 "monthly_income": financial_data.get("monthly_income", 0),
                 "dependants": financial_data.get("dependants", 0),
-                "transactions": financial_data.get("transactions", []),
+                "transactions": summary,
                 "manual_expenses": financial_data.get("manual_expenses", {}),
-                "debts": financial_data.get("debts", [])
+                "debts": financial_data.get("debts", []),
+                **self._stage_inputs({**financial_data, "transactions": summary}),
+                **reused
             }
             
             # Create session
@@ -254,8 +346,8 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             )
             
             # Preprocess data
-            if session.state.get("transactions"):
-                self._preprocess_transactions(session)
+            if transactions is not None:
+                self._preprocess_transactions(session, transactions)
             
             if session.state.get("manual_expenses"):
                 self._preprocess_manual_expenses(session)
@@ -263,20 +355,21 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             # Create default results as fallback
             default_results = self._create_default_results(financial_data)
             
-            # Prepare user content for AI
+            # Each agent reads its own inputs from its instruction, so the message itself carries no request data
             user_content = types.Content(
                 role='user',
-                parts=[types.Part(text=json.dumps(financial_data))]
+                parts=[types.Part(text="Analyze my finances using the financial data in your instructions.")]
             )
             
-            # Run AI analysis
-            async for event in self.runner.run_async(
-                user_id=USER_ID,
-                session_id=session_id,
-                new_message=user_content
-            ):
-                if event.is_final_response() and event.author == self.coordinator_agent.name:
-                    break
+            # Run AI analysis from the first stage that needs it
+            if runner is not None:
+                async for event in runner.run_async(
+                    user_id=USER_ID,
+                    session_id=session_id,
+                    new_message=user_content
+                ):
+                    if event.is_final_response() and event.author == runner.agent.name:
+                        break
             
             # Get updated session with results
             updated_session = self.session_service.get_session(
@@ -285,20 +378,30 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
                 session_id=session_id
             )
             
-            # Extract results with fallback
+            # Extract results with fallback; each stage finished on sound inputs is cached for later requests
             results = {}
-            for key in ["budget_analysis", "savings_strategy", "debt_reduction"]:
+            complete = True
+            for key in ANALYSIS_KEYS:
                 value = updated_session.state.get(key)
-                results[key] = parse_json_safely(value, default_results[key]) if value else default_results[key]
+                parsed = parse_json_safely(value) if value else None
+                complete = complete and parsed is not None
+                if complete and key not in reused:
+                    self.result_cache.set(self._stage_key(key, fields, results), parsed)
+                results[key] = parsed if parsed is not None else default_results[key]
             
             # Add AI metadata
             results["analysis_metadata"] = {
                 "powered_by": "AI (Google ADK + Gemini 2.0)",
                 "session_id": session_id,
                 "timestamp": datetime.now().isoformat(),
-                "agents_used": ["BudgetAnalysisAgent", "SavingsStrategyAgent", "DebtReductionAgent"]
+                "agents_used": [agent.name for agent in runner.agent.sub_agents] if runner is not None else [],
+                "stages_reused": list(reused),
+                "cache_hit": False
             }
             
+            # Only analyses every agent finished are cached; partial ones are retried next time
+            if complete:
+                self.result_cache.set(cache_key, results)
             return results
             
         except Exception as e:
@@ -323,23 +426,12 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             except:
                 pass  # Ignore cleanup errors
 
-    def _preprocess_transactions(self, session):
+    def _preprocess_transactions(self, session, transactions: TransactionTable):
         """Preprocess transaction data for AI analysis"""
-        import pandas as pd
-        
-        transactions = session.state.get("transactions", [])
-        if not transactions:
-            return
-        
-        df = pd.DataFrame(transactions)
-        
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-        
-        if 'Category' in df.columns and 'Amount' in df.columns:
-            category_spending = df.groupby('Category')['Amount'].sum().to_dict()
-            session.state["category_spending"] = category_spending
-            session.state["total_spending"] = df['Amount'].sum()
+        category_spending, netting = net_spending(transactions)
+        session.state["category_spending"] = category_spending
+        session.state["total_spending"] = sum(category_spending.values())
+        session.state["netting"] = netting
 
     def _preprocess_manual_expenses(self, session):
         """Preprocess manual expense data"""
@@ -349,20 +441,17 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
         
         session.state.update({
             "total_manual_spending": sum(manual_expenses.values()),
-            "manual_category_spending": manual_expenses
+            "manual_category_spending": default_category_index.totals(manual_expenses)
         })
 
     def _create_default_results(self, financial_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create default results as fallback"""
         monthly_income = financial_data.get("monthly_income", 0)
-        expenses = financial_data.get("manual_expenses", {})
+        expenses = default_category_index.totals(financial_data.get("manual_expenses") or {})
         
-        if not expenses and financial_data.get("transactions"):
-            expenses = {}
-            for transaction in financial_data["transactions"]:
-                category = transaction.get("Category", "Uncategorized")
-                amount = transaction.get("Amount", 0)
-                expenses[category] = expenses.get(category, 0) + amount
+        transactions = as_transaction_table(financial_data.get("transactions"))
+        if not expenses and transactions is not None:
+            expenses, _ = net_spending(transactions)
         
         total_expenses = sum(expenses.values())
         
@@ -413,6 +502,50 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             }
         }
 
+    def _request_fields(self, financial_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Request fields as hashed: transactions stand in as a digest of their row fingerprints"""
+        transactions = as_transaction_table(financial_data.get("transactions"))
+        rows = hashlib.sha256(transactions.fingerprints.tobytes()).hexdigest() if transactions is not None else None
+        return {**financial_data, "transactions": rows}
+
+    def analysis_key(self, financial_data: Dict[str, Any]) -> str:
+        """Content hash of an analysis request: its fields with sorted keys and rounded amounts,
+        the transactions' row fingerprints, the model and the prompt version"""
+        return canonical_key("analysis", self._request_fields(financial_data), AI_MODEL, PROMPT_VERSION)
+
+    def _stage_inputs(self, request: Dict[str, Any]) -> Dict[str, str]:
+        """Session state entries holding exactly the STAGE_INPUTS fields each stage's instruction shows it"""
+        return {f"{stage}_input": json.dumps({field: request.get(field) for field in fields})
+                for stage, fields in STAGE_INPUTS.items()}
+
+    def _stage_key(self, stage: str, fields: Dict[str, Any], upstream: Dict[str, Any]) -> str:
+        """Content hash of exactly what one stage reads: its STAGE_INPUTS and the outputs of the stages before it"""
+        inputs = {field: fields.get(field) for field in STAGE_INPUTS[stage]}
+        outputs = [upstream[key] for key in ANALYSIS_KEYS[:ANALYSIS_KEYS.index(stage)]]
+        return canonical_key(stage, inputs, outputs, AI_MODEL, PROMPT_VERSION)
+
+    def _cached_stages(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Cached outputs of the leading stages whose inputs are unchanged, up to the first miss"""
+        outputs = {}
+        for stage in ANALYSIS_KEYS:
+            cached = self.result_cache.get(self._stage_key(stage, fields, outputs))
+            if cached is None:
+                break
+            outputs[stage] = cached[0]
+        return outputs
+
+    def invalidate_analysis(self, financial_data: Optional[Dict[str, Any]] = None) -> None:
+        """Forget the cached analysis of one request (and its stage outputs), or of every request when none is given"""
+        if financial_data is None:
+            self.result_cache.clear()
+            return
+        fields = self._request_fields(financial_data)
+        upstream = {}
+        for stage, output in self._cached_stages(fields).items():
+            self.result_cache.invalidate(self._stage_key(stage, fields, upstream))
+            upstream[stage] = output
+        self.result_cache.invalidate(self.analysis_key(financial_data))
+
     def is_ai_available(self) -> bool:
         """Check if AI analysis is available"""
         return self.ai_available
@@ -423,7 +556,8 @@ IMPORTANT: Store your final plan in state['debt_reduction'] and ensure it aligns
             "ai_available": self.ai_available,
             "google_adk_installed": AI_AVAILABLE,
             "api_key_configured": bool(self.gemini_api_key and self.gemini_api_key != "your_api_key_here"),
-            "service_type": "AI-Powered" if self.ai_available else "Rule-Based Fallback"
+            "service_type": "AI-Powered" if self.ai_available else "Rule-Based Fallback",
+            "analysis_cache": self.result_cache.stats()
         }
 
 
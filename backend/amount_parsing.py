@@ -0,0 +1,196 @@
+"""
+Transaction Amount Parsing
+Vectorized, locale-aware conversion of amount columns into integer cents
+"""
+
+from typing import Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+# Currency codes stripped from amounts; these and CR/DR are the only letters accepted
+CURRENCY_CODES = ("USD", "EUR", "GBP")
+
+# Trailing statement markers: debits keep their sign, credits (refunds, reversals) are negated
+CREDIT_MARKER = "CR"
+DEBIT_MARKER = "DR"
+
+# Characters ignored anywhere in an amount: currency symbols, digit-group apostrophes, "+"
+IGNORED_CHARACTERS = "$€£¥'+"
+
+# Whitespace, including the no-break spaces some locales group digits with
+BLANK_CHARACTERS = " \t\u00a0\u202f"
+
+# Characters that make an amount negative: a minus sign anywhere or accounting parentheses
+NEGATIVE_CHARACTERS = "-()"
+
+# More digits than this would overflow int64 cents
+MAX_AMOUNT_DIGITS = 15
+
+# Scientific notation ("1e5", "-2.5E+3") as float formatting writes it, read through float
+SCIENTIFIC_AMOUNT = r"[+-]?(?:\d+\.?\d*|\.\d+)[eE][+-]?\d+"
+
+# Digits in every group after the first when a separator groups thousands
+GROUP_DIGITS = 3
+
+
+def _strip_letters(words: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Remove currency codes and CR/DR markers; return the cleaned words and which were credits.
+
+    Letters other than the known codes and markers are left in place so the
+    scan reports the value as invalid.
+    """
+    words = np.strings.upper(words)
+    for code in CURRENCY_CODES:
+        words = np.strings.replace(words, code, "")
+    words = np.strings.rstrip(words)
+    credit = np.strings.endswith(words, CREDIT_MARKER)
+    marked = credit | np.strings.endswith(words, DEBIT_MARKER)
+    if marked.any():
+        words[marked] = np.strings.replace(np.strings.replace(words[marked], CREDIT_MARKER, ""), DEBIT_MARKER, "")
+    return words, credit
+
+
+# Character classes used by the scan; codepoints beyond the table are OTHER
+_PAD, _DIGIT, _DOT, _COMMA, _NEGATIVE, _IGNORED, _BLANK, _LETTER, _OTHER = range(9)
+
+
+def _class_table() -> np.ndarray:
+    table = np.full(max(map(ord, IGNORED_CHARACTERS + BLANK_CHARACTERS)) + 2, _OTHER, dtype=np.uint8)
+    table[0] = _PAD
+    table[ord("0"):ord("9") + 1] = _DIGIT
+    table[ord(".")] = _DOT
+    table[ord(",")] = _COMMA
+    table[ord("A"):ord("Z") + 1] = _LETTER
+    table[ord("a"):ord("z") + 1] = _LETTER
+    for chars, cls in ((NEGATIVE_CHARACTERS, _NEGATIVE), (IGNORED_CHARACTERS, _IGNORED), (BLANK_CHARACTERS, _BLANK)):
+        table[[ord(char) for char in chars]] = cls
+    return table
+
+
+_CHARACTER_CLASSES = _class_table()
+
+
+def parse_amounts(values: Union[pd.Series, np.ndarray], decimal: Optional[str] = None,
+                  required: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse an amount column into exact integer cents.
+
+    Handles currency symbols and codes, digit grouping, "(12.50)" and minus
+    negatives, European "1.234,56" decimals, scientific notation ("1e5") and
+    trailing CR/DR markers. A row's decimal separator is the later of "." and
+    "," when both appear, or a lone separator followed by other than three
+    digits; a lone separator before exactly three digits ("1,234") follows
+    ``decimal``, else the convention most of the column's unambiguous rows use.
+    Grouping must be regular: every group after the first has three digits and
+    the decimal separator appears at most once, so "12.5.3" is invalid.
+
+    ``values`` may also be a NumPy str array (blank where missing), which is
+    scanned without creating a Python string per row.
+
+    Returns (cents, invalid). Missing and blank values become 0 cents and are
+    not invalid, except in rows flagged in ``required`` (e.g. rows whose other
+    fields are filled in); unreadable values are flagged in ``invalid`` and
+    also become 0.
+    """
+    rows = len(values)
+    if isinstance(values, np.ndarray):
+        missing = np.zeros(rows, dtype=bool)
+        text = values.astype(str, copy=False)
+    elif pd.api.types.is_numeric_dtype(values):
+        amounts = values.to_numpy(dtype=float, na_value=np.nan)
+        missing = np.isnan(amounts)
+        return np.where(missing, 0, np.round(amounts * 100)).astype(np.int64), np.zeros(rows, dtype=bool)
+    else:
+        missing = values.isna().to_numpy()
+        text = values.to_numpy().astype(str)
+
+    # Classify every character at once; rows are columns so each position is a contiguous vector
+    codes = np.ascontiguousarray(text.view(np.uint32).reshape(rows, text.itemsize // 4).T)
+    classes = _CHARACTER_CLASSES[np.minimum(codes, len(_CHARACTER_CLASSES) - 1)]
+
+    # Blank values count as missing, not invalid
+    content = (classes != _PAD) & (classes != _BLANK)
+    missing |= ~content.any(axis=0)
+
+    # Trailing CR/DR markers are the last two non-blank characters
+    columns = np.arange(rows)
+    credit = np.zeros(rows, dtype=bool)
+    if len(codes) > 1:
+        last = np.maximum(len(codes) - 1 - np.argmax(content[::-1], axis=0), 1)
+        marker = codes[last - 1, columns] | 0x20
+        marked = ((codes[last, columns] | 0x20) == ord("r")) & ((marker == ord("c")) | (marker == ord("d")))
+        credit = marked & (marker == ord("c"))
+        classes[last[marked], columns[marked]] = _BLANK
+        classes[last[marked] - 1, columns[marked]] = _BLANK
+
+    # Only values with other letters (currency codes or junk) need string handling
+    lettered = np.nonzero((classes == _LETTER).any(axis=0) & ~missing)[0]
+    scientific = lettered[:0]
+    if len(lettered):
+        words, credit[lettered] = _strip_letters(text[lettered])
+        stripped = np.strings.strip(words)
+        exponent = pd.Series(stripped).str.fullmatch(SCIENTIFIC_AMOUNT).to_numpy()
+        scientific, scientific_words = lettered[exponent], stripped[exponent]
+        text[lettered] = words
+        codes[:, lettered] = text[lettered].view(np.uint32).reshape(len(lettered), -1).T
+        classes[:, lettered] = _CHARACTER_CLASSES[np.minimum(codes[:, lettered], len(_CHARACTER_CLASSES) - 1)]
+
+    invalid = ((classes == _OTHER) | (classes == _LETTER)).any(axis=0)
+    negative = credit | (classes == _NEGATIVE).any(axis=0)
+    dots = (classes == _DOT).sum(axis=0)
+    commas = (classes == _COMMA).sum(axis=0)
+
+    # Digits after the last separator decide whether it is a decimal point
+    is_digit = classes == _DIGIT
+    is_separator = (classes == _DOT) | (classes == _COMMA)
+    digits = is_digit.sum(axis=0)
+    last_position = len(codes) - 1 - np.argmax(is_separator[::-1], axis=0)
+    last_separator = np.where(dots + commas > 0, classes[last_position, columns], _PAD)
+    seen = np.cumsum(is_digit, axis=0, dtype=np.int16)
+    since_separator = digits - seen[last_position, columns]
+
+    # Horner's rule over character positions, skipping non-digits
+    acc = np.zeros(rows, dtype=np.int64)
+    for position_codes, position_digits in zip(codes, is_digit):
+        acc = np.where(position_digits, acc * 10 + (position_codes - ord("0")), acc)
+
+    # A single separator kind used repeatedly is grouping ("1,234,567"), never a decimal
+    single = (dots + commas) == 1
+    both = (dots > 0) & (commas > 0)
+    has_decimal = both | (single & (since_separator != GROUP_DIGITS))
+    ambiguous = single & (since_separator == GROUP_DIGITS)
+
+    # With several separators, each group after the first is three digits, the
+    # decimal kind appears once, and a trailing grouping separator ends a group
+    grouped = np.nonzero((dots + commas) > 1)[0]
+    if len(grouped):
+        # Separator hits ordered by row, then position; a row's group sizes are its digit-count steps
+        rows_hit, positions = np.nonzero(is_separator[:, grouped].T)
+        steps = np.diff(seen[positions, grouped[rows_hit]])
+        later = rows_hit[1:] == rows_hit[:-1]
+        irregular = np.zeros(len(grouped), dtype=bool)
+        irregular[rows_hit[1:][later & (steps != GROUP_DIGITS)]] = True
+        irregular |= both[grouped] & (np.where(last_separator == _DOT, dots, commas)[grouped] > 1)
+        irregular |= ~both[grouped] & (since_separator[grouped] != GROUP_DIGITS)
+        invalid[grouped] |= irregular
+    if ambiguous.any():
+        if decimal is None:
+            comma_rows = int((has_decimal & (last_separator == _COMMA)).sum())
+            decimal = "," if comma_rows > int(has_decimal.sum()) - comma_rows else "."
+        has_decimal |= ambiguous & (last_separator == (_COMMA if decimal == "," else _DOT))
+
+    places = np.where(has_decimal, since_separator, 0)
+    cents = np.where(places <= 2, acc * 10 ** np.clip(2 - places, 0, 2),
+                     np.round(acc / 10.0 ** np.maximum(places - 2, 0)).astype(np.int64))
+    cents = np.where(negative, -cents, cents)
+
+    invalid |= (digits == 0) | (digits > MAX_AMOUNT_DIGITS)
+    if len(scientific):
+        amounts = np.round(scientific_words.astype(float) * 100)
+        readable = np.abs(amounts) < 10.0 ** MAX_AMOUNT_DIGITS
+        cents[scientific] = np.where(readable, np.where(credit[scientific], -amounts, amounts), 0).astype(np.int64)
+        invalid[scientific] = ~readable
+    invalid &= ~missing
+    if required is not None:
+        invalid |= missing & required
+    cents[invalid | missing] = 0
+    return cents, invalid
@@ -0,0 +1,50 @@
+"""
+Bulk Import Benchmark
+One ledger split into statement files, parsed in-process and on the shared pool with 2 and 4 files in flight
+
+Usage: python benchmarks/bench_bulk_import.py [rows] [files]   (default 2000000 8)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from common import best_time, report
+from bulk_import import import_statement_files
+
+CATEGORIES = ("Food", "Rent", "Transport", "Utilities", "Entertainment", "Shopping")
+
+
+def statement_files(rows: int, files: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = (np.datetime64("2020-01-01") + rng.integers(0, 1500, rows)).astype(str)
+    categories = np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), rows)]
+    amounts = rng.uniform(1, 500, rows).round(2)
+    lines = [f"{d},{c},{a:.2f}\n" for d, c, a in zip(dates, categories, amounts)]
+    bounds = np.linspace(0, rows, files + 1).astype(int)
+    return [(f"statement_{i}.csv", ("Date,Category,Amount\n" + "".join(lines[start:end])).encode())
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+
+def main(rows: int, files: int):
+    statements = statement_files(rows, files)
+    print(f"{rows:,} rows in {files} files, {sum(len(content) for _, content in statements) / 1e6:.0f} MB")
+
+    def import_all(workers: int):
+        return import_statement_files(statements, workers=workers)
+
+    report("  in-process (1 in flight)", best_time(lambda: import_all(1), number=1, repeat=3), "s")
+
+    # The first pooled import also starts the shared pool; later imports reuse it
+    started = time.perf_counter()
+    result = import_all(2)
+    report("  pool, first import (starts the pool)", time.perf_counter() - started, "s")
+    assert sum(file["transaction_count"] for file in result["files"]) == rows
+    for workers in (2, 4):
+        report(f"  pool, {workers} in flight", best_time(lambda: import_all(workers), number=1, repeat=3), "s")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [2_000_000, 8][len(args):]))
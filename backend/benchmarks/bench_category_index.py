@@ -0,0 +1,41 @@
+"""
+Category Index Benchmark
+Per-category totals over label variants: groupby on the raw labels against bincount over canonical IDs
+
+Usage: python benchmarks/bench_category_index.py [rows]   (default 2000000)
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common import best_time, report
+from category_index import default_category_index
+
+# Spellings of three canonical categories (Food, Housing, Transportation) as they arrive from different banks
+LABEL_VARIANTS = ("Food", "food ", "FOOD", "Groceries", "Rent", "Housing", "Auto & Transport")
+
+
+def main(rows: int):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Category": np.array(LABEL_VARIANTS, dtype=object)[rng.integers(0, len(LABEL_VARIANTS), rows)],
+        "Amount": rng.uniform(1, 500, rows).round(2),
+    })
+    groups = df.groupby("Category")["Amount"].sum()
+    names, sums, _ = default_category_index.sum_by_category(df["Category"], df["Amount"])
+    assert np.isclose(sums.sum(), df["Amount"].sum())
+
+    print(f"{rows:,} rows, {len(LABEL_VARIANTS)} label variants of {', '.join(names)}")
+    report(f"  groupby('Category').sum(), {len(groups)} groups",
+           best_time(lambda: df.groupby("Category")["Amount"].sum(), number=1, repeat=5), "s")
+    report("  encode labels to canonical IDs",
+           best_time(lambda: default_category_index.encode(df["Category"]), number=1, repeat=5), "s")
+    report(f"  sum_by_category, {len(names)} groups",
+           best_time(lambda: default_category_index.sum_by_category(df["Category"], df["Amount"]),
+                     number=1, repeat=5), "s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,56 @@
+"""
+Date Parsing Benchmark
+Sample-inferred explicit formats against pandas' per-column guessing on 1M-row date columns
+
+Usage: python benchmarks/bench_date_parsing.py [rows]   (default 1000000)
+"""
+
+import sys
+import warnings
+
+import pandas as pd
+
+from common import best_time, report
+from date_parsing import date_format_cache, parse_dates
+
+FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y", "%d %b %Y", "%m/%d/%Y %H:%M")
+
+
+def guessed(values: pd.Series) -> pd.Series:
+    """The pre-inference path: pandas guesses one format from the first value"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.to_datetime(values, errors="coerce")
+
+
+def correct(parsed: pd.Series, expected: pd.Series) -> float:
+    return float((parsed == expected).mean())
+
+
+def main(rows: int):
+    dates = pd.Series(pd.date_range("2015-01-01", periods=rows, freq="7min")).dt.floor("min")
+    columns = [(fmt, dates.dt.strftime(fmt)) for fmt in FORMATS]
+
+    # US dates whose first value (and 1% of the rest) happens to be ISO
+    mixed = dates.dt.strftime("%m/%d/%Y").to_numpy(copy=True)
+    mixed[::100] = dates.iloc[::100].dt.strftime("%Y-%m-%d").to_numpy()
+    columns.append(("%m/%d/%Y, 1% ISO first", pd.Series(mixed)))
+
+    for label, values in columns:
+        expected = dates if "%H" in label else dates.dt.normalize()
+
+        def cold():
+            date_format_cache.clear()
+            return parse_dates(values, profile="bench")
+
+        print(f"{label} ({rows:,} rows)")
+        report(f"  pd.to_datetime guess, {correct(guessed(values), expected):.1%} correct",
+               best_time(lambda: guessed(values), number=1, repeat=3), "s")
+        report(f"  parse_dates inferred, {correct(cold(), expected):.1%} correct",
+               best_time(cold, number=1, repeat=3), "s")
+        report("  parse_dates cached profile",
+               best_time(lambda: parse_dates(values, profile="bench"), number=1, repeat=3), "s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
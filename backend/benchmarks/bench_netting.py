@@ -0,0 +1,44 @@
+"""
+Netting Benchmark
+Transfer and refund matching on random ledgers where most credits have a candidate to pair with
+
+Usage: python benchmarks/bench_netting.py [rows ...]   (default 100000 500000 2000000)
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common import best_time, report
+from transaction_netting import net_spending, net_transactions
+from transaction_table import TransactionTable
+
+CATEGORIES = ("Food", "Housing", "Transportation", "Utilities", "Entertainment", "Transfer")
+
+
+def random_ledger(rows: int, seed: int = 0) -> TransactionTable:
+    """A year of transactions over a few hundred amounts, so refunds and transfer legs find many candidates:
+    about 1 row in 6 is a Transfer and 1 in 5 of the rest is a credit"""
+    rng = np.random.default_rng(seed)
+    categories = np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)]
+    amounts = rng.integers(100, 500, rows) * 0.25
+    credits = (rng.random(rows) < 0.2) | ((categories == "Transfer") & (rng.random(rows) < 0.5))
+    return TransactionTable.from_frame(pd.DataFrame({
+        "Date": np.datetime64("2024-01-01") + rng.integers(0, 365, rows).astype("timedelta64[D]"),
+        "Category": categories,
+        "Amount": np.where(credits, -amounts, amounts),
+    }))
+
+
+def main(sizes):
+    for rows in sizes:
+        table = random_ledger(rows)
+        _, counts = net_transactions(table)
+        print(f"{rows:,} rows: " + ", ".join(f"{name} {count:,}" for name, count in counts.items()))
+        report("  net_transactions", best_time(lambda: net_transactions(table), number=1, repeat=3), "s")
+        report("  net_spending", best_time(lambda: net_spending(table), number=1, repeat=3), "s")
+
+
+if __name__ == "__main__":
+    main([int(rows) for rows in sys.argv[1:]] or [100_000, 500_000, 2_000_000])
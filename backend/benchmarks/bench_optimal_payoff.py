@@ -0,0 +1,49 @@
+"""
+Optimal Payoff Benchmark
+Latency of the optimal plan search as advisor-managed portfolios grow to 50+ accounts with promotional rates
+
+Usage: python benchmarks/bench_optimal_payoff.py [debts ...]   (default 10 25 50 80)
+"""
+
+import sys
+
+import numpy as np
+
+from common import best_time, report
+from debt_engine import build_payoff_plans
+
+# Monthly amount paid above the minimums in every case
+EXTRA_PAYMENT = 200.0
+
+
+def advisor_portfolio(n: int, seed: int = 0):
+    """Cards (a third on 0-6% promos of 6-21 months), installment loans and a mortgage"""
+    rng = np.random.default_rng(seed)
+    debts = []
+    for i in range(n - 1):
+        debt = {"name": f"card{i}", "amount": float(rng.uniform(500, 15000)), "interest_rate": float(rng.uniform(12, 29))}
+        if i % 3 == 0:
+            debt.update(promo_rate=float(rng.choice([0.0, rng.uniform(0, 6)])), promo_months=int(rng.integers(6, 22)))
+        elif i % 5 == 1:
+            debt.update(name=f"loan{i}", amount=float(rng.uniform(5000, 40000)), interest_rate=float(rng.uniform(4, 12)),
+                        term_months=int(rng.choice([36, 60, 84])))
+        debts.append(debt)
+    debts.append({"name": "mortgage", "amount": 350000.0, "interest_rate": 6.5, "term_months": 360})
+    return debts
+
+
+def main(sizes, portfolios: int = 20):
+    for n in sizes:
+        debts = advisor_portfolio(n)
+        report(f"{n} debts: build_payoff_plans",
+               best_time(lambda: build_payoff_plans(debts, EXTRA_PAYMENT), repeat=5))
+        savings = []
+        for seed in range(portfolios):
+            plans = build_payoff_plans(advisor_portfolio(n, seed), EXTRA_PAYMENT)
+            savings.append(plans["avalanche"]["total_interest"] - plans["optimal"]["total_interest"])
+        print(f"  optimal beats avalanche in {sum(saving > 0 for saving in savings)} of {portfolios} portfolios, "
+              f"saving up to ${max(savings):,.2f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 25, 50, 80])
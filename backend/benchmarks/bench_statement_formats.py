@@ -0,0 +1,74 @@
+"""
+Statement Format Benchmark
+Parse throughput of OFX (SGML and XML) and QIF statements against CSV, on synthetic multi-megabyte files
+
+Usage: python benchmarks/bench_statement_formats.py [transactions]   (default 200000)
+"""
+
+import io
+import sys
+
+import numpy as np
+
+from common import best_time, report
+from transaction_ingest import read_transactions_file
+
+QIF_CATEGORIES = ("Food:Groceries", "Auto/Business", "Utilities", "[Savings]")
+
+
+def statement_rows(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = (np.datetime64("2024-01-01") + rng.integers(0, 365, n)).astype(str)
+    return dates, -rng.uniform(1, 500, n).round(2)
+
+
+def make_ofx(n: int, xml: bool = False) -> bytes:
+    dates, amounts = statement_rows(n)
+    header = ('<?xml version="1.0"?>\n<?OFX OFXHEADER="200" VERSION="220"?>\n' if xml else
+              "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nENCODING:USASCII\nCHARSET:1252\n\n")
+    out = [header, "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD<BANKACCTFROM><BANKID>1<ACCTID>CHK-001"
+                   "<ACCTTYPE>CHECKING</BANKACCTFROM><BANKTRANLIST>\n"]
+    for i, (date, amount) in enumerate(zip(dates, amounts)):
+        posted = date.replace("-", "")
+        if xml:
+            out.append(f"<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>{posted}120000[-5:EST]</DTPOSTED>"
+                       f"<TRNAMT>{amount:.2f}</TRNAMT><FITID>{i}</FITID><NAME>SHOP &amp; CO {i % 97}</NAME></STMTTRN>\n")
+        else:
+            out.append(f"<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>{posted}120000[-5:EST]\n<TRNAMT>{amount:.2f}\n"
+                       f"<FITID>{i}\n<NAME>SHOP &amp; CO {i % 97}\n<MEMO>card purchase\n</STMTTRN>\n")
+    out.append("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    return "".join(out).encode()
+
+
+def make_qif(n: int) -> bytes:
+    dates, amounts = statement_rows(n)
+    out = ["!Account\nNChecking\nTBank\n^\n!Type:Bank\n"]
+    for i, (date, amount) in enumerate(zip(dates, amounts)):
+        year, month, day = date.split("-")
+        out.append(f"D{int(month)}/{int(day):2d}'{year[2:]}\nT{amount:,.2f}\nCX\nPSHOP {i % 97}\n"
+                   f"L{QIF_CATEGORIES[i % len(QIF_CATEGORIES)]}\n^\n")
+    return "".join(out).encode()
+
+
+def make_csv(n: int) -> bytes:
+    dates, amounts = statement_rows(n)
+    out = ["Date,Category,Amount\n"]
+    out.extend(f"{date},Shopping,{-amount:.2f}\n" for date, amount in zip(dates, amounts))
+    return "".join(out).encode()
+
+
+def main(n: int):
+    for label, content in (("OFX SGML", make_ofx(n)), ("OFX XML", make_ofx(n, xml=True)),
+                           ("QIF", make_qif(n)), ("CSV", make_csv(n))):
+        def parse():
+            parsed = read_transactions_file(io.BytesIO(content))
+            assert not parsed["errors"] and len(parsed["table"]) == n, parsed["errors"]
+
+        seconds = best_time(parse, number=1, repeat=3)
+        megabytes = len(content) / 1e6
+        report(f"{label}: {megabytes:.1f} MB, {megabytes / seconds:.0f} MB/s, {n / seconds / 1e3:.0f}k txn/s",
+               seconds, "s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,80 @@
+"""
+Upload Memory Benchmark
+Peak memory and time of CSV upload parsing as the file grows, each reader in a fresh process
+
+Usage: python benchmarks/bench_upload_memory.py [rows ...]   (default 500000 2000000)
+"""
+
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import report
+
+# Readers compared; "buffered" is the pre-streaming path (whole upload in memory, per-row dicts)
+MODES = ("buffered", "streaming", "mapped")
+
+CATEGORIES = ("Food", "Rent", "Transport", "Utilities", "Entertainment", "Shopping")
+
+
+def write_csv(path: str, rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        f.write("Date,Category,Amount\n")
+        for start in range(0, rows, 100_000):
+            size = min(100_000, rows - start)
+            dates = (np.datetime64("2020-01-01") + rng.integers(0, 1500, size)).astype(str)
+            categories = np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), size)]
+            amounts = rng.uniform(1, 500, size).round(2)
+            f.writelines(f"{d},{c},{a:.2f}\n" for d, c, a in zip(dates, categories, amounts))
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode: str, path: str) -> None:
+    """Parse one file with one reader and print: baseline MB after imports, peak MB, seconds"""
+    import pandas as pd
+    from transaction_ingest import read_transactions_file, read_transactions_mapped
+
+    baseline = peak_mb()
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        if mode == "buffered":
+            df = pd.read_csv(io.BytesIO(f.read()))
+            df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+            df["Amount"] = df["Amount"].replace(r"[\$,]", "", regex=True).astype(float)
+            totals = {}
+            for record in df.to_dict("records"):
+                totals[record["Category"]] = totals.get(record["Category"], 0) + record["Amount"]
+        else:
+            reader = read_transactions_file if mode == "streaming" else read_transactions_mapped
+            reader(f)
+    print(baseline, peak_mb(), time.perf_counter() - started)
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            path = os.path.join(directory, f"{rows}.csv")
+            write_csv(path, rows)
+            print(f"{rows:,} rows, {os.path.getsize(path) / 1e6:.0f} MB")
+            for mode in MODES:
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                                        capture_output=True, text=True, check=True).stdout
+                baseline, peak, seconds = map(float, output.split())
+                report(f"  {mode}: peak RSS {peak:.0f} MB (imports {baseline:.0f} MB)", seconds, "s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        run_child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(rows) for rows in sys.argv[1:]] or [500_000, 2_000_000])
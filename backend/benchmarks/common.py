@@ -0,0 +1,25 @@
+"""
+Benchmark Helpers
+Shared timing and reporting for the scripts in this directory; run them from backend/
+"""
+
+from typing import Callable
+import os
+import sys
+import timeit
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def best_time(func: Callable[[], object], number: int = 0, repeat: int = 7) -> float:
+    """Best seconds per call over ``repeat`` rounds (noise only ever adds time); ``number`` 0 picks it automatically"""
+    timer = timeit.Timer(func)
+    if not number:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def report(label: str, seconds: float, unit: str = "ms") -> None:
+    scale = {"s": 1, "ms": 1e3, "us": 1e6}[unit]
+    print(f"{label:<52} {seconds * scale:10.3f} {unit}")
@@ -0,0 +1,191 @@
+"""
+Bulk Statement Import
+Parallel parsing of many statement files (CSV, OFX/QFX, QIF) or ZIP archives into one ledger
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Callable, Optional, Tuple
+import io
+import os
+import threading
+import time
+import zipfile
+
+from categorization import Categorizer
+from transaction_dedup import TransactionLedger
+from transaction_ingest import UploadTooLarge, read_transactions_file
+
+# Worker processes used for parsing; files are the unit of parallelism
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", os.cpu_count() or 1))
+
+# Most files accepted in one import, counting ZIP members
+MAX_IMPORT_FILES = 500
+
+# Extensions of archive members that are imported; anything else is reported as skipped
+IMPORTABLE_EXTENSIONS = (".csv", ".txt", ".ofx", ".qfx", ".qif")
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Parsing pool shared by every import, created on first use so idle servers do not fork"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=IMPORT_WORKERS)
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died, so the next import starts a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def expand_archives(files: List[Tuple[str, bytes]], max_bytes: Optional[int] = None,
+                    max_total_bytes: Optional[int] = None) -> Tuple[List[Tuple[str, bytes]], List[Dict[str, Any]]]:
+    """Replace ZIP archives by their statement members.
+
+    Returns (files, skipped), where skipped holds a report for every member
+    that is not imported: "skipped" for directories, macOS metadata and other
+    file types, "error" for oversized members and unreadable archives. Member
+    sizes are checked against max_bytes, and the expanded total against
+    max_total_bytes (raising UploadTooLarge), from the archive directory
+    before anything is decompressed.
+    """
+    expanded, skipped = [], []
+    total = 0
+    for name, content in files:
+        if not content.startswith(ZIP_MAGIC):
+            expanded.append((name, content))
+            total += len(content)
+            continue
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                for member in archive.infolist():
+                    member_name = f"{name}/{member.filename}"
+                    if member.is_dir():
+                        skipped.append({"file": member_name, "status": "skipped", "errors": ["Directory"]})
+                    elif member.filename.startswith("__MACOSX/"):
+                        skipped.append({"file": member_name, "status": "skipped", "errors": ["macOS archive metadata"]})
+                    elif not member.filename.lower().endswith(IMPORTABLE_EXTENSIONS):
+                        skipped.append({"file": member_name, "status": "skipped",
+                                        "errors": ["Not a CSV, OFX/QFX or QIF statement"]})
+                    elif max_bytes is not None and member.file_size > max_bytes:
+                        skipped.append({"file": member_name, "status": "error",
+                                        "errors": [f"File exceeds the {max_bytes / (1024 * 1024):g} MB upload limit"]})
+                    else:
+                        total += member.file_size
+                        if max_total_bytes is not None and total > max_total_bytes:
+                            raise UploadTooLarge(f"Archive contents exceed the {max_total_bytes / (1024 * 1024):g} MB import limit")
+                        expanded.append((member_name, archive.read(member)))
+        except zipfile.BadZipFile as e:
+            skipped.append({"file": name, "status": "error", "errors": [f"Invalid ZIP archive: {str(e)}"]})
+    return expanded, skipped
+
+
+def _error_report(name: str, error: str) -> Dict[str, Any]:
+    return {"file": name, "status": "error", "errors": [error], "transaction_count": 0, "auto_categorized": 0,
+            "seconds": 0.0, "table": None}
+
+
+def parse_statement_file(name: str, content: bytes, max_bytes: Optional[int] = None,
+                         categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Parse one file into a report and its table (None when the file has errors)"""
+    started = time.perf_counter()
+    try:
+        parsed = read_transactions_file(io.BytesIO(content), max_bytes=max_bytes, categorizer=categorizer)
+    except UploadTooLarge as e:
+        parsed = {"errors": [str(e)], "table": None}
+    table = parsed["table"] if not parsed["errors"] else None
+    return {
+        "file": name,
+        "status": "error" if table is None else "imported",
+        "errors": parsed["errors"],
+        "transaction_count": len(table) if table is not None else 0,
+        "auto_categorized": parsed.get("auto_categorized", 0) if table is not None else 0,
+        "seconds": round(time.perf_counter() - started, 3),
+        "table": table,
+    }
+
+
+def import_statement_files(files: List[Tuple[str, bytes]], max_bytes: Optional[int] = None,
+                           max_total_bytes: Optional[int] = None, workers: int = IMPORT_WORKERS,
+                           progress: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+                           ledger: Optional[TransactionLedger] = None,
+                           categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Parse many statement files in parallel and merge them into one ledger.
+
+    ZIP archives are expanded first (see expand_archives for the size limits).
+    Each file is parsed on the shared pool of IMPORT_WORKERS processes, with at
+    most ``workers`` of this import's files in flight (in this process when
+    there is one file or one worker), and ``progress`` is called with each
+    file's report and the done/total counts as files finish. Files with errors
+    are reported and left out of the ledger. Uncategorized rows are categorized with
+    ``categorizer`` (built-in merchant rules when None).
+
+    Parsed files are merged into ``ledger`` (a fresh one when None), which
+    drops rows repeated across overlapping exports or already stored. Returns
+    ``table`` (the ledger sorted by date, or None when nothing was imported),
+    ``deduplication`` counts and ``files``, one report per file in input order.
+    """
+    files, skipped = expand_archives(files, max_bytes, max_total_bytes)
+    if len(files) > MAX_IMPORT_FILES:
+        raise ValueError(f"Too many files: {len(files)} (maximum {MAX_IMPORT_FILES})")
+
+    reports: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    workers = max(min(workers, len(files)), 1)
+    if workers == 1:
+        for index, (name, content) in enumerate(files):
+            reports[index] = parse_statement_file(name, content, max_bytes, categorizer)
+            if progress:
+                progress(reports[index], index + 1, len(files))
+    else:
+        pool = _get_process_pool()
+        queued = list(enumerate(files))[::-1]
+        in_flight = {}
+        done = 0
+        while queued or in_flight:
+            # Keep this import's share of the pool busy without queueing every file at once
+            while queued and len(in_flight) < workers:
+                index, (name, content) = queued.pop()
+                try:
+                    in_flight[pool.submit(parse_statement_file, name, content, max_bytes, categorizer)] = index
+                except RuntimeError as e:
+                    # The pool broke (or was discarded) since this import started
+                    _discard_process_pool(pool)
+                    reports[index] = _error_report(name, str(e))
+                    done += 1
+                    if progress:
+                        progress(reports[index], done, len(files))
+            if not in_flight:
+                continue
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = in_flight.pop(future)
+                try:
+                    reports[index] = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        _discard_process_pool(pool)
+                    reports[index] = _error_report(files[index][0], str(e))
+                done += 1
+                if progress:
+                    progress(reports[index], done, len(files))
+
+    tables = [report.pop("table") for report in reports]
+    imported = [table for table in tables if table is not None]
+    skipped = [{**report, "transaction_count": 0, "auto_categorized": 0, "seconds": 0.0} for report in skipped]
+    if not imported:
+        return {"table": None, "deduplication": None, "files": reports + skipped}
+
+    ledger = ledger if ledger is not None else TransactionLedger()
+    deduplication = ledger.merge(imported)
+    return {"table": ledger.table, "deduplication": deduplication, "files": reports + skipped}
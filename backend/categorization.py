@@ -0,0 +1,224 @@
+"""
+Transaction Categorization
+Merchant keyword matching that assigns categories to uncategorized transactions
+"""
+
+from typing import Dict, List, Iterable, Mapping, Optional, Tuple
+import unicodedata
+import numpy as np
+import pandas as pd
+
+# Built-in merchant keywords per category, matched as whole words anywhere in a description
+DEFAULT_MERCHANT_KEYWORDS = {
+    "Housing": ["RENT", "MORTGAGE", "HOA", "PROPERTY MGMT", "PROPERTY MANAGEMENT", "LANDLORD", "HOME DEPOT",
+                "LOWES", "IKEA"],
+    "Utilities": ["ELECTRIC", "ENERGY", "POWER", "WATER", "GAS CO", "NATURAL GAS", "COMCAST", "XFINITY", "VERIZON",
+                  "AT T", "T MOBILE", "SPECTRUM", "INTERNET", "UTILITY", "UTILITIES", "PG E", "CON EDISON"],
+    "Food": ["WALMART", "KROGER", "SAFEWAY", "WHOLE FOODS", "TRADER JOE", "TRADER JOES", "ALDI", "COSTCO", "PUBLIX",
+             "WEGMANS", "TESCO", "SAINSBURY", "LIDL", "GROCERY", "GROCERIES", "SUPERMARKET", "MARKET", "STARBUCKS",
+             "DUNKIN", "7 ELEVEN", "MCDONALD", "MCDONALDS", "CHIPOTLE", "SUBWAY", "DOMINOS", "PIZZA", "BURGER KING", "WENDYS",
+             "TACO BELL", "KFC", "RESTAURANT", "CAFE", "COFFEE", "BAKERY", "DINER", "GRILL", "DOORDASH", "GRUBHUB",
+             "UBER EATS", "DELIVEROO", "JUST EAT"],
+    "Transportation": ["UBER", "LYFT", "TAXI", "SHELL", "CHEVRON", "EXXON", "EXXONMOBIL", "MOBIL", "BP", "TEXACO",
+                       "ARCO", "SUNOCO", "FUEL", "GASOLINE", "PARKING", "TOLL", "TRANSIT", "METRO", "RAIL", "AMTRAK",
+                       "AIRLINES", "AIRWAYS", "DELTA AIR", "UNITED AIR", "SOUTHWEST", "AUTO REPAIR", "JIFFY LUBE",
+                       "DMV"],
+    "Healthcare": ["PHARMACY", "CVS", "WALGREENS", "RITE AID", "BOOTS", "CLINIC", "HOSPITAL", "MEDICAL", "DENTAL",
+                   "DENTIST", "DOCTOR", "OPTOMETRY", "HEALTH", "LABCORP", "QUEST DIAGNOSTICS"],
+    "Entertainment": ["NETFLIX", "SPOTIFY", "HULU", "DISNEY PLUS", "HBO", "APPLE MUSIC", "YOUTUBE", "STEAM",
+                      "PLAYSTATION", "XBOX", "NINTENDO", "CINEMA", "THEATER", "THEATRE", "AMC", "TICKETMASTER",
+                      "CONCERT", "BOWLING", "MUSEUM"],
+    "Personal": ["AMAZON", "AMZN", "TARGET", "EBAY", "ETSY", "BEST BUY", "APPLE STORE", "SEPHORA", "ULTA", "SALON",
+                 "BARBER", "GYM", "FITNESS", "PLANET FITNESS", "CLOTHING", "NIKE", "ZARA", "H M", "UNIQLO"],
+    "Savings": ["SAVINGS", "TRANSFER TO SAVINGS", "VANGUARD", "FIDELITY", "SCHWAB", "ROBINHOOD", "BROKERAGE",
+                "401K", "IRA"],
+}
+
+# Columns read as a transaction's description, in order of preference
+DESCRIPTION_COLUMNS = ("Description", "Merchant", "Payee", "Name", "Memo")
+
+# Characters of a description scanned for keywords; the rest is ignored
+MAX_DESCRIPTION_CHARS = 128
+
+# Distinct descriptions scanned together (rows of one codepoint matrix)
+SCAN_BLOCK_ROWS = 65_536
+
+# Character classes: separators, A-Z (case-folded, accents removed), 0-9, any other word character
+_SEPARATOR, _LETTERS, _DIGITS = 0, 1, 27
+_OTHER_WORD = 37
+_ALPHABET = 38
+
+# Codepoints classified by table; higher ones count as word characters
+_TABLE_CODEPOINTS = 0x250
+
+
+def _class_table() -> np.ndarray:
+    table = np.full(_TABLE_CODEPOINTS + 1, _OTHER_WORD, dtype=np.uint8)
+    for codepoint in range(_TABLE_CODEPOINTS):
+        char = chr(codepoint)
+        base = unicodedata.normalize("NFKD", char)[:1].upper()[:1]
+        if not char.isalnum():
+            table[codepoint] = _SEPARATOR
+        elif "A" <= base <= "Z":
+            table[codepoint] = _LETTERS + ord(base) - ord("A")
+        elif "0" <= base <= "9":
+            table[codepoint] = _DIGITS + ord(base) - ord("0")
+    return table
+
+
+_CHARACTER_CLASSES = _class_table()
+
+
+def _classify(text: str) -> List[int]:
+    """Character classes of a keyword with separator runs collapsed and trimmed"""
+    classes: List[int] = []
+    for char in text:
+        cls = int(_CHARACTER_CLASSES[min(ord(char), _TABLE_CODEPOINTS)])
+        if cls != _SEPARATOR or (classes and classes[-1] != _SEPARATOR):
+            classes.append(cls)
+    return classes[:-1] if classes and classes[-1] == _SEPARATOR else classes
+
+
+class MerchantMatcher:
+    """Aho-Corasick automaton over merchant keywords, run on many descriptions at once.
+
+    Keywords match whole words, case- and accent-insensitively, with any run of
+    punctuation or spaces standing in for a space ("AT T" matches "AT&T").
+    Each keyword is wrapped in separators and the automaton is compiled to a
+    dense (state, character class) transition table, so scanning is one table
+    lookup per character, done for a whole column of a codepoint matrix at a
+    time. When several keywords occur, override keywords beat built-in ones
+    and longer (more specific) keywords beat shorter ones ("UBER EATS" over
+    "UBER").
+    """
+
+    def __init__(self, keywords: Mapping[str, str], overrides: Optional[Mapping[str, str]] = None):
+        self.categories: List[Optional[str]] = [None]
+        category_ids: Dict[str, int] = {}
+        patterns: Dict[Tuple[int, ...], int] = {}
+        for rank, rules in enumerate((keywords, overrides or {})):
+            for keyword, category in rules.items():
+                classes = _classify(keyword)
+                if classes:
+                    if category not in category_ids:
+                        category_ids[category] = len(self.categories)
+                        self.categories.append(category)
+                    # Rank above length so any override outscores any built-in keyword;
+                    # the category id rides in the low bits of the same integer
+                    score = (rank << 16) | len(classes)
+                    patterns[(_SEPARATOR, *classes, _SEPARATOR)] = (score << 32) | category_ids[category]
+
+        # Trie of the patterns
+        children: List[Dict[int, int]] = [{}]
+        incoming = [_SEPARATOR]
+        outputs = [0]
+        for classes, output in patterns.items():
+            node = 0
+            for cls in classes:
+                if cls not in children[node]:
+                    children[node][cls] = len(children)
+                    children.append({})
+                    incoming.append(cls)
+                    outputs.append(0)
+                node = children[node][cls]
+            outputs[node] = output
+
+        # Breadth-first failure links folded into a full transition table
+        transitions = np.zeros((len(children), _ALPHABET), dtype=np.int32)
+        failure = [0] * len(children)
+        queue = [0]
+        for node in queue:
+            row = transitions[node]
+            if node:
+                row[:] = transitions[failure[node]]
+                # A node reports the best keyword ending here or at any suffix of it
+                outputs[node] = max(outputs[node], outputs[failure[node]])
+            for cls, child in children[node].items():
+                failure[child] = int(row[cls]) if node else 0
+                row[cls] = child
+                queue.append(child)
+            # Keywords hold single separators, so further separators stay put
+            if node and incoming[node] == _SEPARATOR:
+                row[_SEPARATOR] = node
+
+        # Flattened so one index (state offset + class) gives both the next state and what it reports
+        self.transitions = (transitions * _ALPHABET).ravel()
+        self.outputs = np.array(outputs, dtype=np.int64)[transitions].ravel()
+        self.start = int(self.transitions[_SEPARATOR])
+
+    def scan(self, texts: np.ndarray) -> np.ndarray:
+        """Index into ``categories`` of the best keyword in each string of a str array (0 when none)"""
+        found = np.zeros(len(texts), dtype=np.intp)
+        if not len(texts) or len(self.categories) == 1:
+            return found
+        if texts.itemsize > 4 * MAX_DESCRIPTION_CHARS:
+            texts = texts.astype(f"U{MAX_DESCRIPTION_CHARS}")
+        # Scan in blocks of similar length so short descriptions are not padded to the longest
+        order = np.argsort(np.strings.str_len(texts), kind="stable")
+        for start in range(0, len(texts), SCAN_BLOCK_ROWS):
+            rows = order[start:start + SCAN_BLOCK_ROWS]
+            block = texts[rows]
+            width = max(int(np.strings.str_len(block[-1])), 1)
+            codepoints = block.view(np.uint32).reshape(len(block), -1)[:, :width]
+            classes = np.ascontiguousarray(_CHARACTER_CLASSES[np.minimum(codepoints, _TABLE_CODEPOINTS)].T)
+            state = np.full(len(block), self.start, dtype=np.int32)
+            index = np.empty_like(state)
+            best = np.zeros(len(block), dtype=np.int64)
+            # A final separator column closes keywords that end the description
+            for column in (*classes, np.zeros(len(block), dtype=np.uint8)):
+                np.add(state, column, out=index)
+                np.take(self.transitions, index, out=state)
+                np.maximum(best, self.outputs[index], out=best)
+            found[rows] = best & 0xFFFFFFFF
+        return found
+
+
+class Categorizer:
+    """Assigns categories from descriptions: user overrides first, then built-in merchants.
+
+    ``overrides`` maps keywords or merchant names to categories. Matching runs
+    once per distinct description, so a statement of repeat merchants costs a
+    factorize plus one automaton pass over its distinct descriptions.
+    """
+
+    def __init__(self, overrides: Optional[Mapping[str, str]] = None,
+                 keywords: Mapping[str, Iterable[str]] = DEFAULT_MERCHANT_KEYWORDS):
+        self.overrides = dict(overrides or {})
+        self.matcher = MerchantMatcher({word: category for category, words in keywords.items() for word in words},
+                                       self.overrides)
+
+    def categorize(self, descriptions: pd.Series) -> pd.Series:
+        """Category per description (None when nothing matches), aligned with the input"""
+        codes, uniques = pd.factorize(descriptions)
+        categories = np.array(self.matcher.categories + [None], dtype=object)
+        # Code -1 (missing description) picks the trailing None
+        matched = np.append(categories[self.matcher.scan(np.asarray(uniques, dtype=str))], None)
+        return pd.Series(matched[codes], index=descriptions.index, dtype=object)
+
+
+default_categorizer = Categorizer()
+
+
+def fill_categories(df: pd.DataFrame, categorizer: Optional[Categorizer] = None) -> int:
+    """Fill missing or blank Category values in place from the row's description.
+
+    The description is the first of DESCRIPTION_COLUMNS present; a missing
+    Category column is created. Returns how many rows were given a category;
+    rows nothing matches stay empty (and are later labelled Uncategorized).
+    """
+    source = next((column for column in DESCRIPTION_COLUMNS if column in df.columns), None)
+    if "Category" in df.columns:
+        missing = (df["Category"].isna() | df["Category"].eq("")).to_numpy()
+    else:
+        df["Category"] = None
+        missing = np.ones(len(df), dtype=bool)
+    if source is None or not missing.any():
+        return 0
+
+    rows = np.flatnonzero(missing)
+    found = (categorizer or default_categorizer).categorize(df[source].iloc[rows]).to_numpy()
+    matched = pd.notna(found)
+    if df["Category"].dtype != object:
+        df["Category"] = df["Category"].astype(object)
+    df.iloc[rows[matched], df.columns.get_loc("Category")] = found[matched]
+    return int(matched.sum())
@@ -0,0 +1,101 @@
+"""
+Category Index
+Canonical category IDs for raw category labels, built once from a synonym table
+"""
+
+from typing import Dict, List, Iterable, Mapping, Tuple
+import re
+import numpy as np
+import pandas as pd
+
+# Label used for transactions without a category
+UNCATEGORIZED = "Uncategorized"
+
+# Canonical categories (in reporting order) and the labels that mean the same thing; matching
+# ignores case, spacing and punctuation, and "&" matches "and"
+CATEGORY_SYNONYMS = {
+    "Housing": ["Rent", "Mortgage", "Housing & Rent", "Home", "HOA", "Property Tax"],
+    "Utilities": ["Utility", "Bills & Utilities", "Electric", "Electricity", "Water", "Internet", "Phone",
+                  "Mobile Phone", "Cable", "Gas & Electric"],
+    "Food": ["Groceries", "Grocery", "Food & Groceries", "Food & Drink", "Food & Dining", "Dining", "Dining Out",
+             "Restaurants", "Restaurant", "Coffee", "Coffee Shops", "Takeout", "Fast Food"],
+    "Transportation": ["Transport", "Auto", "Auto & Transport", "Car", "Gas", "Gas & Fuel", "Fuel", "Gasoline",
+                       "Parking", "Public Transit", "Transit", "Rideshare", "Taxi"],
+    "Healthcare": ["Health", "Health Care", "Medical", "Pharmacy", "Doctor", "Dental", "Vision"],
+    "Entertainment": ["Fun", "Recreation", "Movies", "Music", "Games", "Hobbies", "Streaming"],
+    "Personal": ["Personal Care", "Shopping", "Clothing", "Apparel", "Gym", "Fitness"],
+    "Savings": ["Saving", "Investment", "Investments"],
+    "Debt": ["Debt Payment", "Debt Payments", "Loan", "Loans", "Loan Payment", "Credit Card", "Credit Card Payment",
+             "Student Loan"],
+    "Insurance": ["Life Insurance", "Health Insurance", "Auto Insurance", "Home Insurance"],
+    "Education": ["Tuition", "School", "Books"],
+    "Transfer": ["Transfers"],
+    "Other": ["Misc", "Miscellaneous", "Other Expenses", "General"],
+    UNCATEGORIZED: ["Uncategorised", "Unknown", ""],
+}
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def category_key(label: str) -> str:
+    """Matching key for a label: case-folded words joined by single spaces, "&" read as "and" """
+    return _NON_WORD.sub(" ", label.casefold().replace("&", " and ")).strip()
+
+
+class CategoryIndex:
+    """Maps raw category labels to small-int category IDs.
+
+    The synonym table is compiled once into a dict from matching key to ID, so
+    "Food", "food ", "FOOD" and "Groceries" all get the ID of Food. Canonical
+    categories keep the same IDs in every table (their position in the
+    synonym table); labels outside it are merged by key and numbered after
+    them, per call, under their first spelling.
+    """
+
+    def __init__(self, synonyms: Mapping[str, Iterable[str]] = CATEGORY_SYNONYMS):
+        self.names: List[str] = list(synonyms)
+        self.ids: Dict[str, int] = {}
+        for category_id, (name, labels) in enumerate(synonyms.items()):
+            for label in (name, *labels):
+                self.ids.setdefault(category_key(label), category_id)
+        self.uncategorized = self.ids[category_key(UNCATEGORIZED)]
+
+    def encode(self, labels: pd.Series) -> Tuple[np.ndarray, List[str]]:
+        """Per-row int32 category IDs and the names they index; missing labels are Uncategorized.
+
+        Keys are looked up once per distinct label, not per row.
+        """
+        codes, uniques = pd.factorize(labels)
+        names = list(self.names)
+        extra: Dict[str, int] = {}
+        ids = np.empty(len(uniques) + 1, dtype=np.int32)
+        for position, label in enumerate(uniques):
+            key = category_key(str(label))
+            category_id = self.ids.get(key)
+            if category_id is None:
+                category_id = extra.setdefault(key, len(names))
+                if category_id == len(names):
+                    names.append(str(label).strip())
+            ids[position] = category_id
+        # Code -1 (missing label) picks the trailing Uncategorized
+        ids[-1] = self.uncategorized
+        return ids[codes], names
+
+    def sum_by_category(self, labels: pd.Series, amounts: np.ndarray) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Names, summed amounts and row counts of the categories present, in reporting order.
+
+        Sums run with np.bincount over the integer IDs, so no per-row string hashing.
+        """
+        codes, names = self.encode(labels)
+        sums = np.bincount(codes, weights=np.asarray(amounts, dtype=float), minlength=len(names))
+        counts = np.bincount(codes, minlength=len(names))
+        present = np.flatnonzero(counts)
+        return [names[category_id] for category_id in present], sums[present], counts[present]
+
+    def totals(self, amounts: Mapping[str, float]) -> Dict[str, float]:
+        """Sum a label -> amount mapping per canonical category"""
+        names, sums, _ = self.sum_by_category(pd.Series(list(amounts), dtype=object), list(amounts.values()))
+        return dict(zip(names, sums.tolist()))
+
+
+default_category_index = CategoryIndex()
@@ -0,0 +1,154 @@
+"""
+Debt Consolidation Evaluator
+Scores consolidation loans and balance-transfer offers against the current payoff plan
+"""
+
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+from debt_engine import DEFAULT_MIN_PAYMENT_RATE, MAX_MONTHS, debt_arrays, simulate_rows
+from loans import amortization_payment
+
+
+def _offer_arrays(offers: List[Dict[str, Any]]):
+    """Convert offer dicts into monthly rate, fee, term, promo and limit arrays"""
+    rates = np.array([float(offer.get("interest_rate") or 0) for offer in offers], dtype=float) / 1200
+    fee_rates = np.array([float(offer.get("fee_percent") or 0) for offer in offers], dtype=float) / 100
+    flat_fees = np.array([float(offer.get("fee") or 0) for offer in offers], dtype=float)
+    terms = np.array([int(offer.get("term_months") or 0) for offer in offers], dtype=int)
+    promo_months = np.array([
+        int(offer.get("promo_months") or 0) if offer.get("promo_rate") is not None else 0
+        for offer in offers
+    ], dtype=int)
+    promo_rates = np.array([float(offer.get("promo_rate") or 0) for offer in offers], dtype=float) / 1200
+    limits = np.array([
+        np.inf if offer.get("max_amount") is None else float(offer["max_amount"]) for offer in offers
+    ], dtype=float)
+    return rates, fee_rates, flat_fees, terms, promo_rates, promo_months, limits
+
+
+def _debt_promos(debts: List[Dict[str, Any]], rates: np.ndarray):
+    """Promotional monthly rates and their lengths for the existing debts"""
+    promo_months = np.array([
+        int(debt.get("promo_months") or 0) if debt.get("promo_rate") is not None else 0
+        for debt in debts
+    ], dtype=int)
+    promo_rates = np.array([float(debt.get("promo_rate") or 0) for debt in debts], dtype=float) / 1200
+    return np.where(promo_months > 0, promo_rates, rates), promo_months
+
+
+def evaluate_offers(debts: List[Dict[str, Any]], offers: List[Dict[str, Any]],
+                    extra_payment: float = 0.0, max_months: int = MAX_MONTHS) -> Dict[str, Any]:
+    """Simulate every offer against the current avalanche plan in one batch.
+
+    Each offer moves eligible balances into one new loan: the debts it names in
+    ``consolidate``, or else every revolving debt charging more than the offer's
+    rate, highest rate first until ``max_amount`` is used up. Fees are added to
+    the new balance. The monthly budget stays what the current plan pays (raised
+    only if the new loan's required payment needs more), so offers are compared
+    on total cost: interest plus fees.
+    """
+    balances, rates, min_payments = debt_arrays(debts)
+    n = len(debts)
+    budget = float(min_payments.sum() + extra_payment)
+    names = [str(debt.get("name") or f"Debt {i + 1}") for i, debt in enumerate(debts)]
+
+    (offer_rates, fee_rates, flat_fees, terms, offer_promo_rates,
+     offer_promo_months, limits) = _offer_arrays(offers)
+    k = len(offers)
+
+    # Which debts each offer may absorb (k, n)
+    debt_terms = np.array([int(debt.get("term_months") or 0) for debt in debts], dtype=int)
+    eligible = (debt_terms == 0)[None, :] & (rates[None, :] > offer_rates[:, None])
+    for i, offer in enumerate(offers):
+        if offer.get("consolidate"):
+            chosen = set(offer["consolidate"])
+            eligible[i] = [name in chosen for name in names]
+
+    # Fill each offer's limit from the highest-rate eligible debt down, allowing a partial last transfer
+    by_rate = np.lexsort((balances, -rates))
+    eligible_balances = np.where(eligible[:, by_rate], balances[by_rate], 0.0)
+    filled = np.minimum(np.cumsum(eligible_balances, axis=1), limits[:, None])
+    moved_sorted = np.diff(filled, axis=1, prepend=0.0)
+    moved = np.empty_like(moved_sorted)
+    moved[:, by_rate] = moved_sorted
+
+    principal = moved.sum(axis=1)
+    new_balances = principal * (1 + fee_rates) + np.where(principal > 0, flat_fees, 0.0)
+    fees = new_balances - principal
+    new_mins = np.where(terms > 0, amortization_payment(new_balances, offer_rates, np.maximum(terms, 1)),
+                        new_balances * DEFAULT_MIN_PAYMENT_RATE)
+
+    # Row 0 is the current plan; row i + 1 is offer i with its loan in the last column
+    row_balances = np.zeros((k + 1, n + 1))
+    row_balances[:, :n] = balances
+    row_balances[1:, :n] -= moved
+    row_balances[1:, n] = new_balances
+    row_balances[row_balances < 0] = 0
+    # A partly transferred debt keeps a minimum in proportion to what is left on it
+    row_mins = np.zeros((k + 1, n + 1))
+    row_mins[:, :n] = min_payments
+    kept = np.divide(row_balances[1:, :n], balances, out=np.zeros((k, n)), where=balances > 0)
+    row_mins[1:, :n] *= kept
+    row_mins[1:, n] = new_mins
+    nominal = np.zeros((k + 1, n + 1))
+    nominal[:, :n] = rates
+    nominal[1:, n] = offer_rates
+
+    required = np.where(row_balances > 0, row_mins, 0.0).sum(axis=1)
+    budgets = np.maximum(budget, required)
+
+    # Avalanche order within every row, on nominal rates like build_payoff_plans
+    orders = np.lexsort((row_balances, -nominal))
+
+    # Promo expiries of the existing debts and of the offers split the horizon
+    debt_initial, debt_promo_months = _debt_promos(debts, rates)
+    boundaries = np.unique(np.concatenate([debt_promo_months, offer_promo_months]))
+    boundaries = boundaries[(boundaries > 0) & (boundaries < max_months)]
+    segments = []
+    starts = np.concatenate([[0], boundaries]).astype(int)
+    ends = np.concatenate([boundaries, [max_months]]).astype(int)
+    for start, end in zip(starts, ends):
+        segment_rates = nominal.copy()
+        segment_rates[:, :n] = np.where(debt_promo_months > start, debt_initial, rates)
+        segment_rates[1:, n] = np.where(offer_promo_months > start, offer_promo_rates, offer_rates)
+        segments.append((np.take_along_axis(segment_rates, orders, axis=1), int(end)))
+
+    result = simulate_rows(np.take_along_axis(row_balances, orders, axis=1),
+                           np.take_along_axis(row_mins, orders, axis=1), budgets, segments)
+
+    total_interest = result["total_interest"]
+    months = result["months_to_payoff"]
+    base_interest = float(total_interest[0])
+    net_savings = base_interest - (total_interest[1:] + fees)
+
+    evaluated = []
+    for i in np.argsort(-net_savings, kind="stable"):
+        evaluated.append({
+            "name": str(offers[i].get("name") or f"Offer {i + 1}"),
+            "consolidated_amount": round(float(principal[i]), 2),
+            "debts_consolidated": [names[j] for j in np.nonzero(moved[i] > 0)[0]],
+            "fees": round(float(fees[i]), 2),
+            "total_interest": round(float(total_interest[i + 1]), 2),
+            "total_cost": round(float(total_interest[i + 1] + fees[i]), 2),
+            "months_to_payoff": int(months[i + 1]),
+            "monthly_payment": round(float(budgets[i + 1]), 2),
+            "paid_off": bool(result["paid_off"][i + 1]),
+            "net_savings": round(float(net_savings[i]), 2),
+            "months_saved": int(months[0] - months[i + 1]),
+        })
+
+    best: Optional[Dict[str, Any]] = None
+    if evaluated and evaluated[0]["net_savings"] > 0 and evaluated[0]["consolidated_amount"] > 0:
+        best = evaluated[0]
+
+    return {
+        "current_plan": {
+            "total_interest": round(base_interest, 2),
+            "months_to_payoff": int(months[0]),
+            "monthly_payment": round(budget, 2),
+            "paid_off": bool(result["paid_off"][0]),
+        },
+        "offers": evaluated,
+        "best_offer": best["name"] if best else None,
+    }
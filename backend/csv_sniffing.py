@@ -0,0 +1,75 @@
+"""
+CSV Sniffing
+Encoding, dialect and header detection from a bounded prefix of an upload
+"""
+
+from typing import Dict, Any, Sequence
+import codecs
+import csv
+
+# Bytes inspected at the start of a file; detection cost does not grow with file size
+SNIFF_BYTES = 64 * 1024
+
+# Delimiters considered by the sniffer (semicolons are common in European bank exports)
+CANDIDATE_DELIMITERS = ",;\t|"
+
+# Byte-order marks checked before trying to decode
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Encodings tried in order on BOM-less input; latin-1 decodes any byte string
+FALLBACK_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """Encoding of a file judged from its first bytes (a BOM, else the first that decodes)"""
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if prefix.startswith(bom):
+            return encoding
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            # Not final: the prefix may end part-way through a multi-byte character
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return FALLBACK_ENCODINGS[-1]
+
+
+def sniff_csv(prefix: bytes, expected_columns: Sequence[str] = ()) -> Dict[str, Any]:
+    """pandas.read_csv options sniffed from the first bytes of a CSV file.
+
+    Returns ``encoding``, ``sep`` and ``quotechar``, plus ``header=None`` and
+    ``names=expected_columns`` when the first row is data rather than a header
+    and has exactly as many fields as expected. Only complete lines of the
+    prefix are examined, so pass at most SNIFF_BYTES from the start of the file.
+    """
+    encoding = detect_encoding(prefix)
+    sample = codecs.getincrementaldecoder(encoding)(errors="replace").decode(prefix[:SNIFF_BYTES], final=False)
+    if len(prefix) >= SNIFF_BYTES and "\n" in sample:
+        sample = sample[:sample.rindex("\n") + 1]
+
+    options: Dict[str, Any] = {"encoding": encoding}
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(sample, delimiters=CANDIDATE_DELIMITERS)
+        options["sep"] = dialect.delimiter
+        options["quotechar"] = dialect.quotechar or '"'
+    except csv.Error:
+        # Single-column or irregular sample; the parser's defaults are the best guess
+        return options
+
+    first_row = next(csv.reader([sample.split("\n", 1)[0]], delimiter=options["sep"],
+                                quotechar=options["quotechar"]), [])
+    if expected_columns and not set(expected_columns) & {field.strip() for field in first_row}:
+        try:
+            has_header = sniffer.has_header(sample)
+        except csv.Error:
+            has_header = True
+        if not has_header and len(first_row) == len(expected_columns):
+            options["header"] = None
+            options["names"] = list(expected_columns)
+    return options
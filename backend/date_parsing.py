@@ -0,0 +1,118 @@
+"""
+Transaction Date Parsing
+Sample-based date format inference, cached per source profile and re-checked per upload, with a per-row fallback
+"""
+
+from typing import List, Optional
+import warnings
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from ttl_cache import TTLCache
+
+# Values sampled (spread across the column) when inferring a format
+DATE_SAMPLE_SIZE = 200
+
+# Formats tried after pandas' own guesses from the first sampled value
+CANDIDATE_DATE_FORMATS = (
+    "%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d", "%d.%m.%Y", "%m-%d-%Y", "%d-%m-%Y",
+    "%m/%d/%y", "%d/%m/%y", "%Y%m%d", "%d %b %Y", "%b %d, %Y", "%d-%b-%Y",
+    "%Y-%m-%d %H:%M:%S", "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M",
+)
+
+# A format carried over from an earlier chunk is re-inferred when it fails on more than this share of a column
+STALE_FORMAT_FAILURE_RATE = 0.5
+
+# Inferred format per source profile (e.g. a bank's export header); profiles are shared by unrelated
+# uploads, so an entry is only a hint that each upload's own sample must confirm
+date_format_cache = TTLCache(maxsize=256, ttl=24 * 3600)
+
+
+def _sample(values: pd.Series) -> pd.Series:
+    """Up to DATE_SAMPLE_SIZE non-empty values, evenly spread so mixed files are noticed"""
+    if len(values) > DATE_SAMPLE_SIZE:
+        values = values.iloc[np.linspace(0, len(values) - 1, DATE_SAMPLE_SIZE).astype(int)]
+    return values.dropna().astype(str)
+
+
+def _candidates(sample: pd.Series) -> List[str]:
+    """pandas' guesses (month-first, then day-first) from the first sampled value, then the known formats"""
+    first = sample.iloc[0]
+    with warnings.catch_warnings():
+        # pandas warns when a guess implies day-first; both orders are scored anyway
+        warnings.simplefilter("ignore", UserWarning)
+        guesses = [guess_datetime_format(first), guess_datetime_format(first, dayfirst=True)]
+    return list(dict.fromkeys(fmt for fmt in guesses + list(CANDIDATE_DATE_FORMATS) if fmt))
+
+
+def infer_date_format(values: pd.Series) -> Optional[str]:
+    """The format that parses the most sampled values; None if none parses any"""
+    sample = _sample(values)
+    if sample.empty:
+        return None
+
+    best, best_parsed = None, 0
+    for fmt in _candidates(sample):
+        parsed = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if parsed > best_parsed:
+            best, best_parsed = fmt, parsed
+            if parsed == len(sample):
+                break
+    return best
+
+
+def _confirms(fmt: str, sample: pd.Series) -> bool:
+    """Whether ``fmt`` parses every sampled value and no other candidate reads them as different dates
+    (e.g. a day-first format over a sample whose days are all 12 or less)"""
+    parsed = pd.to_datetime(sample, format=fmt, errors="coerce")
+    if parsed.isna().any():
+        return False
+    for other in _candidates(sample):
+        if other != fmt:
+            alternative = pd.to_datetime(sample, format=other, errors="coerce")
+            if alternative.notna().all() and not alternative.equals(parsed):
+                return False
+    return True
+
+
+def resolve_date_format(values: pd.Series, profile: Optional[str] = None) -> Optional[str]:
+    """The format to parse a column with: the profile's cached format when this column's own
+    sample confirms it, otherwise one inferred from the sample (and cached for the profile)"""
+    sample = _sample(values)
+    if sample.empty:
+        return None
+    fmt = date_format_cache.get(profile) if profile is not None else None
+    if fmt is not None and _confirms(fmt, sample):
+        return fmt
+    fmt = infer_date_format(sample)
+    if profile is not None and fmt is not None:
+        date_format_cache.set(profile, fmt)
+    return fmt
+
+
+def parse_dates(values: pd.Series, profile: Optional[str] = None, date_format: Optional[str] = None) -> pd.Series:
+    """Parse a date column: explicit inferred format first, per-row guessing only for misses.
+
+    ``profile`` identifies the source (e.g. the file's header) whose cached format
+    is tried first (see resolve_date_format). Readers resolve the format once per
+    upload and pass it as ``date_format`` for the remaining chunks, so one file's
+    chunks agree on day/month order. Unparseable values come back as NaT.
+    """
+    fmt = date_format if date_format is not None else resolve_date_format(values, profile)
+    if fmt is None:
+        return pd.to_datetime(values, format="mixed", errors="coerce")
+
+    parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+    failed = parsed.isna()
+    if not failed.any():
+        return parsed
+    failed &= values.notna()
+
+    if date_format is not None and failed.mean() > STALE_FORMAT_FAILURE_RATE:
+        # The file changed format part way through; infer again from this column
+        return parse_dates(values)
+
+    if failed.any():
+        parsed[failed] = pd.to_datetime(values[failed], format="mixed", errors="coerce")
+    return parsed
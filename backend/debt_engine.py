@@ -0,0 +1,698 @@
+"""
+Debt Payoff Engine
+Exact multi-debt amortization used by the rule-based debt reduction analysis
+"""
+
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import hashlib
+import heapq
+import json
+import math
+import numpy as np
+
+from loans import amortization_payment
+
+# Longest horizon simulated before a plan is reported as not paid off (50 years)
+MAX_MONTHS = 600
+
+# Minimum payment assumed when a debt does not specify one (matches the old estimate)
+DEFAULT_MIN_PAYMENT_RATE = 0.02
+
+# Balances below half a cent are treated as paid off
+BALANCE_EPSILON = 0.005
+
+STRATEGIES = ("avalanche", "snowball")
+
+# Adjacent-swap rounds the optimal plan search may take before settling
+OPTIMAL_SEARCH_ROUNDS = 50
+
+# Batches of up to this many rows run the scalar event engine; NumPy's per-call overhead only pays off on larger ones
+SCALAR_EVENT_ROWS = 8
+
+# Largest exponent passed to math.exp; growth beyond it is out of float range anyway
+_MAX_GROWTH_EXPONENT = 709.0
+
+# (month, monthly rates) pairs: the rates in force from that many elapsed months on
+RateChanges = List[Tuple[int, np.ndarray]]
+
+
+def debt_arrays(debts: List[Dict[str, Any]]):
+    """Convert debt dicts into balance, monthly rate and minimum payment arrays.
+
+    Installment loans (debts with term_months) default to their level
+    amortizing payment rather than a share of the balance.
+    """
+    balances = np.array([float(debt.get("amount") or 0) for debt in debts], dtype=float)
+    rates = np.array([float(debt.get("interest_rate") or 0) for debt in debts], dtype=float) / 1200
+    terms = np.array([int(debt.get("term_months") or 0) for debt in debts], dtype=int)
+    min_payments = np.where(terms > 0, amortization_payment(balances, rates, terms), balances * DEFAULT_MIN_PAYMENT_RATE)
+    specified = [i for i, debt in enumerate(debts) if debt.get("min_payment") is not None]
+    min_payments[specified] = [float(debts[i]["min_payment"]) for i in specified]
+    return balances, rates, min_payments
+
+
+def portfolio_key(debts: List[Dict[str, Any]], *extra: Any) -> str:
+    """Order-insensitive hash of the debt fields the engine reads, plus any extra inputs"""
+    canonical = sorted(
+        (
+            str(debt.get("name") or ""),
+            float(debt.get("amount") or 0),
+            float(debt.get("interest_rate") or 0),
+            None if debt.get("min_payment") is None else float(debt["min_payment"]),
+            None if debt.get("promo_rate") is None else float(debt["promo_rate"]),
+            int(debt.get("promo_months") or 0),
+            bool(debt.get("variable_rate")),
+            int(debt.get("term_months") or 0),
+        )
+        for debt in debts
+    )
+    payload = json.dumps([canonical, list(extra)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def promo_schedule(debts: List[Dict[str, Any]], rates: np.ndarray) -> RateChanges:
+    """Rate changes (starting at month 0) for debts with promotional periods"""
+    promo_months = np.array([
+        int(debt.get("promo_months") or 0) if debt.get("promo_rate") is not None else 0
+        for debt in debts
+    ], dtype=int)
+    promo_rates = np.array([float(debt.get("promo_rate") or 0) for debt in debts], dtype=float) / 1200
+
+    if not (promo_months > 0).any():
+        return []
+
+    initial = np.where(promo_months > 0, promo_rates, rates)
+    return [(0, initial)] + [
+        (int(month), np.where((promo_months > 0) & (promo_months <= month), rates, initial))
+        for month in np.unique(promo_months[promo_months > 0])
+    ]
+
+
+def _rate_segments(rates: np.ndarray, rate_changes: Optional[RateChanges], max_months: int):
+    """Split the horizon into (monthly rates, end month) segments of constant rates"""
+    segments = []
+    current = rates
+    for start, new_rates in sorted(rate_changes or [], key=lambda change: change[0]):
+        if start >= max_months:
+            break
+        if start > 0:
+            segments.append((current, start))
+        current = new_rates
+    segments.append((current, max_months))
+    return segments
+
+
+def payoff_order(balances: np.ndarray, rates: np.ndarray, strategy: str) -> np.ndarray:
+    """Return debt indices in the order a strategy directs surplus payments"""
+    if strategy == "avalanche":
+        # Highest interest first, smaller balance breaks ties
+        return np.lexsort((balances, -rates))
+    if strategy == "snowball":
+        # Smallest balance first, higher interest breaks ties
+        return np.lexsort((-rates, balances))
+    raise ValueError(f"Unknown payoff strategy: {strategy}")
+
+
+def apply_month(balances: np.ndarray, rates: np.ndarray, min_payments: np.ndarray, budgets: np.ndarray) -> np.ndarray:
+    """Advance every row by one month in place and return the interest accrued per row.
+
+    Columns are in priority order: interest accrues first, every debt receives its
+    minimum, and whatever is left of the row's budget cascades down the columns.
+    """
+    interest = balances * rates
+    balances += interest
+    paid = np.minimum(min_payments, balances)
+    balances -= paid
+    surplus = budgets - paid.sum(axis=1)
+    # Surplus reaching a column is what is left after every debt ahead of it is cleared
+    reaching = surplus[:, None] - (np.cumsum(balances, axis=1) - balances)
+    np.maximum(reaching, 0, out=reaching)
+    balances -= np.minimum(reaching, balances, out=reaching)
+    balances[balances < BALANCE_EPSILON] = 0
+    return interest.sum(axis=1)
+
+
+def simulate_monthly(balances: np.ndarray, rates: np.ndarray, min_payments: np.ndarray,
+                     orders: np.ndarray, budgets: np.ndarray, max_months: int = MAX_MONTHS,
+                     rate_changes: Optional[RateChanges] = None) -> Dict[str, np.ndarray]:
+    """Simulate several payoff plans month by month in one batch.
+
+    Args:
+        balances, rates, min_payments: per-debt arrays of length n (rates are monthly)
+        orders: (k, n) debt indices, one priority ordering per plan
+        budgets: (k,) total monthly payment per plan; freed minimums roll forward
+        rate_changes: optional later rates, e.g. from promo_schedule
+
+    Returns:
+        Dict of per-plan arrays: total_interest, months_to_payoff, paid_off,
+        remaining_balance and payoff_month (k, n) in the original debt order
+        (0 = not paid off)
+    """
+    orders = np.atleast_2d(orders)
+    rows = orders.shape[0]
+    bal = balances[orders].astype(float)
+    row_mins = min_payments[orders]
+    budgets = np.broadcast_to(np.asarray(budgets, dtype=float), (rows,))
+
+    total_interest = np.zeros(rows)
+    # Months each debt (and each plan) still carried a balance after payment
+    months_open = np.zeros(bal.shape, dtype=int)
+    rows_open = np.zeros(rows, dtype=int)
+
+    month = 0
+    for segment_rates, segment_end in _rate_segments(rates, rate_changes, max_months):
+        row_rates = segment_rates[orders]
+        while month < segment_end:
+            open_debts = bal > 0
+            if not open_debts.any():
+                break
+            month += 1
+            months_open += open_debts
+            rows_open += open_debts.any(axis=1)
+            total_interest += apply_month(bal, row_rates, row_mins, budgets)
+
+    paid_off = ~(bal > 0).any(axis=1)
+    payoff_month = np.where(bal > 0, 0, months_open)
+    # Scatter payoff months back into the caller's debt order
+    restored = np.empty_like(payoff_month)
+    np.put_along_axis(restored, orders, payoff_month, axis=1)
+
+    return {
+        "total_interest": total_interest,
+        "months_to_payoff": rows_open,
+        "paid_off": paid_off,
+        "remaining_balance": bal.sum(axis=1),
+        "payoff_month": restored,
+    }
+
+
+
+def _months_until_cleared(balances: np.ndarray, rates: np.ndarray, log_growth: np.ndarray,
+                          payments: np.ndarray, zero_rate: Optional[np.ndarray] = None) -> np.ndarray:
+    """NPER: fractional months until a balance under a fixed payment drops below BALANCE_EPSILON.
+
+    log_growth is log1p(rates) and zero_rate masks interest-free debts (None if there
+    are none). Returns inf where the payment never outpaces the interest.
+    Callers must silence divide/invalid floating point warnings.
+    """
+    headroom = payments - rates * balances
+    cleared = np.log((payments - rates * BALANCE_EPSILON) / headroom) / log_growth
+    if zero_rate is not None:
+        cleared = np.where(zero_rate, (balances - BALANCE_EPSILON) / payments, cleared)
+    cleared[~(headroom > 0)] = np.inf
+    return cleared
+
+
+def _advance_closed_form(balances: np.ndarray, rates: np.ndarray, log_growth: np.ndarray,
+                         payments: np.ndarray, months: np.ndarray,
+                         zero_rate: Optional[np.ndarray] = None) -> np.ndarray:
+    """Balances after paying a fixed amount for a whole number of months (no payoff in between)"""
+    growth = np.exp(log_growth * months)
+    annuity = (growth - 1) / rates
+    if zero_rate is not None:
+        annuity = np.where(zero_rate, np.broadcast_to(months, rates.shape), annuity)
+    return balances * growth - payments * annuity
+
+
+def simulate_events(balances: np.ndarray, rates: np.ndarray, min_payments: np.ndarray,
+                    orders: np.ndarray, budgets: np.ndarray, max_months: int = MAX_MONTHS,
+                    rate_changes: Optional[RateChanges] = None) -> Dict[str, np.ndarray]:
+    """Event-driven equivalent of simulate_monthly.
+
+    Between two payoffs every open debt receives a constant payment (its minimum,
+    or the rest of the budget for the priority debt), so the month of the next
+    payoff follows in closed form. Each row jumps straight to that month, plays
+    it exactly so the surplus can cascade, and repeats; the loop runs about once
+    per debt (plus once per rate change) instead of once per month.
+    """
+    orders = np.atleast_2d(orders)
+    segments = [(segment_rates[orders], segment_end)
+                for segment_rates, segment_end in _rate_segments(rates, rate_changes, max_months)]
+    result = simulate_rows(balances[orders], min_payments[orders], budgets, segments)
+
+    restored = np.empty_like(result["payoff_month"])
+    np.put_along_axis(restored, orders, result["payoff_month"], axis=1)
+    result["payoff_month"] = restored
+    return result
+
+
+def simulate_rows(bal: np.ndarray, row_mins: np.ndarray, budgets: np.ndarray,
+                  segments: List[Tuple[np.ndarray, int]]) -> Dict[str, np.ndarray]:
+    """Event-driven core over rows that are already in priority order.
+
+    Every row carries its own balances, minimums and rates, so scenarios that
+    change the debts themselves (not just the order or the budget) can share one
+    batch. ``segments`` lists (row rates, end month) pairs in time order;
+    payoff_month comes back in the same column order as the input. Small
+    batches go through _simulate_row one row at a time.
+    """
+    bal = np.atleast_2d(np.asarray(bal, dtype=float)).copy()
+    bal[bal < BALANCE_EPSILON] = 0
+    rows, n = bal.shape
+    row_mins = np.broadcast_to(np.asarray(row_mins, dtype=float), (rows, n))
+    budgets = np.broadcast_to(np.asarray(budgets, dtype=float), (rows,)).copy()
+    if rows <= SCALAR_EVENT_ROWS:
+        row_segments = [(np.broadcast_to(segment_rates, (rows, n)).tolist(), end) for segment_rates, end in segments]
+        outcomes = [_simulate_row(bal[row].tolist(), row_mins[row].tolist(), float(budgets[row]),
+                                  [(segment_rates[row], end) for segment_rates, end in row_segments])
+                    for row in range(rows)]
+        total_interest, months_to_payoff, remaining, payoff_month = zip(*outcomes) if outcomes else ([],) * 4
+        remaining = np.array(remaining, dtype=float)
+        return {
+            "total_interest": np.array(total_interest, dtype=float),
+            "months_to_payoff": np.array(months_to_payoff, dtype=int),
+            "paid_off": remaining == 0,
+            "remaining_balance": remaining,
+            "payoff_month": np.array(payoff_month, dtype=int).reshape(rows, n),
+        }
+    row_index = np.arange(rows)
+
+    total_interest = np.zeros(rows)
+    month = np.zeros(rows, dtype=int)
+    payoff_month = np.zeros((rows, n), dtype=int)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for segment_rates, segment_end in segments:
+            row_rates = np.broadcast_to(segment_rates, (rows, n))
+            log_growth = np.log1p(row_rates)
+            zero_rate = row_rates == 0
+            zero_rate = zero_rate if zero_rate.any() else None
+
+            while True:
+                open_debts = bal > 0
+                live = open_debts.any(axis=1) & (month < segment_end)
+                if not live.any():
+                    break
+
+                # Payments in the current regime: minimums, plus the surplus on the priority debt
+                payments = np.where(open_debts, row_mins, 0.0)
+                target = open_debts.argmax(axis=1)
+                payments[row_index, target] += budgets - payments.sum(axis=1)
+
+                cleared_in = _months_until_cleared(bal, row_rates, log_growth, payments, zero_rate)
+                cleared_in[~open_debts] = np.inf
+                next_event = np.minimum(np.ceil(cleared_in.min(axis=1)), segment_end - month + 1)
+                jump = np.where(live, np.maximum(next_event - 1, 0), 0).astype(int)
+
+                # Jump every live row to the month just before its next payoff
+                if jump.any():
+                    advanced = _advance_closed_form(bal, row_rates, log_growth, payments, jump[:, None], zero_rate)
+                    advanced[~open_debts] = 0
+                    total_interest += advanced.sum(axis=1) - bal.sum(axis=1) + payments.sum(axis=1) * jump
+                    bal = advanced
+                    month += jump
+                    settled = open_debts & (bal < BALANCE_EPSILON)
+                    if settled.any():
+                        bal[settled] = 0
+                        payoff_month = np.where(settled, month[:, None], payoff_month)
+
+                # Play the payoff month itself so freed money cascades exactly as in simulate_monthly
+                stepping = live & (month < segment_end)
+                was_open = bal > 0
+                if stepping.all():
+                    total_interest += apply_month(bal, row_rates, row_mins, budgets)
+                    month += 1
+                elif stepping.any():
+                    step = np.nonzero(stepping)[0]
+                    sub = bal[step]
+                    total_interest[step] += apply_month(sub, row_rates[step], row_mins[step], budgets[step])
+                    bal[step] = sub
+                    month[step] += 1
+                payoff_month = np.where(was_open & (bal == 0), month[:, None], payoff_month)
+
+    open_debts = bal > 0
+    paid_off = ~open_debts.any(axis=1)
+    payoff_month[open_debts] = 0
+    months_to_payoff = np.where(paid_off, payoff_month.max(axis=1, initial=0), month)
+
+    return {
+        "total_interest": total_interest,
+        "months_to_payoff": months_to_payoff,
+        "paid_off": paid_off,
+        "remaining_balance": bal.sum(axis=1),
+        "payoff_month": payoff_month,
+    }
+
+
+def _advance(balance: float, rate: float, log_growth: float, payment: float, months: int) -> float:
+    """Scalar _advance_closed_form: the balance after paying a fixed amount for ``months`` months"""
+    if rate == 0:
+        return balance - payment * months
+    growth = math.exp(min(log_growth * months, _MAX_GROWTH_EXPONENT))
+    return balance * growth - payment * (growth - 1) / rate
+
+
+def _clear_month(balance: float, rate: float, log_growth: float, payment: float, month: int) -> float:
+    """Scalar _months_until_cleared: the month a fixed payment from ``month`` on clears the balance (inf if never)"""
+    headroom = payment - rate * balance
+    if not headroom > 0:
+        return math.inf
+    months = (balance - BALANCE_EPSILON) / payment if rate == 0 else \
+        math.log((payment - rate * BALANCE_EPSILON) / headroom) / log_growth
+    return month + max(1, math.ceil(months))
+
+
+def _simulate_row(bal: List[float], mins: List[float], budget: float,
+                  segments: List[Tuple[List[float], int]]) -> Tuple[float, int, float, List[int]]:
+    """One priority-ordered row of simulate_rows in plain floats.
+
+    Only the priority debt's payment ever changes, so every other open debt
+    stays on its minimum-payment path: its balance is kept as of an anchor
+    month and brought forward in closed form only when the row needs it, and
+    a heap holds the month each is due to clear on its minimums. An event (a
+    payoff) therefore touches a handful of debts rather than all of them,
+    and each payoff month is played exactly as apply_month would.
+
+    Returns (total interest, months to payoff or the months simulated,
+    remaining balance, payoff month per debt).
+    """
+    n = len(bal)
+    open_debts = [balance > 0 for balance in bal]
+    anchor = [0] * n
+    payoff_month = [0] * n
+    committed = sum(minimum for minimum, is_open in zip(mins, open_debts) if is_open)
+    interest = 0.0
+    month = 0
+    target = 0
+    while target < n and not open_debts[target]:
+        target += 1
+
+    rates = list(segments[0][0]) if segments else [0.0] * n
+    log_growth = [math.log1p(rate) for rate in rates]
+    due = [math.inf] * n
+    heap = []
+    for i in range(target + 1, n):
+        if open_debts[i]:
+            due[i] = _clear_month(bal[i], rates[i], log_growth[i], mins[i], 0)
+            heap.append((due[i], i))
+    heapq.heapify(heap)
+
+    def bring_forward(i: int, to: int) -> None:
+        """Move a debt on its minimum-payment path from its anchor month to ``to``"""
+        nonlocal interest
+        months = to - anchor[i]
+        if months > 0:
+            balance = _advance(bal[i], rates[i], log_growth[i], mins[i], months)
+            interest += balance - bal[i] + mins[i] * months
+            bal[i] = balance
+            anchor[i] = to
+
+    for segment_rates, end in segments:
+        if target == n:
+            break
+        if month >= end:
+            continue
+        # Only debts whose rate changes leave their path: settle them under the old rate and predict again
+        for i in range(n):
+            if segment_rates[i] != rates[i]:
+                if open_debts[i] and i != target:
+                    bring_forward(i, month)
+                rates[i] = segment_rates[i]
+                log_growth[i] = math.log1p(rates[i])
+                if open_debts[i] and i > target:
+                    due[i] = _clear_month(bal[i], rates[i], log_growth[i], mins[i], month)
+                    heapq.heappush(heap, (due[i], i))
+
+        while month < end:
+            # Stale entries: debts since closed, promoted to target or re-predicted
+            while heap:
+                next_due, i = heap[0]
+                if i > target and open_debts[i] and due[i] == next_due:
+                    break
+                heapq.heappop(heap)
+            else:
+                next_due = math.inf
+
+            surplus = budget - committed
+            payment = mins[target] + surplus if surplus > 0 else mins[target]
+            event = _clear_month(bal[target], rates[target], log_growth[target], payment, month)
+            if next_due < event:
+                event = next_due
+            months = (end if event > end else int(event) - 1) - month
+            if months > 0:
+                balance = _advance(bal[target], rates[target], log_growth[target], payment, months)
+                interest += balance - bal[target] + payment * months
+                bal[target] = balance
+                month += months
+                anchor[target] = month
+                if balance < BALANCE_EPSILON:
+                    # Cleared a month early through rounding, as simulate_rows settles it
+                    open_debts[target], bal[target], payoff_month[target] = False, 0.0, month
+                    committed -= mins[target]
+                    while target < n and not open_debts[target]:
+                        target += 1
+                    if target == n:
+                        break
+                    bring_forward(target, month)
+                    continue
+            if event > end:
+                continue
+
+            # Play the payoff month: the target and every debt due to clear on its minimum
+            month += 1
+            played = [target]
+            while heap and heap[0][0] <= month:
+                _, i = heapq.heappop(heap)
+                if i > target and open_debts[i] and due[i] <= month and i not in played:
+                    bring_forward(i, month - 1)
+                    played.append(i)
+            surplus = budget - committed
+            for i in played:
+                balance = bal[i]
+                accrued = balance * rates[i]
+                interest += accrued
+                balance += accrued
+                if mins[i] < balance:
+                    balance -= mins[i]
+                else:
+                    surplus += mins[i] - balance
+                    balance = 0.0
+                bal[i] = balance
+                anchor[i] = month
+            # Whatever the minimums leave of the budget cascades down the priority order
+            i = target
+            while surplus > 0 and i < n:
+                if open_debts[i]:
+                    if anchor[i] < month:
+                        bring_forward(i, month)
+                        played.append(i)
+                    if surplus < bal[i]:
+                        bal[i] -= surplus
+                        break
+                    surplus -= bal[i]
+                    bal[i] = 0.0
+                i += 1
+            for i in played:
+                if open_debts[i] and bal[i] < BALANCE_EPSILON:
+                    open_debts[i], bal[i], payoff_month[i] = False, 0.0, month
+                    committed -= mins[i]
+                elif open_debts[i] and i != target:
+                    # Still open after the month it was due to clear: predict again from here
+                    due[i] = _clear_month(bal[i], rates[i], log_growth[i], mins[i], month)
+                    heapq.heappush(heap, (due[i], i))
+            if not open_debts[target]:
+                while target < n and not open_debts[target]:
+                    target += 1
+                if target == n:
+                    break
+                bring_forward(target, month)
+
+    if target < n:
+        for i in range(target + 1, n):
+            if open_debts[i]:
+                bring_forward(i, month)
+        remaining = [bal[i] if open_debts[i] else 0.0 for i in range(n)]
+        return interest, month, sum(remaining), [0 if open_debts[i] else payoff_month[i] for i in range(n)]
+    return interest, max(payoff_month, default=0), 0.0, payoff_month
+
+
+def _plan_costs(result: Dict[str, np.ndarray], objective: str) -> np.ndarray:
+    """Rank key per plan (lower is better); unpaid balances count as cost at the horizon"""
+    cost = result["total_interest"] + result["remaining_balance"]
+    if objective == "interest":
+        return cost
+    if objective == "time":
+        # Months dominate, interest only breaks ties
+        return result["months_to_payoff"] * (cost.max() + 1.0) + cost
+    raise ValueError(f"Unknown payoff objective: {objective}")
+
+
+def optimal_payoff_order(balances: np.ndarray, rates: np.ndarray, min_payments: np.ndarray, budget: float,
+                         rate_changes: Optional[RateChanges] = None, objective: str = "interest",
+                         max_months: int = MAX_MONTHS, max_rounds: int = OPTIMAL_SEARCH_ROUNDS):
+    """Search for the surplus priority order that minimizes total interest (or months).
+
+    With constant rates the avalanche order already minimizes interest; promotional
+    periods break that, so the search starts from the best of avalanche,
+    snowball and avalanche-by-opening-rate and then takes the best adjacent swap
+    while one improves the plan. Every round is a single simulate_events batch
+    with one row per candidate, so cost grows roughly with the cube of the debt
+    count rather than with the number of orderings.
+
+    Returns:
+        (order, result) where result holds the winning plan's simulate_events row
+    """
+    initial_rates = _rate_segments(rates, rate_changes, max_months)[0][0]
+    seeds = np.unique(np.stack([
+        payoff_order(balances, rates, "avalanche"),
+        payoff_order(balances, rates, "snowball"),
+        payoff_order(balances, initial_rates, "avalanche"),
+    ]), axis=0)
+
+    def evaluate(orders):
+        result = simulate_events(balances, rates, min_payments, orders, budget,
+                                 max_months=max_months, rate_changes=rate_changes)
+        costs = _plan_costs(result, objective)
+        best = int(costs.argmin())
+        return costs[best], {key: value[best] for key, value in result.items()}, orders[best]
+
+    best_cost, best_result, best_order = evaluate(seeds)
+    n = len(balances)
+    for _ in range(max_rounds if n > 1 else 0):
+        # Row j swaps positions j and j + 1 of the current best order
+        candidates = np.repeat(best_order[None, :], n - 1, axis=0)
+        positions = np.arange(n - 1)
+        candidates[positions, positions], candidates[positions, positions + 1] = \
+            best_order[positions + 1], best_order[positions]
+        cost, result, order = evaluate(candidates)
+        if cost >= best_cost - BALANCE_EPSILON:
+            break
+        best_cost, best_result, best_order = cost, result, order
+
+    return best_order, best_result
+
+
+def payments_below_interest(debts: List[Dict[str, Any]]) -> List[str]:
+    """Names of debts whose minimum payment does not cover their monthly interest at the nominal rate"""
+    balances, rates, min_payments = debt_arrays(debts)
+    return [debt.get("name") for debt, owed in zip(debts, (balances > 0) & (min_payments <= balances * rates)) if owed]
+
+
+def _plan_summary(result: Dict[str, Any], budget: float) -> Dict[str, Any]:
+    """One plan's response fields; plans still open at the horizon have no payoff month"""
+    paid_off = bool(result["paid_off"])
+    return {
+        "total_interest": round(float(result["total_interest"]), 2),
+        "months_to_payoff": int(result["months_to_payoff"]) if paid_off else None,
+        "monthly_payment": round(float(budget), 2),
+        "paid_off": paid_off,
+        "remaining_balance": round(float(result["remaining_balance"]), 2),
+    }
+
+
+def build_payoff_plans(debts: List[Dict[str, Any]], extra_payment: float = 0.0,
+                       max_months: int = MAX_MONTHS, objective: str = "interest") -> Dict[str, Dict[str, Any]]:
+    """Compute exact avalanche, snowball and optimal plans for a list of debt dicts.
+
+    A plan whose budget never clears the debts within max_months is reported
+    with paid_off False, months_to_payoff None and the balance left at the
+    horizon; its total_interest is the interest accrued up to the horizon.
+    """
+    if not debts:
+        return {strategy: {"total_interest": 0, "months_to_payoff": 0, "monthly_payment": 0,
+                           "paid_off": True, "remaining_balance": 0}
+                for strategy in STRATEGIES + ("optimal",)}
+
+    balances, rates, min_payments = debt_arrays(debts)
+    rate_changes = promo_schedule(debts, rates)
+    budget = min_payments.sum() + max(0.0, extra_payment)
+    orders = np.stack([payoff_order(balances, rates, strategy) for strategy in STRATEGIES])
+    result = simulate_events(balances, rates, min_payments, orders, budget,
+                             max_months=max_months, rate_changes=rate_changes)
+
+    plans = {
+        strategy: _plan_summary({key: value[i] for key, value in result.items()}, budget)
+        for i, strategy in enumerate(STRATEGIES)
+    }
+
+    if not rate_changes and objective == "interest":
+        # Avalanche already minimizes interest when rates never change
+        order, optimal = orders[0], {key: value[0] for key, value in result.items()}
+    else:
+        order, optimal = optimal_payoff_order(balances, rates, min_payments, budget, rate_changes,
+                                              objective=objective, max_months=max_months)
+    plans["optimal"] = {
+        **_plan_summary(optimal, budget),
+        "payoff_order": [debts[i].get("name") for i in order],
+    }
+    return plans
+
+
+def sweep_extra_payments(debts: List[Dict[str, Any]], extra_payments: List[float],
+                         max_months: int = MAX_MONTHS) -> Dict[str, Any]:
+    """Payoff curves for a grid of extra monthly payments, every strategy in one batch"""
+    extras = np.maximum(np.asarray(extra_payments, dtype=float), 0)
+    if not debts:
+        zeros = [0] * len(extras)
+        return {
+            "extra_payments": extras.tolist(),
+            **{strategy: {"months_to_payoff": zeros, "total_interest": zeros, "paid_off": [True] * len(extras)}
+               for strategy in STRATEGIES},
+        }
+
+    balances, rates, min_payments = debt_arrays(debts)
+    rate_changes = promo_schedule(debts, rates)
+    # One row per (strategy, extra payment) pair
+    orders = np.repeat(np.stack([payoff_order(balances, rates, strategy) for strategy in STRATEGIES]), len(extras), axis=0)
+    budgets = np.tile(min_payments.sum() + extras, len(STRATEGIES))
+    result = simulate_events(balances, rates, min_payments, orders, budgets,
+                             max_months=max_months, rate_changes=rate_changes)
+
+    curves = {"extra_payments": extras.tolist()}
+    for i, strategy in enumerate(STRATEGIES):
+        rows = slice(i * len(extras), (i + 1) * len(extras))
+        curves[strategy] = {
+            "months_to_payoff": result["months_to_payoff"][rows].tolist(),
+            "total_interest": np.round(result["total_interest"][rows], 2).tolist(),
+            "paid_off": result["paid_off"][rows].tolist(),
+        }
+    return curves
+
+
+def iter_payoff_schedule(debts: List[Dict[str, Any]], strategy: str = "avalanche", extra_payment: float = 0.0,
+                         max_months: int = MAX_MONTHS) -> Iterator[Dict[str, Any]]:
+    """Yield one plan's month-by-month schedule, one row per month.
+
+    Only the current balances are held in memory, so long horizons can be
+    streamed to the client without building the whole schedule first.
+    """
+    if not debts:
+        return
+
+    balances, rates, min_payments = debt_arrays(debts)
+    rate_changes = promo_schedule(debts, rates)
+    budget = min_payments.sum() + max(0.0, extra_payment)
+    if strategy == "optimal":
+        order, _ = optimal_payoff_order(balances, rates, min_payments, budget, rate_changes, max_months=max_months)
+    else:
+        order = payoff_order(balances, rates, strategy)
+
+    names = [debt.get("name") for debt in debts]
+    # Position of each original debt within the priority-ordered row
+    column = np.argsort(order)
+    bal = balances[order][None, :].copy()
+    row_mins = min_payments[order][None, :]
+    budgets = np.array([budget])
+
+    month = 0
+    for segment_rates, segment_end in _rate_segments(rates, rate_changes, max_months):
+        row_rates = segment_rates[order][None, :]
+        while month < segment_end and (bal > 0).any():
+            interest = bal * row_rates
+            paid = bal + interest
+            apply_month(bal, row_rates, row_mins, budgets)
+            paid -= bal
+            month += 1
+            yield {
+                "month": month,
+                "total_balance": round(float(bal.sum()), 2),
+                "debts": [
+                    {
+                        "name": names[i],
+                        "balance": round(float(bal[0, j]), 2),
+                        "interest": round(float(interest[0, j]), 2),
+                        "principal": round(float(paid[0, j] - interest[0, j]), 2),
+                    }
+                    for i, j in enumerate(column)
+                ],
+            }
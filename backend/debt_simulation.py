@@ -0,0 +1,139 @@
+"""
+Debt Payoff Risk Simulation
+Monte Carlo payoff bands for variable-rate debts and income shocks
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+from debt_engine import (MAX_MONTHS, RateChanges, _rate_segments, apply_month, debt_arrays,
+                         payoff_order, promo_schedule)
+
+DEFAULT_SIMULATION_PATHS = 10_000
+MAX_SIMULATION_PATHS = 200_000
+
+# Paths per shard; fixed so a seed reproduces the same bands on any host
+SIMULATION_SHARD_PATHS = 2_500
+
+# Std. dev. of the monthly move in variable rates, in annual percentage points
+DEFAULT_RATE_VOLATILITY = 0.25
+
+# Monthly chance an income shock starts, and how long payments drop to minimums
+DEFAULT_SHOCK_PROBABILITY = 0.01
+DEFAULT_SHOCK_MONTHS = 3
+
+PERCENTILES = (10, 50, 90)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Shared worker pool, created on first use so idle servers do not fork"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _process_pool
+
+
+def _simulate_shard(balances: np.ndarray, rates: np.ndarray, min_payments: np.ndarray, order: np.ndarray,
+                    variable: np.ndarray, budget: float, rate_changes: RateChanges, paths: int,
+                    seed: np.random.SeedSequence, rate_volatility: float, shock_probability: float,
+                    shock_months: int, max_months: int):
+    """Simulate one shard of randomized paths; returns (months_to_payoff, total_interest, paid_off) per path"""
+    rng = np.random.default_rng(seed)
+    bal = np.repeat(balances[order][None, :], paths, axis=0)
+    row_mins = min_payments[order]
+    variable_rates = variable[order] / 1200
+    minimum_budget = min_payments.sum()
+
+    rate_shift = np.zeros(paths)
+    shock_left = np.zeros(paths, dtype=int)
+    months_open = np.zeros(paths, dtype=int)
+    total_interest = np.zeros(paths)
+
+    month = 0
+    for segment_rates, segment_end in _rate_segments(rates, rate_changes, max_months):
+        base_rates = segment_rates[order]
+        while month < segment_end:
+            open_paths = (bal > 0).any(axis=1)
+            if not open_paths.any():
+                break
+            month += 1
+            months_open += open_paths
+
+            rate_shift += rng.normal(0, rate_volatility, paths)
+            path_rates = np.maximum(base_rates + np.outer(rate_shift, variable_rates), 0)
+
+            starting = (shock_left == 0) & (rng.random(paths) < shock_probability)
+            shock_left[starting] = shock_months
+            budgets = np.where(shock_left > 0, minimum_budget, budget)
+            np.maximum(shock_left - 1, 0, out=shock_left)
+
+            total_interest += apply_month(bal, path_rates, row_mins, budgets)
+
+    return months_open, total_interest, ~(bal > 0).any(axis=1)
+
+
+def simulate_payoff_risk(debts: List[Dict[str, Any]], strategy: str = "avalanche", extra_payment: float = 0.0,
+                         paths: int = DEFAULT_SIMULATION_PATHS, seed: Optional[int] = None,
+                         rate_volatility: float = DEFAULT_RATE_VOLATILITY,
+                         shock_probability: float = DEFAULT_SHOCK_PROBABILITY,
+                         shock_months: int = DEFAULT_SHOCK_MONTHS,
+                         latency_budget_ms: Optional[float] = None,
+                         max_months: int = MAX_MONTHS) -> Dict[str, Any]:
+    """Percentile bands of payoff month and interest over randomized rate/income paths.
+
+    Debts flagged variable_rate drift with a shared random walk per path, and
+    income shocks cut payments to the minimums for shock_months. Paths are split
+    into fixed-size shards seeded from one SeedSequence and run on a process
+    pool; with latency_budget_ms set, shards still running when it expires are
+    dropped and the bands come from the paths that finished.
+    """
+    paths = max(1, min(int(paths), MAX_SIMULATION_PATHS))
+    balances, rates, min_payments = debt_arrays(debts)
+    variable = np.array([1.0 if debt.get("variable_rate") else 0.0 for debt in debts])
+    rate_changes = promo_schedule(debts, rates)
+    order = payoff_order(balances, rates, strategy)
+    budget = min_payments.sum() + max(0.0, extra_payment)
+
+    shard_sizes = [SIMULATION_SHARD_PATHS] * (paths // SIMULATION_SHARD_PATHS)
+    if paths % SIMULATION_SHARD_PATHS:
+        shard_sizes.append(paths % SIMULATION_SHARD_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    shard_args = [
+        (balances, rates, min_payments, order, variable, budget, rate_changes, size, shard_seed,
+         rate_volatility, shock_probability, shock_months, max_months)
+        for size, shard_seed in zip(shard_sizes, seeds)
+    ]
+
+    if len(shard_args) == 1:
+        results = [_simulate_shard(*shard_args[0])]
+    else:
+        pool = _get_process_pool()
+        futures = [pool.submit(_simulate_shard, *args) for args in shard_args]
+        timeout = latency_budget_ms / 1000 if latency_budget_ms is not None else None
+        done, pending = wait(futures, timeout=timeout)
+        if not done:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        for future in pending:
+            future.cancel()
+        # Keep shard order so a full run is reproducible for a given seed
+        results = [future.result() for future in futures if future in done]
+
+    months = np.concatenate([months for months, _, _ in results])
+    interest = np.concatenate([interest for _, interest, _ in results])
+    paid_off = np.concatenate([paid for _, _, paid in results])
+
+    return {
+        "strategy": strategy,
+        "paths": int(months.size),
+        "seed": seed,
+        "probability_paid_off": round(float(paid_off.mean()), 4),
+        "months_to_payoff": {f"p{p}": int(v) for p, v in zip(PERCENTILES, np.percentile(months, PERCENTILES, method="higher"))},
+        "total_interest": {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(interest, PERCENTILES))},
+    }
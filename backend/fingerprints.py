@@ -0,0 +1,57 @@
+"""
+Transaction Fingerprints
+Stable 64-bit row hashes over date, amount and normalized labels
+"""
+
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: spreads every input bit over the whole 64-bit output"""
+    z = values.astype(np.uint64) + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def combine_hashes(*columns: np.ndarray) -> np.ndarray:
+    """Order-sensitive combination of equal-length uint64/int64 columns"""
+    combined = np.zeros(len(columns[0]), dtype=np.uint64)
+    for column in columns:
+        combined = _splitmix(combined * np.uint64(31) ^ column.view(np.uint64))
+    return combined
+
+
+def normalize_labels(labels: pd.Index) -> pd.Index:
+    """Case-folded labels with surrounding and repeated whitespace removed"""
+    return labels.astype(str).str.casefold().str.split().str.join(" ")
+
+
+def label_hashes(values: Optional[pd.Series], rows: int) -> np.ndarray:
+    """Hash of each row's normalized label; missing values and a missing column hash as ""
+
+    Labels are factorized first, so normalization and hashing run once per
+    distinct label rather than once per row.
+    """
+    if values is None:
+        return np.zeros(rows, dtype=np.uint64)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    hashes = pd.util.hash_array(np.append(normalize_labels(pd.Index(uniques)).to_numpy(dtype=object), ""))
+    return hashes[codes]
+
+
+def transaction_fingerprints(dates: np.ndarray, amount_cents: np.ndarray, category_hashes: np.ndarray,
+                             descriptions: Optional[pd.Series] = None,
+                             accounts: Optional[pd.Series] = None) -> np.ndarray:
+    """Stable per-row fingerprint of (date, amount, category, description, account).
+
+    Identical across processes and restarts (pandas' hash_array uses a fixed
+    key), so fingerprints can be stored and compared between uploads.
+    """
+    rows = len(amount_cents)
+    return combine_hashes(dates.astype("datetime64[D]").view(np.int64), amount_cents.astype(np.int64),
+                          category_hashes, label_hashes(descriptions, rows), label_hashes(accounts, rows))
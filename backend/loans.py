@@ -0,0 +1,124 @@
+"""
+Amortizing Loans
+Vectorized schedules for mortgages and installment loans with prepayment scenarios
+"""
+
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+# Longest loan term accepted (40 years)
+MAX_TERM_MONTHS = 480
+
+
+def amortization_payment(principals: np.ndarray, monthly_rates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Level payment that retires each principal over the given number of months"""
+    principals, monthly_rates, months = np.broadcast_arrays(
+        np.asarray(principals, dtype=float), np.asarray(monthly_rates, dtype=float), np.asarray(months, dtype=float))
+    months = np.maximum(months, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principals * monthly_rates / -np.expm1(-months * np.log1p(monthly_rates))
+    return np.where(monthly_rates > 0, payment, principals / months)
+
+
+def amortize(principals: np.ndarray, annual_rates: np.ndarray, term_months: np.ndarray,
+             extra_principal: Optional[np.ndarray] = None, lump_sums: Optional[np.ndarray] = None,
+             rate_schedule: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Amortize a batch of loans month by month and return a columnar schedule.
+
+    Each row is one loan (or one prepayment variant of a loan). ARM resets are
+    given as a (loans, months) rate_schedule of annual rates; whenever a loan's
+    rate changes its payment is recast over the remaining term. Extra principal
+    and lump sums shorten the term and leave the scheduled payment unchanged.
+
+    Args:
+        principals, annual_rates, term_months: (loans,) arrays (rates in %)
+        extra_principal: (loans,) extra principal paid every month (non-negative)
+        lump_sums: (loans, months) one-off prepayments by month (non-negative)
+        rate_schedule: (loans, months) annual rate in force each month
+
+    Returns:
+        Dict with (loans, months) arrays balance, interest, principal and payment,
+        and per-loan scheduled_payment, total_interest and months_to_payoff
+    """
+    principals = np.asarray(principals, dtype=float)
+    term_months = np.asarray(term_months, dtype=int)
+    loans = principals.size
+    months = int(term_months.max(initial=0))
+
+    if rate_schedule is None:
+        rate_schedule = np.repeat(np.asarray(annual_rates, dtype=float)[:, None], months, axis=1)
+    monthly_rates = np.asarray(rate_schedule, dtype=float)[:, :months] / 1200
+    extra = np.zeros(loans) if extra_principal is None else np.asarray(extra_principal, dtype=float)
+    lumps = np.zeros((loans, months)) if lump_sums is None else np.asarray(lump_sums, dtype=float)[:, :months]
+    if (extra < 0).any() or (lumps < 0).any():
+        # A negative prepayment would add to the balance instead of paying it down
+        raise ValueError("Extra principal and lump sums must not be negative")
+
+    balance = np.zeros((loans, months))
+    interest = np.zeros((loans, months))
+    principal = np.zeros((loans, months))
+    payment = np.zeros((loans, months))
+
+    bal = principals.copy()
+    scheduled = amortization_payment(bal, monthly_rates[:, 0], term_months) if months else np.zeros(loans)
+    initial_payment = scheduled.copy()
+
+    for t in range(months):
+        if not (bal > 0).any():
+            break
+        rate = monthly_rates[:, t]
+        if t > 0:
+            # ARM reset: recast the payment over the remaining term
+            reset = rate != monthly_rates[:, t - 1]
+            if reset.any():
+                scheduled = np.where(reset, amortization_payment(bal, rate, term_months - t), scheduled)
+
+        accrued = bal * rate
+        owed = bal + accrued
+        # The final scheduled month clears whatever is left
+        due = np.where(t + 1 >= term_months, owed, np.minimum(scheduled, owed))
+        prepaid = np.minimum(extra + lumps[:, t], owed - due)
+        bal = owed - due - prepaid
+        bal[bal < 0.005] = 0
+
+        balance[:, t] = bal
+        interest[:, t] = accrued
+        principal[:, t] = due + prepaid - accrued
+        payment[:, t] = due + prepaid
+
+    paid_months = (payment > 0).sum(axis=1)
+    return {
+        "balance": balance,
+        "interest": interest,
+        "principal": principal,
+        "payment": payment,
+        "scheduled_payment": initial_payment,
+        "total_interest": interest.sum(axis=1),
+        "months_to_payoff": paid_months,
+    }
+
+
+def amortize_loans(loans: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Build the batch inputs for amortize from loan dicts (see the Loan request model)"""
+    term_months = np.array([min(int(loan["term_months"]), MAX_TERM_MONTHS) for loan in loans], dtype=int)
+    months = int(term_months.max(initial=0))
+    annual_rates = np.array([float(loan["interest_rate"]) for loan in loans], dtype=float)
+
+    rate_schedule = np.repeat(annual_rates[:, None], months, axis=1)
+    lump_sums = np.zeros((len(loans), months))
+    for i, loan in enumerate(loans):
+        for reset in sorted(loan.get("rate_resets") or [], key=lambda reset: reset["month"]):
+            if 1 <= reset["month"] <= months:
+                rate_schedule[i, reset["month"] - 1:] = reset["rate"]
+        for lump in loan.get("lump_sums") or []:
+            if 1 <= lump["month"] <= months:
+                lump_sums[i, lump["month"] - 1] += lump["amount"]
+
+    return amortize(
+        np.array([float(loan["principal"]) for loan in loans]),
+        annual_rates,
+        term_months,
+        extra_principal=np.array([float(loan.get("extra_principal") or 0) for loan in loans]),
+        lump_sums=lump_sums,
+        rate_schedule=rate_schedule,
+    )
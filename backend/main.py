@@ -1,20 +1,36 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional
 import uvicorn
-import pandas as pd
 import json
-import io
 import os
 from datetime import datetime, timedelta
 import jwt
 import hashlib
+import copy
+import uuid
 
 # Import AI service
 from ai_service import ai_service
+from bulk_import import import_statement_files
+from categorization import Categorizer, default_categorizer
+from category_index import default_category_index
+from consolidation import evaluate_offers
+from debt_engine import (MAX_MONTHS, build_payoff_plans, iter_payoff_schedule, payments_below_interest, portfolio_key,
+                         sweep_extra_payments)
+from debt_simulation import (DEFAULT_RATE_VOLATILITY, DEFAULT_SHOCK_MONTHS, DEFAULT_SHOCK_PROBABILITY,
+                             DEFAULT_SIMULATION_PATHS, simulate_payoff_risk)
+from loans import amortize_loans
+from payoff_plan import PayoffPlan, replan
+from transaction_dedup import TransactionLedger
+from transaction_ingest import UploadTooLarge, read_transactions_file, read_transactions_mapped
+from transaction_netting import net_spending
+from transaction_table import as_transaction_table
+from ttl_cache import TTLCache
 
 app = FastAPI(
     title="AI Financial Coach API",
@@ -45,6 +61,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # Mock user database (replace with real database in production)
 users_db = {
@@ -62,6 +79,15 @@ users_db = {
     }
 }
 
+# Stored payoff plans per user email, keyed by plan id (replace with real database in production)
+debt_plans_db: Dict[str, Dict[str, PayoffPlan]] = {}
+
+# Imported transactions per user email; re-uploaded rows are recognized and skipped (replace with real database in production)
+transaction_ledgers_db: Dict[str, TransactionLedger] = {}
+
+# Compiled categorization rules per user email, built from their keyword overrides (replace with real database in production)
+categorizers_db: Dict[str, Categorizer] = {}
+
 class LoginRequest(BaseModel):
     email: str
     password: str
@@ -79,6 +105,34 @@ class Debt(BaseModel):
     amount: float
     interest_rate: float
     min_payment: Optional[float] = None
+    promo_rate: Optional[float] = None
+    promo_months: Optional[int] = None
+    term_months: Optional[int] = None
+    variable_rate: Optional[bool] = None
+
+# Most Monte Carlo paths one request may ask for (20 shards), so no single request holds the shared pool
+MAX_REQUEST_SIMULATION_PATHS = 50_000
+
+class DebtSimulationOptions(BaseModel):
+    paths: int = Field(DEFAULT_SIMULATION_PATHS, ge=1, le=MAX_REQUEST_SIMULATION_PATHS)
+    seed: Optional[int] = None
+    strategy: Literal["avalanche", "snowball"] = "avalanche"
+    extra_payment: float = 0
+    rate_volatility: float = Field(DEFAULT_RATE_VOLATILITY, ge=0)
+    shock_probability: float = Field(DEFAULT_SHOCK_PROBABILITY, ge=0, le=1)
+    shock_months: int = Field(DEFAULT_SHOCK_MONTHS, ge=0, le=MAX_MONTHS)
+    latency_budget_ms: Optional[float] = Field(None, ge=0)
+
+class ConsolidationOffer(BaseModel):
+    name: str
+    interest_rate: float
+    fee_percent: float = 0
+    fee: float = 0
+    term_months: Optional[int] = None
+    promo_rate: Optional[float] = None
+    promo_months: Optional[int] = None
+    max_amount: Optional[float] = None
+    consolidate: Optional[List[str]] = None
 
 class FinancialData(BaseModel):
     monthly_income: float
@@ -86,6 +140,90 @@ class FinancialData(BaseModel):
     transactions: Optional[List[Dict[str, Any]]] = None
     manual_expenses: Optional[Dict[str, float]] = None
     debts: Optional[List[Debt]] = None
+    debt_simulation: Optional[DebtSimulationOptions] = None
+    consolidation_offers: Optional[List[ConsolidationOffer]] = None
+
+class DebtSweepRequest(BaseModel):
+    debts: List[Debt]
+    min_extra: float = 0
+    max_extra: float = 500
+    steps: int = 11
+
+class DebtScheduleRequest(BaseModel):
+    debts: List[Debt]
+    strategy: Literal["avalanche", "snowball", "optimal"] = "avalanche"
+    extra_payment: float = 0
+
+class ConsolidationRequest(BaseModel):
+    debts: List[Debt]
+    offers: List[ConsolidationOffer]
+    extra_payment: float = 0
+
+class DebtPlanRequest(BaseModel):
+    debts: List[Debt]
+    strategy: Literal["avalanche", "snowball"] = "avalanche"
+    extra_payment: float = 0
+
+class DebtPayment(BaseModel):
+    debt: str
+    amount: float
+
+class DebtPaymentBatch(BaseModel):
+    payments: List[DebtPayment]
+    months_elapsed: int = 0
+
+class PlanPayment(DebtPayment):
+    plan_id: str
+
+class PlanPaymentFeed(BaseModel):
+    payments: List[PlanPayment]
+
+class RateReset(BaseModel):
+    month: int
+    rate: float
+
+class LumpSum(BaseModel):
+    month: int
+    amount: float = Field(ge=0)
+
+class Loan(BaseModel):
+    name: str
+    principal: float
+    interest_rate: float
+    term_months: int
+    extra_principal: float = Field(0, ge=0)
+    lump_sums: Optional[List[LumpSum]] = None
+    rate_resets: Optional[List[RateReset]] = None
+
+class LoanAmortizationRequest(BaseModel):
+    loans: List[Loan]
+    include_schedule: bool = True
+
+class CategorizationRules(BaseModel):
+    # Merchant name or keyword -> category; checked before the built-in merchant rules
+    rules: Dict[str, str]
+
+# Memoized debt plans keyed by canonical portfolio, shared by /analyze, /analyze-basic and /upload-csv
+debt_plan_cache = TTLCache(maxsize=int(os.getenv("DEBT_PLAN_CACHE_SIZE", 1024)),
+                           ttl=float(os.getenv("DEBT_PLAN_CACHE_TTL", 600)))
+
+# Largest extra-payment grid accepted by /debt/sweep
+MAX_SWEEP_STEPS = 1000
+
+# Most offers scored in one /debt/consolidation request
+MAX_CONSOLIDATION_OFFERS = 2000
+
+# Most keyword overrides stored per user
+MAX_CATEGORIZATION_RULES = 5000
+
+# Largest transaction file accepted by /upload-csv
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", 50)) * 1024 * 1024)
+
+# Uploads at least this large are parsed from a memory map of the spooled file
+MAPPED_PARSE_BYTES = int(float(os.getenv("MAPPED_PARSE_MB", 32)) * 1024 * 1024)
+
+# Largest combined size of the files sent to /upload-csv/bulk
+MAX_BULK_UPLOAD_BYTES = int(float(os.getenv("MAX_BULK_UPLOAD_MB", 200)) * 1024 * 1024)
 
 # Authentication helper functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -109,6 +247,10 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+def optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[str]:
+    """Email of the signed-in user, or None for anonymous requests"""
+    return verify_token(credentials) if credentials else None
+
 def authenticate_user(email: str, password: str):
     user = users_db.get(email)
     if not user:
@@ -156,18 +298,16 @@ def analyze_budget(data: Dict[str, Any]) -> Dict[str, Any]:
     monthly_income = data.get("monthly_income", 0)
     dependants = data.get("dependants", 0)
     manual_expenses = data.get("manual_expenses", {})
-    transactions = data.get("transactions", [])
+    transactions = as_transaction_table(data.get("transactions"))
     
     # Calculate expenses
-    if transactions:
-        # Group transactions by category
-        expenses_by_category = {}
-        for transaction in transactions:
-            category = transaction.get("Category", "Other")
-            amount = transaction.get("Amount", 0)
-            expenses_by_category[category] = expenses_by_category.get(category, 0) + amount
+    netting = None
+    if transactions is not None:
+        # Group transactions by category (columnar, no per-row dicts) once transfers and refunds cancel out
+        expenses_by_category, netting = net_spending(transactions)
     else:
-        expenses_by_category = {k: v for k, v in manual_expenses.items() if v > 0}
+        # Merge synonymous labels ("Groceries", "food") into their canonical categories
+        expenses_by_category = default_category_index.totals({k: v for k, v in manual_expenses.items() if v > 0})
     
     total_expenses = sum(expenses_by_category.values())
     
@@ -218,12 +358,15 @@ def analyze_budget(data: Dict[str, Any]) -> Dict[str, Any]:
             "potential_savings": entertainment_amount * 0.3
         })
     
-    return {
+    results = {
         "total_expenses": total_expenses,
         "monthly_income": monthly_income,
         "spending_categories": spending_categories,
         "recommendations": recommendations
     }
+    if netting:
+        results["netting"] = netting
+    return results
 
 def analyze_savings(data: Dict[str, Any], budget_analysis: Dict[str, Any]) -> Dict[str, Any]:
     """Simple savings strategy logic"""
@@ -293,45 +436,51 @@ def analyze_savings(data: Dict[str, Any], budget_analysis: Dict[str, Any]) -> Di
         "automation_techniques": automation_techniques
     }
 
+def memoized_debt_stage(key: str, compute):
+    """Return a cached debt-stage result, computing and storing it on a miss"""
+    result = debt_plan_cache.get(key)
+    if result is None:
+        result = compute()
+        debt_plan_cache.set(key, result)
+    return copy.deepcopy(result)
+
 def analyze_debt_reduction(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Simple debt reduction analysis"""
-    debts = data.get("debts", [])
+    """Debt reduction analysis backed by the exact payoff engine"""
+    debts = data.get("debts") or []
     
     if not debts:
         return {
             "total_debt": 0,
             "debts": [],
-            "payoff_plans": {
-                "avalanche": {
-                    "total_interest": 0,
-                    "months_to_payoff": 0,
-                    "monthly_payment": 0
-                },
-                "snowball": {
-                    "total_interest": 0,
-                    "months_to_payoff": 0,
-                    "monthly_payment": 0
-                }
-            },
+            "payoff_plans": build_payoff_plans([]),
             "recommendations": []
         }
     
     total_debt = sum(debt.get("amount", 0) for debt in debts)
-    total_min_payments = sum(debt.get("min_payment", debt.get("amount", 0) * 0.02) for debt in debts)
-    
-    # Simple calculation for demonstration
     avg_interest = sum(debt.get("interest_rate", 10) for debt in debts) / len(debts)
     
-    # Avalanche method (highest interest first)
-    avalanche_months = max(24, int(total_debt / (total_min_payments * 1.5)))
-    avalanche_interest = total_debt * (avg_interest / 100) * (avalanche_months / 12) * 0.7
+    # Simulate avalanche (highest interest first) and snowball (smallest balance first)
+    payoff_plans = memoized_debt_stage(portfolio_key(debts, "plans"), lambda: build_payoff_plans(debts))
     
-    # Snowball method (smallest balance first)
-    snowball_months = max(24, int(total_debt / (total_min_payments * 1.3)))
-    snowball_interest = total_debt * (avg_interest / 100) * (snowball_months / 12) * 0.8
+    # Score any consolidation or balance-transfer offers against the current plan
+    offers = data.get("consolidation_offers")
+    consolidation = None
+    if offers:
+        consolidation = memoized_debt_stage(portfolio_key(debts, "consolidation", offers),
+                                            lambda: evaluate_offers(debts, offers))
     
     recommendations = []
     
+    if not payoff_plans["avalanche"]["paid_off"]:
+        # The budget never clears the debts, so every other recommendation is secondary
+        below_interest = payments_below_interest(debts)
+        named = f" ({', '.join(str(name) for name in below_interest)})" if below_interest else ""
+        recommendations.append({
+            "title": "Payments Below Interest",
+            "description": f"Your monthly payments of ${payoff_plans['avalanche']['monthly_payment']:,.2f} do not keep up with the interest{named}, so your debt will not be paid off. Raise the payment on these debts above their monthly interest.",
+            "impact": f"At current payments ${payoff_plans['avalanche']['remaining_balance']:,.0f} would still be owed after {MAX_MONTHS // 12} years"
+        })
+    
     if total_debt > 0:
         recommendations.append({
             "title": "Increase Monthly Payments",
@@ -345,64 +494,53 @@ def analyze_debt_reduction(data: Dict[str, Any]) -> Dict[str, Any]:
             "impact": "Structured approach increases success rate"
         })
         
-        if avg_interest > 15:
+        if consolidation and consolidation["best_offer"]:
+            best = consolidation["offers"][0]
+            recommendations.append({
+                "title": "Consider Debt Consolidation",
+                "description": f"{best['name']} would save ${best['net_savings']:,.0f} after fees and clear your debt in {best['months_to_payoff']} months.",
+                "impact": f"Best of {len(consolidation['offers'])} offers compared against your current plan"
+            })
+        elif avg_interest > 15 and not consolidation:
             recommendations.append({
                 "title": "Consider Debt Consolidation",
                 "description": "High interest rates detected. Look into balance transfers or personal loans with lower rates.",
                 "impact": "Could reduce interest rates and simplify payments"
             })
     
-    return {
+    debt_reduction = {
         "total_debt": total_debt,
         "debts": debts,
-        "payoff_plans": {
-            "avalanche": {
-                "total_interest": avalanche_interest,
-                "months_to_payoff": avalanche_months,
-                "monthly_payment": total_debt / avalanche_months + (total_min_payments * 0.5)
-            },
-            "snowball": {
-                "total_interest": snowball_interest,
-                "months_to_payoff": snowball_months,
-                "monthly_payment": total_debt / snowball_months + (total_min_payments * 0.3)
-            }
-        },
+        "payoff_plans": payoff_plans,
         "recommendations": recommendations
     }
+    if consolidation:
+        debt_reduction["consolidation"] = consolidation
+    
+    # Optional Monte Carlo bands for variable rates and income shocks
+    simulation = data.get("debt_simulation")
+    if simulation:
+        if simulation.get("seed") is None:
+            # Unseeded runs are meant to differ, so they are never cached
+            debt_reduction["risk_simulation"] = simulate_payoff_risk(debts, **simulation)
+        else:
+            key = portfolio_key(debts, "risk", sorted(simulation.items()))
+            debt_reduction["risk_simulation"] = memoized_debt_stage(
+                key, lambda: simulate_payoff_risk(debts, **simulation))
+    
+    return debt_reduction
 
-def parse_csv_transactions(file_content: bytes) -> Dict[str, Any]:
-    """Parse CSV file content into a list of transactions"""
-    try:
-        # Read CSV content
-        df = pd.read_csv(io.BytesIO(file_content))
-        
-        # Validate required columns
-        required_columns = ['Date', 'Category', 'Amount']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
-        
-        # Convert date strings to datetime and then to string format YYYY-MM-DD
-        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-        
-        # Convert amount strings to float, handling currency symbols and commas
-        df['Amount'] = df['Amount'].replace(r'[\$,]', '', regex=True).astype(float)
-        
-        # Convert to list of dictionaries
-        transactions = df.to_dict('records')
-        
-        return {
-            'transactions': transactions
-        }
-    except Exception as e:
-        raise ValueError(f"Error parsing CSV file: {str(e)}")
+def financial_data_dict(data: FinancialData) -> Dict[str, Any]:
+    """Request payload as a dict, with transactions converted once into a columnar table"""
+    data_dict = data.dict()
+    data_dict["transactions"] = as_transaction_table(data_dict.get("transactions"))
+    return data_dict
 
 @app.post("/analyze")
 async def analyze_finances(data: FinancialData):
     """Standard analysis endpoint with AI when available"""
     try:
-        data_dict = data.dict()
+        data_dict = financial_data_dict(data)
         
         # Try AI analysis first if available
         if ai_service.is_ai_available():
@@ -415,7 +553,7 @@ async def analyze_finances(data: FinancialData):
         # Fallback to rule-based analysis
         budget_analysis = analyze_budget(data_dict)
         savings_strategy = analyze_savings(data_dict, budget_analysis)
-        debt_reduction = analyze_debt_reduction(data_dict)
+        debt_reduction = await run_in_threadpool(analyze_debt_reduction, data_dict)
         
         return {
             "budget_analysis": budget_analysis,
@@ -440,7 +578,7 @@ async def analyze_finances_ai_only(data: FinancialData):
                 detail="AI analysis is not available. Please check Google API key configuration."
             )
         
-        data_dict = data.dict()
+        data_dict = financial_data_dict(data)
         results = await ai_service.analyze_finances_with_ai(data_dict)
         return results
     except HTTPException:
@@ -448,11 +586,20 @@ async def analyze_finances_ai_only(data: FinancialData):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/analysis-cache")
+async def clear_analysis_cache(current_user_email: str = Depends(verify_token)):
+    """Drop every cached AI analysis, so the next request for each input runs the agents again"""
+    try:
+        ai_service.invalidate_analysis()
+        return {"status": "cleared", "analysis_cache": ai_service.result_cache.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/analyze-basic")
 async def analyze_finances_basic(data: FinancialData):
     """Rule-based analysis endpoint"""
     try:
-        data_dict = data.dict()
+        data_dict = financial_data_dict(data)
         
         # Analyze budget
         budget_analysis = analyze_budget(data_dict)
@@ -461,7 +608,7 @@ async def analyze_finances_basic(data: FinancialData):
         savings_strategy = analyze_savings(data_dict, budget_analysis)
         
         # Analyze debt reduction
-        debt_reduction = analyze_debt_reduction(data_dict)
+        debt_reduction = await run_in_threadpool(analyze_debt_reduction, data_dict)
         
         return {
             "budget_analysis": budget_analysis,
@@ -475,6 +622,141 @@ async def analyze_finances_basic(data: FinancialData):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/debt/sweep")
+async def debt_payment_sweep(sweep: DebtSweepRequest):
+    """Payoff curves for a range of extra monthly payments"""
+    if not 1 <= sweep.steps <= MAX_SWEEP_STEPS:
+        raise HTTPException(status_code=400, detail=f"steps must be between 1 and {MAX_SWEEP_STEPS}")
+    if sweep.min_extra < 0 or sweep.max_extra < sweep.min_extra:
+        raise HTTPException(status_code=400, detail="Extra payment range must satisfy 0 <= min_extra <= max_extra")
+    
+    try:
+        debts = [debt.dict() for debt in sweep.debts]
+        step_size = (sweep.max_extra - sweep.min_extra) / (sweep.steps - 1) if sweep.steps > 1 else 0
+        extra_payments = [sweep.min_extra + i * step_size for i in range(sweep.steps)]
+        
+        return {
+            "total_debt": sum(debt["amount"] for debt in debts),
+            "sweep": sweep_extra_payments(debts, extra_payments)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/debt/schedule")
+async def debt_payoff_schedule(request: DebtScheduleRequest):
+    """Stream the month-by-month payoff schedule as NDJSON"""
+    debts = [debt.dict() for debt in request.debts]
+    rows = iter_payoff_schedule(debts, request.strategy, request.extra_payment)
+    return StreamingResponse((json.dumps(row) + "\n" for row in rows), media_type="application/x-ndjson")
+
+@app.post("/debt/consolidation")
+async def debt_consolidation_offers(request: ConsolidationRequest):
+    """Rank consolidation and balance-transfer offers by net savings"""
+    if not 1 <= len(request.offers) <= MAX_CONSOLIDATION_OFFERS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_CONSOLIDATION_OFFERS} offers")
+    
+    try:
+        debts = [debt.dict() for debt in request.debts]
+        offers = [offer.dict() for offer in request.offers]
+        return evaluate_offers(debts, offers, extra_payment=request.extra_payment)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def get_user_plan(email: str, plan_id: str) -> PayoffPlan:
+    plan = debt_plans_db.get(email, {}).get(plan_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Payoff plan not found")
+    return plan
+
+@app.post("/debt/plans")
+async def create_debt_plan(request: DebtPlanRequest, current_user_email: str = Depends(verify_token)):
+    """Store a payoff plan that payments can later be posted against"""
+    try:
+        plan = PayoffPlan([debt.dict() for debt in request.debts], request.strategy, request.extra_payment)
+        plan_id = uuid.uuid4().hex
+        debt_plans_db.setdefault(current_user_email, {})[plan_id] = plan
+        return {"plan_id": plan_id, "plan": plan.projection()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/debt/plans/{plan_id}")
+async def get_debt_plan(plan_id: str, current_user_email: str = Depends(verify_token)):
+    """Current projection of a stored payoff plan"""
+    plan = get_user_plan(current_user_email, plan_id)
+    return {"plan_id": plan_id, "plan": plan.projection()}
+
+@app.post("/debt/plans/payments")
+async def post_payment_feed(feed: PlanPaymentFeed, current_user_email: str = Depends(verify_token)):
+    """Apply a bulk payment feed across stored plans and replan the touched plans in one batch"""
+    plans = debt_plans_db.get(current_user_email, {})
+    unknown = sorted({payment.plan_id for payment in feed.payments if payment.plan_id not in plans})
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Payoff plans not found: {', '.join(unknown)}")
+    
+    try:
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for payment in feed.payments:
+            grouped.setdefault(payment.plan_id, []).append({"debt": payment.debt, "amount": payment.amount})
+        
+        summaries = {plan_id: plans[plan_id].record_payments(payments) for plan_id, payments in grouped.items()}
+        replan([plans[plan_id] for plan_id in grouped])
+        
+        return {
+            "plans": [
+                {"plan_id": plan_id, "payments": summaries[plan_id], "plan": plans[plan_id].projection()}
+                for plan_id in grouped
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/debt/plans/{plan_id}/payments")
+async def post_plan_payments(plan_id: str, batch: DebtPaymentBatch, current_user_email: str = Depends(verify_token)):
+    """Record payments against a stored plan and return its updated projection"""
+    plan = get_user_plan(current_user_email, plan_id)
+    if batch.months_elapsed < 0:
+        raise HTTPException(status_code=400, detail="months_elapsed cannot be negative")
+    
+    try:
+        plan.advance_month(batch.months_elapsed)
+        summary = plan.record_payments(payment.dict() for payment in batch.payments)
+        return {"plan_id": plan_id, "payments": summary, "plan": plan.projection()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/loans/amortize")
+async def amortize_loan_batch(request: LoanAmortizationRequest):
+    """Columnar amortization schedules for a batch of loans or prepayment variants"""
+    if not request.loans:
+        raise HTTPException(status_code=400, detail="At least one loan is required")
+    if any(loan.term_months <= 0 for loan in request.loans):
+        raise HTTPException(status_code=400, detail="term_months must be positive")
+    
+    try:
+        loans = [loan.dict() for loan in request.loans]
+        schedule = amortize_loans(loans)
+        
+        response = {
+            "loans": [
+                {
+                    "name": loan["name"],
+                    "scheduled_payment": round(float(schedule["scheduled_payment"][i]), 2),
+                    "total_interest": round(float(schedule["total_interest"][i]), 2),
+                    "months_to_payoff": int(schedule["months_to_payoff"][i])
+                }
+                for i, loan in enumerate(loans)
+            ]
+        }
+        if request.include_schedule:
+            # One array per column, one row per loan
+            response["schedule"] = {
+                column: schedule[column].round(2).tolist()
+                for column in ("balance", "interest", "principal", "payment")
+            }
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/chat")
 async def chat_endpoint(chat_data: ChatMessage):
     """Enhanced chat endpoint with AI status information."""
@@ -492,45 +774,146 @@ async def chat_endpoint(chat_data: ChatMessage):
         ]
     }
 
+async def analyze_uploaded_transactions(transactions, monthly_income: float, dependants: int,
+                                        data_source: str) -> Dict[str, Any]:
+    """Run AI analysis (rule-based fallback) over an uploaded TransactionTable"""
+    data = {
+        "monthly_income": monthly_income,
+        "dependants": dependants,
+        "transactions": transactions,
+        "manual_expenses": {},
+        "debts": [],
+        "transaction_summary": {"transaction_count": len(transactions), **transactions.date_range()}
+    }
+    
+    # Try AI analysis first if available
+    if ai_service.is_ai_available():
+        try:
+            results = await ai_service.analyze_finances_with_ai(data)
+            return results
+        except Exception as ai_error:
+            print(f"⚠️ AI analysis failed for CSV, falling back to rule-based: {ai_error}")
+    
+    # Fallback to rule-based analysis
+    budget_analysis = analyze_budget(data)
+    savings_strategy = analyze_savings(data, budget_analysis)
+    debt_reduction = await run_in_threadpool(analyze_debt_reduction, data)
+    
+    return {
+        "budget_analysis": budget_analysis,
+        "savings_strategy": savings_strategy,
+        "debt_reduction": debt_reduction,
+        "analysis_metadata": {
+            "powered_by": "Rule-Based Logic (CSV Upload)",
+            "timestamp": datetime.now().isoformat(),
+            "data_source": data_source,
+            "transaction_summary": data["transaction_summary"]
+        }
+    }
+
 @app.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...), monthly_income: float = Form(...), dependants: int = Form(0)):
-    """Accept CSV file, parse, and analyze with AI when available."""
+async def upload_csv(file: UploadFile = File(...), monthly_income: float = Form(...), dependants: int = Form(0),
+                     current_user_email: Optional[str] = Depends(optional_user)):
+    """Accept a CSV, OFX/QFX or QIF statement, parse, and analyze with AI when available.
+
+    Signed-in users' uploads are merged into their stored ledger, skipping rows
+    already imported, and the whole ledger is analyzed.
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_UPLOAD_BYTES / (1024 * 1024):g} MB upload limit")
+    
+    # Parse the upload straight into a columnar transaction table (format sniffed from content);
+    # large files are memory-mapped, the rest streamed in chunks, on a worker thread to keep the event loop free
+    reader = read_transactions_mapped if (file.size or 0) >= MAPPED_PARSE_BYTES else read_transactions_file
     try:
-        content = await file.read()
-        parsed = parse_csv_transactions(content)
-        transactions = parsed['transactions']
-        
-        data = {
-            "monthly_income": monthly_income,
-            "dependants": dependants,
-            "transactions": transactions,
-            "manual_expenses": {},
-            "debts": []
+        parsed = await run_in_threadpool(reader, file.file, max_bytes=MAX_UPLOAD_BYTES,
+                                         categorizer=user_categorizer(current_user_email))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if parsed["errors"]:
+        raise HTTPException(status_code=400, detail=f"Error parsing CSV file: {'; '.join(parsed['errors'])}")
+    
+    try:
+        transactions, deduplication = parsed["table"], None
+        if current_user_email:
+            ledger = transaction_ledgers_db.setdefault(current_user_email, TransactionLedger())
+            deduplication = ledger.merge([transactions])
+            transactions = ledger.table
+        results = await analyze_uploaded_transactions(transactions, monthly_income, dependants, "CSV file")
+        results["categorization"] = {"auto_categorized": parsed["auto_categorized"]}
+        if deduplication:
+            results["deduplication"] = deduplication
+        return results
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/upload-csv/bulk")
+async def upload_csv_bulk(files: List[UploadFile] = File(...), monthly_income: float = Form(...),
+                          dependants: int = Form(0), current_user_email: Optional[str] = Depends(optional_user)):
+    """Import many statements (CSV, OFX/QFX, QIF or ZIP archives of them) in parallel and analyze them as one ledger.
+
+    Rows repeated across overlapping exports are kept once; for signed-in users
+    the files are merged into their stored ledger as in /upload-csv.
+    """
+    total_bytes = sum(file.size or 0 for file in files)
+    if total_bytes > MAX_BULK_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {MAX_BULK_UPLOAD_BYTES / (1024 * 1024):g} MB bulk limit")
+    
+    contents = [(file.filename or f"file-{i + 1}", await file.read()) for i, file in enumerate(files)]
+    try:
+        ledger = transaction_ledgers_db.setdefault(current_user_email, TransactionLedger()) if current_user_email else None
+        # Parsing waits on a process pool, so it runs on a worker thread to keep the event loop free
+        imported = await run_in_threadpool(import_statement_files, contents, max_bytes=MAX_UPLOAD_BYTES,
+                                           max_total_bytes=MAX_BULK_UPLOAD_BYTES, ledger=ledger,
+                                           categorizer=user_categorizer(current_user_email))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if imported["table"] is None:
+        failures = "; ".join(f"{report['file']}: {'; '.join(report['errors'])}" for report in imported["files"])
+        raise HTTPException(status_code=400, detail=f"No files could be imported: {failures or 'no files'}")
+    
+    try:
+        files_imported = sum(report["status"] == "imported" for report in imported["files"])
+        results = await analyze_uploaded_transactions(imported["table"], monthly_income, dependants,
+                                                      f"{files_imported} CSV files")
+        results["import_summary"] = {
+            "files_imported": files_imported,
+            "files_failed": sum(report["status"] == "error" for report in imported["files"]),
+            "files_skipped": sum(report["status"] == "skipped" for report in imported["files"]),
+            "files": imported["files"],
         }
-        
-        # Try AI analysis first if available
-        if ai_service.is_ai_available():
-            try:
-                results = await ai_service.analyze_finances_with_ai(data)
-                return results
-            except Exception as ai_error:
-                print(f"⚠️ AI analysis failed for CSV, falling back to rule-based: {ai_error}")
-        
-        # Fallback to rule-based analysis
-        budget_analysis = analyze_budget(data)
-        savings_strategy = analyze_savings(data, budget_analysis)
-        debt_reduction = analyze_debt_reduction(data)
-        
-        return {
-            "budget_analysis": budget_analysis,
-            "savings_strategy": savings_strategy,
-            "debt_reduction": debt_reduction,
-            "analysis_metadata": {
-                "powered_by": "Rule-Based Logic (CSV Upload)",
-                "timestamp": datetime.now().isoformat(),
-                "data_source": "CSV file"
-            }
+        results["categorization"] = {
+            "auto_categorized": sum(report["auto_categorized"] for report in imported["files"])
         }
+        results["deduplication"] = imported["deduplication"]
+        return results
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def user_categorizer(email: Optional[str]) -> Categorizer:
+    """The user's compiled categorization rules, or the built-in merchant rules"""
+    return categorizers_db.get(email, default_categorizer) if email else default_categorizer
+
+@app.get("/categorization/rules")
+async def get_categorization_rules(current_user_email: str = Depends(verify_token)):
+    """The signed-in user's merchant keyword -> category overrides"""
+    return {"rules": user_categorizer(current_user_email).overrides}
+
+@app.put("/categorization/rules")
+async def set_categorization_rules(request: CategorizationRules, current_user_email: str = Depends(verify_token)):
+    """Replace the user's overrides; they apply to uploads from now on and win over built-in merchant rules"""
+    if len(request.rules) > MAX_CATEGORIZATION_RULES:
+        raise HTTPException(status_code=400, detail=f"Too many rules: {len(request.rules)} (maximum {MAX_CATEGORIZATION_RULES})")
+    blank = sorted(keyword for keyword, category in request.rules.items() if not keyword.strip() or not category.strip())
+    if blank:
+        raise HTTPException(status_code=400, detail=f"Rules need a keyword and a category: {', '.join(map(repr, blank))}")
+    
+    try:
+        rules = {keyword.strip(): category.strip() for keyword, category in request.rules.items()}
+        categorizers_db[current_user_email] = Categorizer(rules)
+        return {"rules": rules}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -546,7 +929,16 @@ async def root():
             "analyze": "/analyze (AI + fallback)",
             "analyze_ai": "/analyze-ai (AI only)",
             "analyze_basic": "/analyze-basic (rule-based)",
+            "analysis_cache": "/analysis-cache (DELETE to clear)",
             "upload_csv": "/upload-csv", 
+            "upload_csv_bulk": "/upload-csv/bulk",
+            "categorization_rules": "/categorization/rules",
+            "debt_sweep": "/debt/sweep",
+            "debt_consolidation": "/debt/consolidation",
+            "debt_plans": "/debt/plans",
+            "debt_plan_payments": "/debt/plans/{plan_id}/payments",
+            "debt_schedule": "/debt/schedule",
+            "loan_amortization": "/loans/amortize",
             "chat": "/chat",
             "service_status": "/service-status",
             "docs": "/docs"
@@ -559,6 +951,7 @@ async def service_status():
     return {
         "timestamp": datetime.now().isoformat(),
         "service": ai_service.get_service_status(),
+        "debt_plan_cache": debt_plan_cache.stats(),
         "endpoints_available": {
             "ai_analysis": ai_service.is_ai_available(),
             "basic_analysis": True,
@@ -609,7 +1002,7 @@ async def test_analysis():
         savings_strategy = analyze_savings(sample_data, budget_analysis)
         
         # Analyze debt reduction
-        debt_reduction = analyze_debt_reduction(sample_data)
+        debt_reduction = await run_in_threadpool(analyze_debt_reduction, sample_data)
         
         return {
             "sample_data": sample_data,
@@ -0,0 +1,239 @@
+"""
+Memory-Mapped CSV
+Vectorized record and field splitting over the bytes of a memory-mapped CSV file
+"""
+
+from typing import List, Iterator, Optional, Tuple
+import mmap
+import numpy as np
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+
+from fingerprints import combine_hashes
+
+# Bytes of the mapped file parsed per block (cut back to the last complete record)
+MAPPED_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Fields longer than this are sliced out one at a time instead of through the byte matrix
+MAX_MATRIX_FIELD_BYTES = 256
+
+# Encodings whose delimiters, quotes and newlines are single ASCII bytes, so files can be split bytewise
+BYTEWISE_ENCODINGS = ("utf-8", "utf-8-sig", "cp1252", "latin-1")
+
+# Field values read as missing, as pandas.read_csv does by default
+MISSING_VALUES = frozenset(STR_NA_VALUES)
+
+_MISSING_BYTES = np.array(sorted(value.encode() for value in MISSING_VALUES))
+
+# Little-endian masks keeping the first n bytes of an 8-byte word, n = 0..8
+_WORD_MASKS = np.array([(1 << 8 * n) - 1 for n in range(9)], dtype="<u8")
+
+
+class IrregularQuoting(ValueError):
+    """A quote inside an unquoted field, which pandas reads as text but quote parity cannot follow"""
+
+
+class RecordBlock:
+    """A block of whole records copied out of the map: bytes plus record and field boundaries.
+
+    ``starts``/``ends`` delimit each non-blank record (without its line break),
+    ``delimiters`` are the positions of field separators outside quotes and
+    ``first_delimiter``/``delimiter_counts`` index them per record.
+    """
+
+    __slots__ = ("data", "starts", "ends", "delimiters", "first_delimiter", "delimiter_counts", "quotechar")
+
+    def __init__(self, data: np.ndarray, starts: np.ndarray, ends: np.ndarray, delimiters: np.ndarray,
+                 quotechar: Optional[int]):
+        self.data = data
+        self.starts = starts
+        self.ends = ends
+        self.quotechar = quotechar
+        self.delimiters = delimiters
+        # Records are in order, so counting the delimiters before each record end indexes them all
+        last = np.searchsorted(delimiters, ends)
+        self.first_delimiter = np.append(0, last[:-1]) if len(last) else last
+        self.delimiter_counts = last - self.first_delimiter
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def field_bounds(self, column: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end offsets of one field in every record; empty where a record is short.
+
+        Surrounding quotes are excluded from quoted fields.
+        """
+        counts = self.delimiter_counts
+        fields = int(counts[0]) if len(counts) else 0
+        if (counts == fields).all():
+            # Every record has the same fields: the delimiters form a (records, fields - 1) grid
+            grid = self.delimiters.reshape(len(counts), fields)
+            starts = grid[:, column - 1] + 1 if 0 < column <= fields else self.starts
+            ends = grid[:, column] if column < fields else self.ends
+            if column > fields:
+                starts = ends = np.zeros(len(counts), dtype=np.intp)
+        else:
+            present = counts >= column
+            last = max(len(self.delimiters) - 1, 0)
+            if column == 0:
+                starts = self.starts
+            else:
+                starts = np.where(present, self.delimiters[np.minimum(self.first_delimiter + column - 1, last)] + 1, 0)
+            closed = counts > column
+            ends = np.where(closed, self.delimiters[np.minimum(self.first_delimiter + column, last)], self.ends)
+            ends = np.where(present, ends, starts)
+        if self.quotechar is not None:
+            quoted = (ends - starts >= 2) & (self.data[starts] == self.quotechar) & (self.data[ends - 1] == self.quotechar)
+            starts = starts + quoted
+            ends = ends - quoted
+        return starts, ends
+
+    def _matrix(self, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Fields as rows of a zero-padded byte matrix, its width a multiple of 8"""
+        width = max(-(-int(lengths.max(initial=0)) // 8) * 8, 8)
+        windows = np.lib.stride_tricks.sliding_window_view(self.data, width)
+        matrix = windows[np.minimum(starts, len(windows) - 1)]
+        # Zero the bytes past each field, eight at a time
+        matrix.view("<u8")[...] &= _WORD_MASKS[np.clip(lengths[:, None] - np.arange(0, width, 8), 0, 8)]
+        return matrix
+
+    def _long_values(self, starts: np.ndarray, ends: np.ndarray, rows: np.ndarray) -> List[bytes]:
+        return [self.data[starts[row]:ends[row]].tobytes() for row in rows]
+
+    def labels(self, starts: np.ndarray, ends: np.ndarray, encoding: str) -> Tuple[np.ndarray, List[str]]:
+        """Factorize a text field: per-record codes into the distinct decoded values (-1 when missing).
+
+        Fields are grouped by a hash of their bytes (verified byte for byte), so
+        only distinct values are ever decoded into Python strings.
+        """
+        lengths = ends - starts
+        long = lengths > MAX_MATRIX_FIELD_BYTES
+        matrix = self._matrix(starts, np.where(long, 0, lengths))
+        hashes = combine_hashes(*matrix.view(np.uint64).T, lengths)
+        codes, uniques = pd.factorize(hashes)
+        first = np.empty(len(uniques), dtype=np.intp)
+        first[codes[::-1]] = np.arange(len(codes))[::-1]
+        if not (matrix == matrix[first[codes]]).all():
+            # A 64-bit hash collision: group by the bytes themselves
+            _, first, codes = np.unique(matrix.view(f"V{matrix.shape[1]}").ravel(), return_index=True,
+                                        return_inverse=True)
+            codes = codes.ravel()
+
+        values = [matrix[row, :lengths[row]].tobytes() for row in first]
+        if long.any():
+            rows = np.flatnonzero(long)
+            long_codes, long_values = pd.factorize(pd.Series(self._long_values(starts, ends, rows), dtype=object))
+            codes = codes.copy()
+            codes[rows] = long_codes + len(values)
+            values += list(long_values)
+
+        # Decode the distinct values once, then merge any that decode alike
+        decoded = pd.Series([self._decode(value, encoding) for value in values], dtype=object)
+        merged, labels = pd.factorize(decoded)
+        return merged[codes], list(labels)
+
+    def _decode(self, value: bytes, encoding: str) -> Optional[str]:
+        text = value.decode(encoding, errors="replace")
+        if self.quotechar is not None:
+            quote = chr(self.quotechar)
+            text = text.replace(quote * 2, quote)
+        return None if text in MISSING_VALUES else text
+
+    def text(self, starts: np.ndarray, ends: np.ndarray, encoding: str) -> np.ndarray:
+        """A field as a NumPy str array, missing values blank, decoding row by row only for non-ASCII bytes"""
+        lengths = ends - starts
+        long = lengths > MAX_MATRIX_FIELD_BYTES
+        matrix = self._matrix(starts, np.where(long, 0, lengths))
+        special = long | (matrix >= 0x80).any(axis=1)
+        if special.any():
+            matrix[special] = 0
+        # ASCII bytes are their own codepoints, so widening the matrix gives the str array
+        text = matrix.astype(np.uint32).view(f"U{matrix.shape[1]}").ravel()
+        # Every missing-value marker other than "" contains a letter
+        lettered = np.flatnonzero((matrix >= ord("A")).any(axis=1))
+        text[lettered[np.isin(matrix[lettered].view(f"S{matrix.shape[1]}").ravel(), _MISSING_BYTES)]] = ""
+        if special.any():
+            rows = np.flatnonzero(special)
+            values = [value.decode(encoding, errors="replace") for value in self._long_values(starts, ends, rows)]
+            values = ["" if value in MISSING_VALUES else value for value in values]
+            text = text.astype(f"U{max(text.itemsize // 4, max(map(len, values)))}")
+            text[rows] = values
+        return text
+
+
+def _split_records(data: np.ndarray, size: int, final: bool, sep: str,
+                   quotechar: Optional[str]) -> Optional[Tuple[RecordBlock, int]]:
+    """The complete records in ``data[:size]`` and the bytes they consume; None when no record is complete"""
+    newlines = np.flatnonzero(data[:size] == ord("\n"))
+    delimiters = np.flatnonzero(data[:size] == ord(sep))
+    quotes = np.flatnonzero(data[:size] == ord(quotechar)) if quotechar else np.array([], dtype=np.intp)
+    if len(quotes):
+        _check_quoting(data, size, quotes, sep)
+        # An even number of quotes before a byte means it is outside any quoted field
+        newlines = newlines[(np.searchsorted(quotes, newlines) & 1) == 0]
+        delimiters = delimiters[(np.searchsorted(quotes, delimiters) & 1) == 0]
+    if final:
+        consumed = size
+        if not len(newlines) or newlines[-1] < size - 1:
+            newlines = np.append(newlines, size)
+    elif len(newlines):
+        consumed = int(newlines[-1]) + 1
+    else:
+        return None
+
+    starts = np.append(0, newlines[:-1] + 1)
+    ends = newlines - ((newlines > starts) & (data[np.maximum(newlines - 1, 0)] == ord("\r")))
+    keep = ends > starts
+    delimiters = delimiters[:np.searchsorted(delimiters, consumed)]
+    return RecordBlock(data, starts[keep], ends[keep], delimiters, ord(quotechar) if len(quotes) else None), consumed
+
+
+def _check_quoting(data: np.ndarray, size: int, quotes: np.ndarray, sep: str) -> None:
+    """Raise IrregularQuoting unless every quote opens a field at its start, closes it at its end
+    or is half of a doubled quote inside it, the only cases in which quote parity matches pandas"""
+    opening, closing = quotes[0::2], quotes[1::2]
+    before = data[np.maximum(opening - 1, 0)]
+    after = data[closing + 1]
+    paired_before = np.zeros(len(opening), dtype=bool)
+    paired_before[1:] = closing[:len(opening) - 1] == opening[1:] - 1
+    paired_after = np.zeros(len(closing), dtype=bool)
+    paired_after[:len(opening) - 1] = opening[1:] == closing[:len(opening) - 1] + 1
+    opens = (opening == 0) | (before == ord(sep)) | (before == ord("\n")) | paired_before
+    closes = (closing + 1 >= size) | np.isin(after, (ord(sep), ord("\n"), ord("\r"))) | paired_after
+    if not (opens.all() and closes.all()):
+        stray = int(np.concatenate([opening[~opens], closing[~closes]]).min())
+        raise IrregularQuoting(f"Quote character inside an unquoted field at byte {stray} of the block")
+
+
+def _release(mapped: mmap.mmap, start: int, end: int) -> None:
+    """Drop the mapped pages of a copied range so the file does not accumulate in resident memory"""
+    start -= start % mmap.PAGESIZE
+    if hasattr(mmap, "MADV_DONTNEED") and end > start:
+        mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def iter_record_blocks(mapped: mmap.mmap, start: int, sep: str, quotechar: Optional[str],
+                       block_bytes: int = MAPPED_BLOCK_BYTES) -> Iterator[RecordBlock]:
+    """Yield blocks of whole records from a mapped CSV, starting at byte ``start``.
+
+    Each block is copied out of the map (so the map can be closed at any time)
+    with zero padding after it for the fixed-width field views. A record
+    longer than the block size grows the block until the record fits.
+    """
+    position, size = start, len(mapped)
+    window = block_bytes
+    while position < size:
+        end = min(position + window, size)
+        data = np.zeros(end - position + MAX_MATRIX_FIELD_BYTES + 8, dtype=np.uint8)
+        data[:end - position] = np.frombuffer(mapped, dtype=np.uint8, count=end - position, offset=position)
+        _release(mapped, position, end)
+        split = _split_records(data, end - position, end == size, sep, quotechar)
+        if split is None:
+            window *= 2
+            continue
+        block, consumed = split
+        del split
+        if len(block):
+            yield block
+        position += consumed
+        window = block_bytes
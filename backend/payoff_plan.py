@@ -0,0 +1,169 @@
+"""
+Stateful Payoff Plans
+Debt payoff plans that absorb recorded payments and replan only when balances change
+"""
+
+from typing import Dict, List, Any, Iterable, Optional
+import numpy as np
+
+from debt_engine import BALANCE_EPSILON, MAX_MONTHS, STRATEGIES, debt_arrays, payoff_order, simulate_rows
+
+
+class PayoffPlan:
+    """A payoff plan that tracks balances as payments are recorded against it.
+
+    Minimum payments and the monthly budget are fixed when the plan is created.
+    Recording a payment only touches the balance it applies to; the projection
+    (payoff months and remaining interest) is recomputed lazily, once, the next
+    time it is read, and only if some balance actually changed.
+    """
+
+    def __init__(self, debts: List[Dict[str, Any]], strategy: str = "avalanche", extra_payment: float = 0.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown payoff strategy: {strategy}")
+
+        self.names = [str(debt.get("name") or f"Debt {i + 1}") for i, debt in enumerate(debts)]
+        self.strategy = strategy
+        self.extra_payment = float(extra_payment)
+        self.balances, self.rates, self.min_payments = debt_arrays(debts)
+        self.budget = float(self.min_payments.sum() + self.extra_payment)
+
+        self.promo_months = np.array([
+            int(debt.get("promo_months") or 0) if debt.get("promo_rate") is not None else 0
+            for debt in debts
+        ], dtype=int)
+        self.promo_rates = np.array([float(debt.get("promo_rate") or 0) for debt in debts], dtype=float) / 1200
+
+        self.month = 0
+        self.interest_to_date = 0.0
+        self.paid_to_date = np.zeros(len(debts))
+        self._projection: Optional[Dict[str, Any]] = None
+
+    def _index(self, name: str) -> int:
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise KeyError(f"Unknown debt: {name}") from None
+
+    def rates_at(self, month: int) -> np.ndarray:
+        """Monthly rates in force a given number of months from now"""
+        return np.where(self.promo_months - self.month > month, self.promo_rates, self.rates)
+
+    def record_payment(self, debt: str, amount: float) -> float:
+        """Apply a payment to one debt's balance and return the amount actually applied"""
+        index = self._index(debt)
+        applied = min(max(float(amount), 0.0), float(self.balances[index]))
+        if applied > 0:
+            self.balances[index] -= applied
+            if self.balances[index] < BALANCE_EPSILON:
+                self.balances[index] = 0.0
+            self.paid_to_date[index] += applied
+            self._projection = None
+        return applied
+
+    def record_payments(self, payments: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply a batch of {debt, amount} payments; the plan is replanned at most once"""
+        applied = 0.0
+        rejected = []
+        for payment in payments:
+            try:
+                applied += self.record_payment(payment["debt"], payment["amount"])
+            except KeyError as e:
+                rejected.append({"debt": payment.get("debt"), "error": e.args[0]})
+        return {"applied": round(applied, 2), "rejected": rejected}
+
+    def advance_month(self, months: int = 1) -> None:
+        """Accrue interest on the open balances for elapsed months"""
+        for _ in range(max(int(months), 0)):
+            interest = self.balances * self.rates_at(0)
+            self.balances += interest
+            self.interest_to_date += float(interest.sum())
+            self.month += 1
+            self._projection = None
+
+    def as_debts(self) -> List[Dict[str, Any]]:
+        """Current state as debt dicts, e.g. for iter_payoff_schedule"""
+        remaining_promo = np.maximum(self.promo_months - self.month, 0)
+        return [
+            {
+                "name": name,
+                "amount": float(balance),
+                "interest_rate": float(rate * 1200),
+                "min_payment": float(min_payment),
+                "promo_rate": float(promo_rate * 1200) if promo > 0 else None,
+                "promo_months": int(promo) if promo > 0 else None,
+            }
+            for name, balance, rate, min_payment, promo_rate, promo in zip(
+                self.names, self.balances, self.rates, self.min_payments, self.promo_rates, remaining_promo)
+        ]
+
+    def projection(self) -> Dict[str, Any]:
+        """Remaining schedule summary, replanned only if a balance changed since the last read"""
+        if self._projection is None:
+            replan([self])
+        return self._projection
+
+
+def replan(plans: List[PayoffPlan], max_months: int = MAX_MONTHS) -> None:
+    """Refresh the projection of every stale plan in one batched simulation.
+
+    Each stale plan becomes one row holding only its open debts, in its own
+    priority order, so a bulk payment feed touching many plans costs a single
+    pass of the event engine. A change to one debt can still move every other
+    debt's payoff (freed minimums cascade), so rows cover all open debts.
+    """
+    stale = [plan for plan in plans if plan._projection is None]
+    if not stale:
+        return
+
+    columns = []
+    for plan in stale:
+        open_debts = np.nonzero(plan.balances > 0)[0]
+        order = payoff_order(plan.balances[open_debts], plan.rates[open_debts], plan.strategy)
+        columns.append(open_debts[order])
+
+    rows = len(stale)
+    width = max(max((len(cols) for cols in columns), default=0), 1)
+    bal = np.zeros((rows, width))
+    mins = np.zeros((rows, width))
+    for row, (plan, cols) in enumerate(zip(stale, columns)):
+        bal[row, :len(cols)] = plan.balances[cols]
+        mins[row, :len(cols)] = plan.min_payments[cols]
+    budgets = np.array([plan.budget for plan in stale])
+
+    # Remaining promo periods of every plan split the horizon into constant-rate segments
+    boundaries = np.unique(np.concatenate([plan.promo_months - plan.month for plan in stale] + [[0]]))
+    boundaries = boundaries[(boundaries > 0) & (boundaries < max_months)]
+    starts = np.concatenate([[0], boundaries]).astype(int)
+    ends = np.concatenate([boundaries, [max_months]]).astype(int)
+    segments = []
+    for start, end in zip(starts, ends):
+        segment_rates = np.zeros((rows, width))
+        for row, (plan, cols) in enumerate(zip(stale, columns)):
+            segment_rates[row, :len(cols)] = plan.rates_at(int(start))[cols]
+        segments.append((segment_rates, int(end)))
+
+    result = simulate_rows(bal, mins, budgets, segments)
+
+    for row, (plan, cols) in enumerate(zip(stale, columns)):
+        payoff_month = np.zeros(len(plan.names), dtype=int)
+        payoff_month[cols] = result["payoff_month"][row, :len(cols)]
+        plan._projection = {
+            "strategy": plan.strategy,
+            "month": plan.month,
+            "monthly_payment": round(plan.budget, 2),
+            "total_balance": round(float(plan.balances.sum()), 2),
+            "remaining_interest": round(float(result["total_interest"][row]), 2),
+            "interest_to_date": round(plan.interest_to_date, 2),
+            "months_to_payoff": int(result["months_to_payoff"][row]),
+            "paid_off": bool(result["paid_off"][row]),
+            "debts": [
+                {
+                    "name": name,
+                    "balance": round(float(plan.balances[i]), 2),
+                    "paid_to_date": round(float(plan.paid_to_date[i]), 2),
+                    "payoff_month": int(payoff_month[i]),
+                }
+                for i, name in enumerate(plan.names)
+            ],
+        }
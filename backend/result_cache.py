@@ -0,0 +1,129 @@
+"""
+Result Cache
+Content-addressed cache of analysis results: an in-memory LRU tier over an optional SQLite tier
+"""
+
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ttl_cache import TTLCache
+
+# Decimal places numbers are rounded to before hashing
+KEY_AMOUNT_DECIMALS = 2
+
+
+def _normalize(value: Any) -> Any:
+    """JSON-ready copy with rounded floats and string keys (sorted when dumped)"""
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if hasattr(value, "item") and callable(value.item):
+        value = value.item()  # NumPy scalars
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # 1200, 1200.0 and 1200.004 hash alike; + 0.0 folds -0.0 into 0.0
+        return round(float(value), KEY_AMOUNT_DECIMALS) + 0.0
+    return value
+
+
+def canonical_key(*parts: Any) -> str:
+    """SHA-256 of the parts as canonical JSON: sorted keys, rounded amounts, no whitespace"""
+    payload = json.dumps(_normalize(parts), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SQLiteResultStore:
+    """JSON results in a SQLite table with wall-clock expiry, so entries survive restarts"""
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_expiry ON results (expires_at)")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """The stored value and its remaining seconds to live, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?",
+                                           (key, now)).fetchone()
+        return (json.loads(row[0]), row[1] - now) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, purging expired rows while at it"""
+        now = time.time()
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            self._connection.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            self._connection.execute("INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                                     (key, payload, now + (self.ttl if ttl is None else ttl)))
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self._connection.execute("DELETE FROM results WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM results WHERE expires_at > ?",
+                                            (time.time(),)).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "size": len(self), "ttl_seconds": self.ttl}
+
+
+class ResultCache:
+    """Two-tier cache: a bounded LRU in memory in front of an optional SQLite store.
+
+    Disk hits are promoted into memory. Callers get deep copies, so editing a
+    returned result (e.g. its metadata) never changes the cached one.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0, path: Optional[str] = None):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.store = SQLiteResultStore(path, ttl) if path else None
+
+    def get(self, key: str) -> Optional[Tuple[Any, str]]:
+        """The cached value and the tier it came from ("memory" or "disk"), or None"""
+        value = self.memory.get(key)
+        if value is not None:
+            return copy.deepcopy(value), "memory"
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                value, remaining = stored
+                self.memory.set(key, value, ttl=remaining)
+                return copy.deepcopy(value), "disk"
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def invalidate(self, key: str) -> bool:
+        """Drop one entry from both tiers; returns whether either held it"""
+        in_memory = self.memory.invalidate(key)
+        on_disk = self.store.invalidate(key) if self.store is not None else False
+        return in_memory or on_disk
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memory": self.memory.stats(), "disk": self.store.stats() if self.store is not None else None}
@@ -8,6 +8,8 @@ import pandas as pd
 import json
 import io
 
+from debt_engine import build_payoff_plans
+
 app = FastAPI()
 
 # Allow CORS for frontend
@@ -27,6 +29,9 @@ class Debt(BaseModel):
     amount: float
     interest_rate: float
     min_payment: Optional[float] = None
+    promo_rate: Optional[float] = None
+    promo_months: Optional[int] = None
+    term_months: Optional[int] = None
 
 class FinancialData(BaseModel):
     monthly_income: float
@@ -178,41 +183,22 @@ def analyze_savings(data: Dict[str, Any], budget_analysis: Dict[str, Any]) -> Di
     }
 
 def analyze_debt_reduction(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Simple debt reduction analysis"""
-    debts = data.get("debts", [])
+    """Debt reduction analysis backed by the exact payoff engine"""
+    debts = data.get("debts") or []
     
     if not debts:
         return {
             "total_debt": 0,
             "debts": [],
-            "payoff_plans": {
-                "avalanche": {
-                    "total_interest": 0,
-                    "months_to_payoff": 0,
-                    "monthly_payment": 0
-                },
-                "snowball": {
-                    "total_interest": 0,
-                    "months_to_payoff": 0,
-                    "monthly_payment": 0
-                }
-            },
+            "payoff_plans": build_payoff_plans([]),
             "recommendations": []
         }
     
     total_debt = sum(debt.get("amount", 0) for debt in debts)
-    total_min_payments = sum(debt.get("min_payment", debt.get("amount", 0) * 0.02) for debt in debts)
-    
-    # Simple calculation for demonstration
     avg_interest = sum(debt.get("interest_rate", 10) for debt in debts) / len(debts)
     
-    # Avalanche method (highest interest first)
-    avalanche_months = max(24, int(total_debt / (total_min_payments * 1.5)))
-    avalanche_interest = total_debt * (avg_interest / 100) * (avalanche_months / 12) * 0.7
-    
-    # Snowball method (smallest balance first)
-    snowball_months = max(24, int(total_debt / (total_min_payments * 1.3)))
-    snowball_interest = total_debt * (avg_interest / 100) * (snowball_months / 12) * 0.8
+    # Simulate avalanche (highest interest first) and snowball (smallest balance first)
+    payoff_plans = build_payoff_plans(debts)
     
     recommendations = []
     
@@ -239,18 +225,7 @@ def analyze_debt_reduction(data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "total_debt": total_debt,
         "debts": debts,
-        "payoff_plans": {
-            "avalanche": {
-                "total_interest": avalanche_interest,
-                "months_to_payoff": avalanche_months,
-                "monthly_payment": total_debt / avalanche_months + (total_min_payments * 0.5)
-            },
-            "snowball": {
-                "total_interest": snowball_interest,
-                "months_to_payoff": snowball_months,
-                "monthly_payment": total_debt / snowball_months + (total_min_payments * 0.3)
-            }
-        },
+        "payoff_plans": payoff_plans,
         "recommendations": recommendations
     }
 
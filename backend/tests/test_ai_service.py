@@ -0,0 +1,41 @@
+import pytest
+
+from ai_service import ANALYSIS_KEYS, STAGE_INPUTS, AIFinanceAdvisorService
+
+REQUEST = {
+    "monthly_income": 5000,
+    "dependants": 2,
+    "transactions": None,
+    "manual_expenses": {"Rent": 1500, "Food": 400},
+    "debts": [{"name": "card", "amount": 4000, "interest_rate": 22}],
+}
+
+# A different value for every request field
+CHANGES = {
+    "monthly_income": 6000,
+    "dependants": 3,
+    "transactions": [{"Date": "2024-01-01", "Category": "Food", "Amount": 12.5}],
+    "manual_expenses": {"Rent": 1600},
+    "debts": [{"name": "card", "amount": 3000, "interest_rate": 22}],
+}
+
+
+@pytest.fixture
+def service():
+    return AIFinanceAdvisorService()
+
+
+@pytest.mark.parametrize("stage", ANALYSIS_KEYS)
+@pytest.mark.parametrize("field", sorted(CHANGES))
+def test_stage_is_keyed_on_exactly_what_it_is_sent(service, stage, field):
+    changed = {**REQUEST, field: CHANGES[field]}
+    sent = service._stage_inputs(REQUEST)[f"{stage}_input"]
+    sent_changed = service._stage_inputs(changed)[f"{stage}_input"]
+    upstream = {key: {} for key in ANALYSIS_KEYS}
+    key = service._stage_key(stage, service._request_fields(REQUEST), upstream)
+    key_changed = service._stage_key(stage, service._request_fields(changed), upstream)
+
+    if field in STAGE_INPUTS[stage]:
+        assert sent != sent_changed and key != key_changed
+    else:
+        assert sent == sent_changed and key == key_changed
@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from amount_parsing import parse_amounts
+from transaction_ingest import read_transactions_file, read_transactions_mapped
+
+
+@pytest.mark.parametrize("value, cents", [
+    ("1,234,567", 123456700),
+    ("1.234.567,89", 123456789),
+    ("$1,234.56", 123456),
+    ("(1,234.50)", -123450),
+    ("1'234'567.5", 123456750),
+    ("12,34", 1234),
+    ("1e5", 10000000),
+    ("-2.5E+3", -250000),
+    ("1.5e-2", 2),
+    ("1e5 CR", -10000000),
+])
+def test_readable_amounts(value, cents):
+    parsed, invalid = parse_amounts(pd.Series([value], dtype=object))
+    assert not invalid[0]
+    assert parsed[0] == cents
+
+
+@pytest.mark.parametrize("value", [
+    "12.5.3",
+    "1,2.3,4",
+    "1,23,456",
+    "1,234,5678",
+    "1,234,",
+    "1,234.5.6",
+    "1.234,56.7",
+    "1e400",
+    "e5",
+])
+def test_irregular_amounts_are_invalid(value):
+    parsed, invalid = parse_amounts(pd.Series([value], dtype=object))
+    assert invalid[0]
+    assert parsed[0] == 0
+
+
+def test_string_array_input_matches_series():
+    values = ["12.5.3", "1,234,567", "1e5", "(12.50)", "", "7 DR"]
+    from_series = parse_amounts(pd.Series(values, dtype=object))
+    from_array = parse_amounts(np.array(values))
+    assert np.array_equal(from_series[0], from_array[0])
+    assert np.array_equal(from_series[1], from_array[1])
+
+
+def test_blank_amounts_are_invalid_only_where_required():
+    values = pd.Series(["12.50", "", "  ", None, ""], dtype=object)
+    cents, invalid = parse_amounts(values, required=np.array([True, True, True, True, False]))
+    assert invalid.tolist() == [False, True, True, True, False]
+    assert cents.tolist() == [1250, 0, 0, 0, 0]
+    assert not parse_amounts(values)[1].any()
+
+
+@pytest.mark.parametrize("reader", [read_transactions_file, read_transactions_mapped])
+def test_blank_amount_on_a_filled_row_is_reported(reader):
+    content = b"Date,Category,Amount\n2024-01-01,Food,5\n2024-01-02,Food,\n2024-01-03,Food,  \n,,\n"
+    parsed = reader(io.BytesIO(content))
+    assert parsed["errors"] == ["Invalid amount format in Amount column (line 3, 4)"]
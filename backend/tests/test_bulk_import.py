@@ -0,0 +1,89 @@
+import asyncio
+import io
+import zipfile
+
+from fastapi.testclient import TestClient
+
+import main
+import bulk_import
+from bulk_import import import_statement_files
+
+GOOD_CSV = b"Date,Category,Amount\n2024-02-03,Food,12.50\n2024-02-01,Rent,1000\n"
+BAD_CSV = b"Date,Category,Amount\n2024-01-01,Food,x\n"
+
+
+def statement_archive() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("2024/", b"")
+        archive.writestr("2024/jan.csv", GOOD_CSV)
+        archive.writestr("2024/bad.csv", BAD_CSV)
+        archive.writestr("2024/notes.pdf", b"%PDF")
+        archive.writestr("__MACOSX/2024/._jan.csv", b"\x00\x05")
+    return buffer.getvalue()
+
+
+def test_archive_members_that_are_not_imported_are_skipped_not_failed():
+    imported = import_statement_files([("stmts.zip", statement_archive())], workers=1)
+    statuses = {report["file"]: report["status"] for report in imported["files"]}
+    assert statuses == {
+        "stmts.zip/2024/jan.csv": "imported",
+        "stmts.zip/2024/bad.csv": "error",
+        "stmts.zip/2024/": "skipped",
+        "stmts.zip/2024/notes.pdf": "skipped",
+        "stmts.zip/__MACOSX/2024/._jan.csv": "skipped",
+    }
+
+
+def test_bulk_upload_counts_skipped_files_separately():
+    client = TestClient(main.app)
+    response = client.post("/upload-csv/bulk", data={"monthly_income": "5000"}, files=[
+        ("files", ("a.csv", GOOD_CSV, "text/csv")),
+        ("files", ("stmts.zip", statement_archive(), "application/zip")),
+    ])
+    assert response.status_code == 200
+    summary = response.json()["import_summary"]
+    assert (summary["files_imported"], summary["files_failed"], summary["files_skipped"]) == (2, 1, 3)
+
+
+def test_bulk_import_runs_off_the_event_loop(monkeypatch):
+    calls = []
+
+    def recording_import(files, **options):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("worker thread")
+        return import_statement_files(files, **options)
+
+    monkeypatch.setattr(main, "import_statement_files", recording_import)
+    client = TestClient(main.app)
+    response = client.post("/upload-csv/bulk", data={"monthly_income": "5000"},
+                           files=[("files", ("a.csv", GOOD_CSV, "text/csv"))])
+    assert response.status_code == 200
+    assert calls == ["worker thread"]
+
+
+def test_imports_share_one_process_pool():
+    files = [("a.csv", GOOD_CSV), ("b.csv", GOOD_CSV.replace(b"12.50", b"13.50"))]
+    first = import_statement_files(files, workers=2)
+    pool = bulk_import._process_pool
+    second = import_statement_files(files, workers=2)
+    assert pool is not None and bulk_import._process_pool is pool
+    assert [report["status"] for report in first["files"] + second["files"]] == ["imported"] * 4
+
+
+def test_a_broken_pool_is_replaced_for_the_next_import():
+    files = [("a.csv", GOOD_CSV), ("b.csv", GOOD_CSV.replace(b"12.50", b"13.50"))]
+    import_statement_files(files, workers=2)
+    pool = bulk_import._process_pool
+    for process in list(pool._processes.values()):
+        process.kill()
+        process.join()
+
+    broken = import_statement_files(files, workers=2)
+    assert {report["status"] for report in broken["files"]} == {"error"}
+    recovered = import_statement_files(files, workers=2)
+    assert bulk_import._process_pool is not pool
+    assert [report["status"] for report in recovered["files"]] == ["imported", "imported"]
@@ -0,0 +1,48 @@
+import io
+
+import pandas as pd
+import pytest
+
+from date_parsing import date_format_cache, parse_dates, resolve_date_format
+from transaction_ingest import read_transactions_file, read_transactions_mapped
+
+DAY_FIRST = b"Date,Category,Amount\n25/01/2024,Food,10\n03/02/2024,Food,20\n"
+MONTH_FIRST = b"Date,Category,Amount\n01/05/2024,Food,10\n02/03/2024,Food,20\n03/04/2024,Food,30\n"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    date_format_cache.clear()
+    yield
+    date_format_cache.clear()
+
+
+def dates(result):
+    return [str(day) for day in result["table"].dates]
+
+
+@pytest.mark.parametrize("read", [read_transactions_file, read_transactions_mapped])
+def test_cached_format_from_another_upload_does_not_override_an_ambiguous_sample(read):
+    alone = dates(read(io.BytesIO(MONTH_FIRST)))
+    date_format_cache.clear()
+    assert dates(read(io.BytesIO(DAY_FIRST))) == ["2024-01-25", "2024-02-03"]
+    assert dates(read(io.BytesIO(MONTH_FIRST))) == alone == ["2024-01-05", "2024-02-03", "2024-03-04"]
+
+
+def test_cached_format_is_reused_when_the_sample_confirms_it():
+    values = pd.Series(["25/01/2024", "13/02/2024"])
+    assert resolve_date_format(values, "bank") == "%d/%m/%Y"
+    assert resolve_date_format(pd.Series(["31/03/2024"]), "bank") == "%d/%m/%Y"
+    assert date_format_cache.get("bank") == "%d/%m/%Y"
+
+
+def test_format_resolved_from_the_first_chunk_applies_to_later_chunks():
+    first = pd.Series(["25/01/2024", "13/02/2024"])
+    fmt = resolve_date_format(first, "bank")
+    later = parse_dates(pd.Series(["01/05/2024", "02/03/2024"]), date_format=fmt)
+    assert [str(day.date()) for day in later] == ["2024-05-01", "2024-03-02"]
+
+
+def test_unparseable_values_fall_back_per_row():
+    parsed = parse_dates(pd.Series(["2024-01-05", "Jan 7 2024", "nonsense", None]))
+    assert [str(day.date()) if not pd.isna(day) else None for day in parsed] == ["2024-01-05", "2024-01-07", None, None]
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+from debt_engine import (SCALAR_EVENT_ROWS, STRATEGIES, build_payoff_plans, debt_arrays, payments_below_interest,
+                         payoff_order, promo_schedule, simulate_events, simulate_monthly)
+
+
+def random_portfolio(rng: np.random.Generator):
+    debts = []
+    for i in range(int(rng.integers(1, 9))):
+        debt = {"name": f"debt{i}", "amount": float(rng.uniform(50, 30000)), "interest_rate": float(rng.uniform(0, 30))}
+        kind = rng.random()
+        if kind < 0.25:
+            debt["promo_rate"] = float(rng.choice([0.0, rng.uniform(0, 10)]))
+            debt["promo_months"] = int(rng.integers(1, 25))
+        elif kind < 0.4:
+            debt["amount"] = float(rng.uniform(50000, 400000))
+            debt["interest_rate"] = float(rng.uniform(2, 8))
+            debt["term_months"] = int(rng.choice([120, 180, 360]))
+        elif kind < 0.5:
+            debt["interest_rate"] = 0.0
+        if rng.random() < 0.3:
+            debt["min_payment"] = float(rng.uniform(10, 400))
+        debts.append(debt)
+    return debts
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["scalar", "vectorized"])
+@pytest.mark.parametrize("seed", range(200))
+def test_event_engine_matches_monthly_simulation(seed, batched):
+    rng = np.random.default_rng(seed)
+    debts = random_portfolio(rng)
+    balances, rates, min_payments = debt_arrays(debts)
+    rate_changes = promo_schedule(debts, rates)
+    orders = np.stack([payoff_order(balances, rates, strategy) for strategy in STRATEGIES] +
+                      [rng.permutation(len(debts))])
+    if batched:
+        # Enough rows to take the vectorized path instead of the per-row scalar one
+        orders = np.tile(orders, (SCALAR_EVENT_ROWS // len(orders) + 1, 1))
+    budgets = min_payments.sum() + rng.choice([0.0, 50.0, 500.0, 3000.0], size=len(orders))
+    max_months = int(rng.choice([60, 600]))
+
+    events = simulate_events(balances, rates, min_payments, orders, budgets, max_months, rate_changes)
+    monthly = simulate_monthly(balances, rates, min_payments, orders, budgets, max_months, rate_changes)
+
+    np.testing.assert_array_equal(events["paid_off"], monthly["paid_off"])
+    np.testing.assert_array_equal(events["months_to_payoff"], monthly["months_to_payoff"])
+    np.testing.assert_array_equal(events["payoff_month"], monthly["payoff_month"])
+    np.testing.assert_allclose(events["total_interest"], monthly["total_interest"], rtol=1e-6, atol=0.01)
+    np.testing.assert_allclose(events["remaining_balance"], monthly["remaining_balance"], rtol=1e-6, atol=0.01)
+
+
+def test_plans_for_no_debts_are_empty():
+    plans = build_payoff_plans([])
+    assert all(plan["total_interest"] == 0 and plan["months_to_payoff"] == 0 for plan in plans.values())
+
+
+@pytest.mark.parametrize("debts", [
+    [{"name": "card", "amount": 10000, "interest_rate": 30, "min_payment": 100}],
+    [{"name": "card", "amount": 10000, "interest_rate": 30, "min_payment": 0},
+     {"name": "store", "amount": 500, "interest_rate": 20, "promo_rate": 0, "promo_months": 6}],
+])
+def test_plans_that_never_clear_the_debt_are_not_paid_off(debts):
+    plans = build_payoff_plans(debts)
+    for plan in plans.values():
+        assert plan["paid_off"] is False
+        assert plan["months_to_payoff"] is None
+        assert plan["remaining_balance"] > 0
+    assert payments_below_interest(debts) == ["card"]
+
+
+def test_paid_off_plans_report_no_remaining_balance():
+    plans = build_payoff_plans([{"name": "card", "amount": 1000, "interest_rate": 20, "min_payment": 100}])
+    assert all(plan["paid_off"] and plan["remaining_balance"] == 0 and plan["months_to_payoff"] > 0
+               for plan in plans.values())
+
+
+def test_analysis_flags_payments_below_interest():
+    response = TestClient(main.app).post("/analyze-basic", json={
+        "monthly_income": 4000, "dependants": 0, "manual_expenses": {"Rent": 1000},
+        "debts": [{"name": "card", "amount": 10000, "interest_rate": 30, "min_payment": 100}],
+    })
+    assert response.status_code == 200
+    debt_reduction = response.json()["debt_reduction"]
+    assert debt_reduction["payoff_plans"]["avalanche"]["paid_off"] is False
+    assert debt_reduction["recommendations"][0]["title"] == "Payments Below Interest"
+
+
+@pytest.mark.parametrize("strategy, status", [("optimal", 200), ("snowball", 200), ("fastest", 422)])
+def test_schedule_validates_strategy(strategy, status):
+    response = TestClient(main.app).post("/debt/schedule", json={
+        "debts": [{"name": "card", "amount": 1000, "interest_rate": 20}], "strategy": strategy,
+    })
+    assert response.status_code == status
+
+
+@pytest.mark.parametrize("strategy, status", [("snowball", 200), ("optimal", 422), ("fastest", 422)])
+def test_payoff_plan_validates_strategy(strategy, status):
+    token = main.create_access_token({"sub": "planner@example.com"})
+    response = TestClient(main.app).post("/debt/plans", headers={"Authorization": f"Bearer {token}"}, json={
+        "debts": [{"name": "card", "amount": 1000, "interest_rate": 20}], "strategy": strategy,
+    })
+    assert response.status_code == status
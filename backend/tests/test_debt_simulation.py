@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from debt_simulation import simulate_payoff_risk
+
+# Zero-rate debt cleared by its minimum in exactly twelve months
+EXACT_TERM_DEBT = {"name": "card", "amount": 1200.0, "interest_rate": 0.0, "min_payment": 100.0}
+
+
+def test_debt_cleared_in_the_last_simulated_month_counts_as_paid_off():
+    result = simulate_payoff_risk([EXACT_TERM_DEBT], paths=100, seed=1, rate_volatility=0.0,
+                                  shock_probability=0.0, max_months=12)
+    assert result["probability_paid_off"] == 1.0
+    assert result["months_to_payoff"]["p90"] == 12
+
+
+def test_debt_still_open_at_the_horizon_is_not_paid_off():
+    result = simulate_payoff_risk([EXACT_TERM_DEBT], paths=100, seed=1, rate_volatility=0.0,
+                                  shock_probability=0.0, max_months=11)
+    assert result["probability_paid_off"] == 0.0
+
+
+@pytest.mark.parametrize("options", [
+    {"strategy": "biggest-first"},
+    {"paths": 0},
+    {"paths": main.MAX_REQUEST_SIMULATION_PATHS + 1},
+    {"rate_volatility": -0.1},
+    {"shock_probability": 1.5},
+    {"shock_months": -1},
+])
+def test_out_of_range_simulation_options_are_rejected_as_invalid_input(options):
+    client = TestClient(main.app)
+    response = client.post("/analyze-basic", json={
+        "monthly_income": 4000, "dependants": 0, "debts": [EXACT_TERM_DEBT],
+        "debt_simulation": {"paths": 100, "seed": 1, **options},
+    })
+    assert response.status_code == 422
+
+
+def test_simulation_runs_off_the_event_loop(monkeypatch):
+    released = threading.Event()
+
+    def blocking_simulation(debts, **options):
+        # Only returns True if the event loop stayed free to release it
+        return {"released": released.wait(timeout=5)}
+
+    monkeypatch.setattr(main, "simulate_payoff_risk", blocking_simulation)
+    payload = main.FinancialData(monthly_income=4000, dependants=0, manual_expenses={"Rent": 1000},
+                                 debts=[EXACT_TERM_DEBT],
+                                 debt_simulation={"paths": 100})
+
+    async def run():
+        analysis = asyncio.ensure_future(main.analyze_finances_basic(payload))
+        await asyncio.sleep(0.05)
+        released.set()
+        return await analysis
+
+    result = asyncio.run(run())
+    assert result["debt_reduction"]["risk_simulation"] == {"released": True}
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from loans import amortize, amortize_loans
+
+MORTGAGE = {"name": "mortgage", "principal": 200000, "interest_rate": 6, "term_months": 360}
+
+
+def test_prepayments_shorten_the_term():
+    schedule = amortize_loans([MORTGAGE, {**MORTGAGE, "extra_principal": 200,
+                                          "lump_sums": [{"month": 12, "amount": 10000}]}])
+    plain, prepaid = schedule["months_to_payoff"]
+    assert plain == 360
+    assert prepaid < plain
+    assert schedule["scheduled_payment"][0] == pytest.approx(schedule["scheduled_payment"][1])
+
+
+@pytest.mark.parametrize("extra, lumps", [
+    (np.array([-100.0]), None),
+    (None, np.array([[0.0, -5000.0, 0.0]])),
+])
+def test_negative_prepayments_are_rejected(extra, lumps):
+    with pytest.raises(ValueError):
+        amortize(np.array([10000.0]), np.array([5.0]), np.array([3]), extra_principal=extra, lump_sums=lumps)
+
+
+@pytest.mark.parametrize("loan", [
+    {**MORTGAGE, "extra_principal": -100},
+    {**MORTGAGE, "lump_sums": [{"month": 12, "amount": -5000}]},
+])
+def test_negative_prepayments_are_invalid_requests(loan):
+    response = TestClient(main.app).post("/loans/amortize", json={"loans": [loan]})
+    assert response.status_code == 422
@@ -0,0 +1,65 @@
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from mapped_csv import IrregularQuoting, _split_records
+from transaction_ingest import read_transactions_file, read_transactions_mapped
+
+
+def read_both(content: bytes):
+    return read_transactions_file(io.BytesIO(content)), read_transactions_mapped(io.BytesIO(content))
+
+
+def split(content: bytes):
+    data = np.zeros(len(content) + 512, dtype=np.uint8)
+    data[:len(content)] = np.frombuffer(content, dtype=np.uint8)
+    return _split_records(data, len(content), True, ",", '"')
+
+
+def test_stray_quote_in_unquoted_field_keeps_every_record():
+    content = (b'Date,Description,Amount\n2024-01-01,12" pizza,10\n2024-01-02,Shell,20\n'
+               b'2024-01-03,Rent,30\n2024-01-04,Water,40\n')
+    streamed, mapped = read_both(content)
+    assert len(mapped["table"]) == len(streamed["table"]) == 4
+    assert mapped["table"].amount_cents.sum() == streamed["table"].amount_cents.sum() == 10000
+    assert mapped["errors"] == streamed["errors"]
+
+
+def test_stray_quote_is_detected_by_the_splitter():
+    with pytest.raises(IrregularQuoting):
+        split(b'2024-01-01,12" pizza,10\n2024-01-02,Shell,20\n')
+
+
+@pytest.mark.parametrize("content", [
+    b'Date,Description,Amount\n2024-01-01,"Smith, J ""Jr""",10\n2024-01-02,"",20\n"2024-01-03","a\nb","30"\n',
+    b'Date,Description,Amount\r\n2024-01-01,"Cafe",10\r\n2024-01-02,"""Quoted""",20\r\n',
+])
+def test_well_formed_quoting_stays_on_the_mapped_path(content):
+    block, consumed = split(content)
+    assert consumed == len(content)
+    streamed, mapped = read_both(content)
+    assert len(mapped["table"]) == len(streamed["table"])
+    assert mapped["table"].amount_cents.tolist() == streamed["table"].amount_cents.tolist()
+
+
+def test_large_upload_is_parsed_off_the_event_loop(monkeypatch):
+    calls = []
+
+    def recording_reader(stream, **options):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("worker thread")
+        return read_transactions_mapped(stream, **options)
+
+    monkeypatch.setattr(main, "MAPPED_PARSE_BYTES", 0)
+    monkeypatch.setattr(main, "read_transactions_mapped", recording_reader)
+    response = TestClient(main.app).post("/upload-csv", data={"monthly_income": "5000"}, files=[
+        ("file", ("a.csv", b"Date,Category,Amount\n2024-02-03,Food,12.50\n", "text/csv"))])
+    assert response.status_code == 200
+    assert calls == ["worker thread"]
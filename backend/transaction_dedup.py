@@ -0,0 +1,70 @@
+"""
+Transaction Deduplication
+Hash-indexed removal of rows repeated across overlapping statement exports
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from fingerprints import combine_hashes
+from transaction_table import TransactionTable
+
+
+def occurrence_keys(table: TransactionTable) -> np.ndarray:
+    """Per-row key of (fingerprint, how many identical rows precede it in this table).
+
+    Two identical coffees on one statement are distinct purchases, so
+    duplicates are only ever counted between sources: the n-th copy of a
+    transaction in one export matches the n-th copy in another.
+    """
+    if not len(table):
+        return np.array([], dtype=np.uint64)
+    codes, _ = pd.factorize(table.fingerprints)
+    occurrence = pd.Series(codes).groupby(codes).cumcount().to_numpy(dtype=np.int64)
+    return combine_hashes(table.fingerprints, occurrence)
+
+
+def deduplicate(tables: List[TransactionTable],
+                known_keys: Optional[pd.Index] = None) -> Tuple[TransactionTable, np.ndarray, Dict[str, int]]:
+    """Merge per-source tables, keeping each transaction once.
+
+    Rows whose key already appears in an earlier table, or in ``known_keys``
+    (e.g. a user's stored ledger), are dropped; hash lookups keep this linear
+    in the number of rows. Returns the merged table, its rows' keys and counts
+    of ``duplicates_collapsed`` (total), ``duplicates_within_upload`` and
+    ``duplicates_of_stored``.
+    """
+    merged = TransactionTable.concat(tables)
+    keys = pd.Index(np.concatenate([occurrence_keys(table) for table in tables]) if tables
+                    else np.array([], dtype=np.uint64))
+
+    repeated = keys.duplicated(keep="first")
+    stored = keys.isin(known_keys) & ~repeated if known_keys is not None and len(known_keys) else np.zeros(len(keys), dtype=bool)
+    keep = ~(repeated | stored)
+
+    counts = {
+        "duplicates_collapsed": int((~keep).sum()),
+        "duplicates_within_upload": int(repeated.sum()),
+        "duplicates_of_stored": int(stored.sum()),
+    }
+    return merged.take(keep), keys.to_numpy()[keep], counts
+
+
+class TransactionLedger:
+    """A user's stored transactions plus the key index used to reject re-imports"""
+
+    def __init__(self):
+        self.table = TransactionTable.empty()
+        self.keys = pd.Index(np.array([], dtype=np.uint64))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def merge(self, tables: List[TransactionTable]) -> Dict[str, Any]:
+        """Add newly imported per-source tables, skipping anything already stored"""
+        added, keys, counts = deduplicate(tables, self.keys)
+        if len(added):
+            self.table = TransactionTable.concat([self.table, added]).sort_by_date()
+            self.keys = self.keys.append(pd.Index(keys))
+        return {**counts, "transactions_added": len(added), "ledger_transactions": len(self.table)}
@@ -0,0 +1,358 @@
+"""
+Transaction Ingestion
+Single-pass parsing and validation of uploaded transaction files (CSV, OFX/QFX, QIF)
+"""
+
+from typing import Dict, List, Any, BinaryIO, Iterable, Optional, Tuple
+import csv
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from amount_parsing import parse_amounts
+from categorization import DESCRIPTION_COLUMNS, Categorizer, fill_categories
+from csv_sniffing import SNIFF_BYTES, detect_encoding, sniff_csv
+from date_parsing import parse_dates, resolve_date_format
+from mapped_csv import BYTEWISE_ENCODINGS, IrregularQuoting, iter_record_blocks
+from statement_formats import detect_statement_format, iter_ofx_frames, iter_qif_frames
+from transaction_table import TransactionTable, TransactionTableBuilder
+
+# Columns every transaction file needs; a missing Category is filled from the description
+REQUIRED_COLUMNS = ("Date", "Amount")
+
+# Column layout assumed for CSV files without a header row
+HEADERLESS_COLUMNS = ("Date", "Category", "Amount")
+
+# Columns always read as text, so numeric-looking labels ("5411", account numbers) are not turned into floats
+TEXT_COLUMNS = {column: str for column in ("Date", "Category", "Account", *DESCRIPTION_COLUMNS)}
+
+# Offending rows listed per validation error before the message is truncated
+MAX_REPORTED_ROWS = 5
+
+# Rows parsed per chunk when streaming large uploads
+CSV_CHUNK_ROWS = 50_000
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+class _LimitedReader(io.RawIOBase):
+    """Pass-through stream that fails as soon as more than max_bytes have been read"""
+
+    def __init__(self, stream: BinaryIO, max_bytes: Optional[int]):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        if self.max_bytes is not None:
+            size = min(size, self.max_bytes + 1 - self.bytes_read)
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise UploadTooLarge(f"File exceeds the {self.max_bytes / (1024 * 1024):g} MB upload limit")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _row_error(message: str, lines: List[int], count: int, unit: str = "line") -> str:
+    """Validation message naming the first offending file lines (or transactions)"""
+    more = count - len(lines)
+    suffix = f" and {more} more" if more > 0 else ""
+    return f"{message} ({unit} {', '.join(map(str, lines))}{suffix})"
+
+
+def _source_profile(df: pd.DataFrame) -> str:
+    """Header layout identifying an export source, used to cache its date format"""
+    return "|".join(map(str, df.columns))
+
+
+def _coerce_chunk(df: pd.DataFrame, date_format: Optional[str] = None) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """Parse Date and Amount in place; return the frame and the masks of unparseable values"""
+    dates = parse_dates(df['Date'], profile=_source_profile(df), date_format=date_format)
+    bad_dates = dates.isna() & df['Date'].notna()
+
+    # Amounts may carry currency symbols, locale separators and CR/DR markers; a blank amount
+    # on a row with other fields filled in is an error, not a $0 transaction
+    cents, bad_amounts = parse_amounts(df['Amount'], required=df.drop(columns='Amount').notna().any(axis=1).to_numpy())
+
+    df['Date'] = dates
+    df['Amount'] = cents / 100
+    return df, bad_dates, pd.Series(bad_amounts, index=df.index)
+
+
+def _first_data_line(options: Dict[str, Any]) -> int:
+    """File line of the first data row for sniffed read_csv options"""
+    return 1 if options.get("names") else 2
+
+
+class _ValidationErrors:
+    """Collects offending lines across chunks; data starts on line 2 after a header.
+
+    Statement formats count transactions instead (unit="transaction", first_line=1).
+    """
+
+    MESSAGES = {
+        "date": "Invalid date format in Date column",
+        "amount": "Invalid amount format in Amount column",
+    }
+
+    def __init__(self, first_line: int = 2, unit: str = "line"):
+        self.first_line = first_line
+        self.unit = unit
+        self.lines = {kind: [] for kind in self.MESSAGES}
+        self.counts = {kind: 0 for kind in self.MESSAGES}
+
+    def add(self, kind: str, invalid: pd.Series) -> None:
+        count = int(invalid.sum())
+        if count:
+            room = MAX_REPORTED_ROWS - len(self.lines[kind])
+            self.lines[kind].extend(int(index) + self.first_line for index in invalid[invalid].index[:room])
+            self.counts[kind] += count
+
+    def messages(self) -> List[str]:
+        return [
+            _row_error(message, self.lines[kind], self.counts[kind], self.unit)
+            for kind, message in self.MESSAGES.items() if self.counts[kind]
+        ]
+
+
+def ingest_transactions_csv(content: bytes, categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Parse a transaction CSV once and validate the typed result.
+
+    Returns a dict with ``errors`` (empty when the file is usable) and ``frame``,
+    the parsed DataFrame with Date as datetime64, Amount as float and missing
+    categories filled from descriptions, or None when the file could not be
+    read at all.
+    """
+    options = sniff_csv(content[:SNIFF_BYTES], HEADERLESS_COLUMNS)
+    try:
+        df = pd.read_csv(io.BytesIO(content), dtype=TEXT_COLUMNS, **options)
+    except Exception as e:
+        return {"errors": [f"Invalid CSV format: {str(e)}"], "frame": None}
+
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        return {"errors": [f"Missing required columns: {', '.join(missing_columns)}"], "frame": df}
+
+    df, bad_dates, bad_amounts = _coerce_chunk(df)
+    fill_categories(df, categorizer)
+    errors = _ValidationErrors(_first_data_line(options))
+    errors.add("date", bad_dates)
+    errors.add("amount", bad_amounts)
+    return {"errors": errors.messages(), "frame": df}
+
+
+def _collect_tables(frames: Iterable[pd.DataFrame], errors: _ValidationErrors, profile: Optional[str] = None,
+                    sign: int = 1, categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Validate parsed chunks, categorize them and reduce each to a TransactionTable as it arrives"""
+    tables = []
+    offset = auto_categorized = 0
+    date_format = None
+    try:
+        for df in frames:
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+            if missing_columns:
+                return {"errors": [f"Missing required columns: {', '.join(missing_columns)}"], "table": None}
+
+            if profile is not None:
+                # Statement batches restart at 0; keep row numbers running for error messages
+                df.index = pd.RangeIndex(offset, offset + len(df))
+                offset += len(df)
+            if date_format is None:
+                # Resolved once per upload so every chunk reads day/month the same way
+                date_format = resolve_date_format(df['Date'], profile or _source_profile(df))
+            df, bad_dates, bad_amounts = _coerce_chunk(df, date_format)
+            if sign < 0:
+                df['Amount'] = -df['Amount']
+            errors.add("date", bad_dates)
+            errors.add("amount", bad_amounts)
+            auto_categorized += fill_categories(df, categorizer)
+            tables.append(TransactionTable.from_frame(df))
+    except UploadTooLarge:
+        raise
+    except pd.errors.EmptyDataError:
+        return {"errors": ["CSV file is empty"], "table": None}
+    except Exception as e:
+        return {"errors": [f"Invalid CSV format: {str(e)}"], "table": None}
+
+    if profile is not None and not tables:
+        return {"errors": [f"No transactions found in {profile.upper()} statement"], "table": None}
+    return {"errors": errors.messages(), "table": TransactionTable.concat(tables), "auto_categorized": auto_categorized}
+
+
+def read_transactions_file(stream: BinaryIO, max_bytes: Optional[int] = None, chunksize: int = CSV_CHUNK_ROWS,
+                           categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Stream a transaction file in chunks straight into a columnar TransactionTable.
+
+    The format (CSV, OFX/QFX or QIF) and encoding are sniffed from the buffered
+    prefix without consuming it. Only one parsed chunk is alive at a time; each
+    is reduced to the table's compact arrays before the next is read. Statement
+    amounts (money out negative) are flipped to the ledger's spending-positive
+    convention. Rows without a category are categorized from their description
+    (payee/merchant) with ``categorizer`` (built-in merchant rules when None).
+    Raises UploadTooLarge once more than max_bytes have been read. Returns
+    errors, table (None on failure) and the auto_categorized row count.
+    """
+    reader = io.BufferedReader(_LimitedReader(stream, max_bytes), buffer_size=SNIFF_BYTES)
+    prefix = reader.peek(SNIFF_BYTES)[:SNIFF_BYTES]
+    statement_format = detect_statement_format(prefix)
+    if statement_format == "csv":
+        return _read_csv(reader, prefix, chunksize, categorizer)
+
+    iter_frames = iter_ofx_frames if statement_format == "ofx" else iter_qif_frames
+    frames = iter_frames(reader, detect_encoding(prefix), chunksize)
+    return _collect_tables(frames, _ValidationErrors(first_line=1, unit="transaction"), profile=statement_format, sign=-1,
+                           categorizer=categorizer)
+
+
+def _read_csv(reader: io.BufferedReader, prefix: bytes, chunksize: int,
+              categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    try:
+        options = sniff_csv(prefix, HEADERLESS_COLUMNS)
+        frames = pd.read_csv(reader, chunksize=chunksize, dtype=TEXT_COLUMNS, **options)
+    except pd.errors.EmptyDataError:
+        return {"errors": ["CSV file is empty"], "table": None}
+    except Exception as e:
+        return {"errors": [f"Invalid CSV format: {str(e)}"], "table": None}
+    return _collect_tables(frames, _ValidationErrors(_first_data_line(options)), categorizer=categorizer)
+
+
+def read_transactions_csv(stream: BinaryIO, max_bytes: Optional[int] = None, chunksize: int = CSV_CHUNK_ROWS,
+                          categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Stream a transaction CSV in chunks straight into a columnar TransactionTable (see read_transactions_file)"""
+    reader = io.BufferedReader(_LimitedReader(stream, max_bytes), buffer_size=SNIFF_BYTES)
+    return _read_csv(reader, reader.peek(SNIFF_BYTES)[:SNIFF_BYTES], chunksize, categorizer)
+
+
+def spool_to_disk(stream: BinaryIO, max_bytes: Optional[int] = None) -> BinaryIO:
+    """The stream as a file with a descriptor (so it can be memory-mapped).
+
+    Streams that already have one, such as uploads spooled to a temporary file,
+    are used as they are; anything else is copied to a temporary file in
+    chunks. Raises UploadTooLarge past max_bytes.
+    """
+    try:
+        size = os.fstat(stream.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        spooled = tempfile.TemporaryFile()
+        shutil.copyfileobj(_LimitedReader(stream, max_bytes), spooled, SNIFF_BYTES)
+        spooled.flush()
+        return spooled
+    if max_bytes is not None and size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes / (1024 * 1024):g} MB upload limit")
+    return stream
+
+
+def read_transactions_mapped(stream: BinaryIO, max_bytes: Optional[int] = None,
+                             categorizer: Optional[Categorizer] = None) -> Dict[str, Any]:
+    """Large-file mode: parse a transaction file from a memory map of its bytes on disk.
+
+    The upload is spooled to disk (see spool_to_disk) and mapped, and CSV
+    records and fields are split with vectorized byte scans, one block of
+    records at a time. Text columns are factorized straight from the bytes,
+    so only their distinct values become Python strings, and amounts are
+    parsed as a NumPy str array; memory holds one block plus the growing
+    columnar table instead of a chunk of per-row Python objects. Statements
+    and encodings that cannot be split bytewise (UTF-16), and files with
+    quotes inside unquoted fields (``12" pizza``), go through
+    read_transactions_file. Returns the same dict as read_transactions_file.
+    """
+    spooled = spool_to_disk(stream, max_bytes)
+    try:
+        if not os.fstat(spooled.fileno()).st_size:
+            return {"errors": ["CSV file is empty"], "table": None}
+        with mmap.mmap(spooled.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            prefix = mapped[:SNIFF_BYTES]
+            options = sniff_csv(prefix, HEADERLESS_COLUMNS)
+            if (detect_statement_format(prefix) != "csv" or "sep" not in options
+                    or options["encoding"] not in BYTEWISE_ENCODINGS):
+                return read_transactions_file(mapped, max_bytes, categorizer=categorizer)
+            try:
+                return _read_mapped_csv(mapped, options, categorizer)
+            except IrregularQuoting:
+                return read_transactions_file(mapped, max_bytes, categorizer=categorizer)
+    finally:
+        if spooled is not stream:
+            spooled.close()
+
+
+def _read_mapped_csv(mapped: mmap.mmap, options: Dict[str, Any], categorizer: Optional[Categorizer]) -> Dict[str, Any]:
+    encoding, sep, quotechar = options["encoding"], options["sep"], options["quotechar"]
+    start = 3 if encoding == "utf-8-sig" else 0
+    if "names" in options:
+        columns = list(options["names"])
+    else:
+        # The header is a single record; read it with the csv module and parse the data after it
+        header_end = mapped.find(b"\n", start)
+        header_end = len(mapped) if header_end < 0 else header_end
+        header = mapped[start:header_end].decode(encoding, errors="replace").rstrip("\r")
+        columns = next(csv.reader([header], delimiter=sep, quotechar=quotechar), [])
+        start = header_end + 1
+
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        return {"errors": [f"Missing required columns: {', '.join(missing_columns)}"], "table": None}
+
+    description = next((col for col in DESCRIPTION_COLUMNS if col in columns), None)
+    label_columns = [col for col in dict.fromkeys(("Category", description, "Description", "Account"))
+                     if col in columns]
+    profile = "|".join(columns)
+    errors = _ValidationErrors(_first_data_line(options))
+    builder = None
+    date_format = None
+    offset = auto_categorized = 0
+    for block in iter_record_blocks(mapped, start, sep, quotechar):
+        if builder is None:
+            # Size the columns from the first block's bytes per record, with some headroom
+            builder = TransactionTableBuilder(int(len(block) * (len(mapped) - start) / int(block.ends[-1]) * 1.05) + 1)
+        extra = block.delimiter_counts >= len(columns)
+        if extra.any():
+            row = int(np.argmax(extra))
+            line = offset + row + _first_data_line(options)
+            # Worded as pandas' tokenizer error, so both parsers report malformed rows alike
+            return {"errors": [f"Invalid CSV format: Error tokenizing data. C error: Expected {len(columns)} fields "
+                               f"in line {line}, saw {int(block.delimiter_counts[row]) + 1}\n"], "table": None}
+
+        index = pd.RangeIndex(offset, offset + len(block))
+        offset += len(block)
+        frame = {}
+        for col in label_columns:
+            codes, labels = block.labels(*block.field_bounds(columns.index(col)), encoding)
+            frame[col] = (np.array(labels + [None], dtype=object)[codes] if col == "Category"
+                          else pd.Categorical.from_codes(codes, labels))
+
+        # Dates repeat heavily: parse each distinct value once
+        codes, labels = block.labels(*block.field_bounds(columns.index("Date")), encoding)
+        labels = pd.Series(labels, dtype=object)
+        if date_format is None:
+            date_format = resolve_date_format(labels, profile)
+        parsed = parse_dates(labels, date_format=date_format)
+        frame["Date"] = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT"))[codes]
+        errors.add("date", pd.Series(np.append(parsed.isna().to_numpy(), False)[codes], index=index))
+
+        filled = np.zeros(len(block), dtype=bool)
+        for col, name in enumerate(columns):
+            if name != "Amount":
+                starts, ends = block.field_bounds(col)
+                filled |= ends > starts
+        cents, bad_amounts = parse_amounts(block.text(*block.field_bounds(columns.index("Amount")), encoding),
+                                           required=filled)
+        frame["Amount"] = cents / 100
+        errors.add("amount", pd.Series(bad_amounts, index=index))
+
+        df = pd.DataFrame(frame, index=index)
+        auto_categorized += fill_categories(df, categorizer)
+        builder.append(TransactionTable.from_frame(df))
+
+    table = builder.build() if builder is not None else TransactionTable.empty()
+    return {"errors": errors.messages(), "table": table, "auto_categorized": auto_categorized}
@@ -0,0 +1,132 @@
+"""
+Transaction Netting
+Cancels transfers, refunds and reversals out of a transaction table before spending is aggregated
+"""
+
+from typing import Dict, Tuple
+import numpy as np
+
+from statement_formats import TRANSFER_CATEGORY
+from transaction_table import TransactionTable
+
+# Most days between a purchase and a refund or reversal of the same amount for the two to cancel
+REFUND_WINDOW_DAYS = 60
+
+# Most days between the two legs of a transfer between the user's own accounts
+TRANSFER_WINDOW_DAYS = 5
+
+
+def _group_ids(*columns: np.ndarray) -> np.ndarray:
+    """Dense per-row ids of equal value tuples, from one lexicographic sort (no hashing)"""
+    order = np.lexsort(columns[::-1])
+    changed = np.zeros(len(order), dtype=bool)
+    for column in columns:
+        ordered = column[order]
+        changed[1:] |= ordered[1:] != ordered[:-1]
+    ids = np.empty(len(order), dtype=np.int64)
+    ids[order] = np.cumsum(changed)
+    return ids
+
+
+def match_pairs(keys: np.ndarray, days: np.ndarray, left: np.ndarray, right: np.ndarray,
+                before: int, after: int) -> Tuple[np.ndarray, np.ndarray]:
+    """One-to-one pairs of (left row, right row) with equal keys, the left row dated
+    from ``before`` days before to ``after`` days after the right row.
+
+    Key and day are packed into one sortable integer, so every right row finds
+    its latest candidate with a binary search over the sorted left rows.
+    Right rows wanting the same candidate take successively earlier ones; any
+    that then collide retry in another round without the rows already paired.
+    Each round is O(n log n) and nearly all rows settle in the first.
+    """
+    rows = np.flatnonzero(left | right)
+    if not left.any() or not right.any():
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    first_day = int(days[rows].min())
+    stride = int(days[rows].max()) - first_day + before + after + 1
+    packed = keys * stride + (days - first_day)
+
+    left_rows = np.flatnonzero(left)
+    left_rows = left_rows[np.argsort(packed[left_rows], kind="stable")]
+    left_values = packed[left_rows]
+    free = np.ones(len(left_rows), dtype=bool)
+    pending = np.flatnonzero(right)
+    paired_left, paired_right = [], []
+    while len(pending) and free.any():
+        available = np.flatnonzero(free)
+        values = left_values[available]
+        wanted = packed[pending]
+        position = np.searchsorted(values, wanted + after, side="right") - 1
+        reachable = (position >= 0) & (values[np.maximum(position, 0)] >= wanted - before)
+        if not reachable.any():
+            break
+        # Later right rows after the same candidate step back one candidate each
+        order = np.lexsort((-wanted, position))
+        grouped = position[order]
+        starts = np.flatnonzero(np.append(True, grouped[1:] != grouped[:-1]))
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order))))
+        position[order] = grouped - rank
+        valid = reachable & (position >= 0) & (values[np.maximum(position, 0)] >= wanted - before)
+        claimants = np.flatnonzero(valid)
+        _, winners = np.unique(position[claimants], return_index=True)
+        won = claimants[winners]
+        paired_left.append(left_rows[available[position[won]]])
+        paired_right.append(pending[won])
+        free[available[position[won]]] = False
+        retry = reachable.copy()
+        retry[won] = False
+        pending = pending[retry]
+    if not paired_left:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    return np.concatenate(paired_left), np.concatenate(paired_right)
+
+
+def net_transactions(table: TransactionTable) -> Tuple[TransactionTable, Dict[str, int]]:
+    """Remove rows that are not spending: transfers and refunded or reversed purchases.
+
+    Transfer-category rows are dropped, along with the other account's leg
+    (the equal and opposite amount within TRANSFER_WINDOW_DAYS) when that leg
+    was categorized differently. A credit of the same amount and category as
+    a purchase up to REFUND_WINDOW_DAYS before it cancels that purchase, and
+    both rows are dropped. Other credits stay to offset their category (see
+    net_spending). Rows without a date are never paired.
+
+    Returns the remaining rows and counts of ``transfers_removed``,
+    ``refunds_netted`` (pairs) and ``credits_offset``.
+    """
+    cents = table.amount_cents
+    dated = ~np.isnat(table.dates) & (cents != 0)
+    days = np.where(dated, table.dates.astype(np.int64), 0)
+    transfer_code = table.categories.index(TRANSFER_CATEGORY) if TRANSFER_CATEGORY in table.categories else -1
+    transfer = table.category_codes == transfer_code
+    drop = transfer.copy()
+
+    # Other legs of transfers: opposite sign, so key on the amount with the leg's sign flipped
+    signs = np.where(transfer, -np.sign(cents), np.sign(cents))
+    legs, _ = match_pairs(_group_ids(np.abs(cents), signs), days, dated & ~transfer, dated & transfer,
+                          TRANSFER_WINDOW_DAYS, TRANSFER_WINDOW_DAYS)
+    drop[legs] = True
+
+    # Refunds and reversals: a credit after a purchase of the same amount and category
+    keys = _group_ids(np.abs(cents), table.category_codes)
+    purchases, refunds = match_pairs(keys, days, dated & ~drop & (cents > 0), dated & ~drop & (cents < 0),
+                                     REFUND_WINDOW_DAYS, 0)
+    drop[purchases] = True
+    drop[refunds] = True
+
+    counts = {
+        "transfers_removed": int(transfer.sum()) + len(legs),
+        "refunds_netted": len(refunds),
+        "credits_offset": int(((cents < 0) & ~drop).sum()),
+    }
+    return table.take(~drop), counts
+
+
+def net_spending(table: TransactionTable) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """Spending per category after netting, and the netting counts.
+
+    Unmatched credits (partial refunds, deposits) offset their own category
+    but never take it below zero, so income cannot cancel other spending.
+    """
+    netted, counts = net_transactions(table)
+    return {category: total for category, total in netted.category_totals().items() if total > 0}, counts
@@ -0,0 +1,178 @@
+"""
+Transaction Table
+Columnar transaction storage: dates, category codes, amounts in cents and row fingerprints
+"""
+
+from typing import Dict, List, Any, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from amount_parsing import parse_amounts
+from categorization import fill_categories
+from category_index import default_category_index
+from date_parsing import parse_dates
+from fingerprints import label_hashes, transaction_fingerprints
+
+
+class TransactionTable:
+    """Transactions held as parallel NumPy arrays instead of per-row dicts.
+
+    ``dates`` is datetime64[D] (NaT when unknown), ``category_codes`` indexes
+    into ``categories`` (canonical category IDs, see category_index), ``amount_cents`` holds signed integer cents and
+    ``fingerprints`` a stable uint64 hash of each row's date, amount, category
+    and (when the source had them) description and account. A row costs 28
+    bytes and aggregation never touches Python objects.
+    """
+
+    __slots__ = ("dates", "category_codes", "categories", "amount_cents", "fingerprints")
+
+    def __init__(self, dates: np.ndarray, category_codes: np.ndarray, categories: Sequence[str],
+                 amount_cents: np.ndarray, fingerprints: np.ndarray):
+        self.dates = dates
+        self.category_codes = category_codes
+        self.categories = list(categories)
+        self.amount_cents = amount_cents
+        self.fingerprints = fingerprints
+
+    def __len__(self) -> int:
+        return len(self.amount_cents)
+
+    @classmethod
+    def empty(cls) -> "TransactionTable":
+        return cls(np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int32), [],
+                   np.array([], dtype=np.int64), np.array([], dtype=np.uint64))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TransactionTable":
+        """Build from a parsed frame (Date as datetime64, Amount as float, Category labels).
+
+        Optional Description and Account columns only feed the fingerprints.
+        """
+        if "Date" in df.columns:
+            dates = df["Date"].to_numpy(dtype="datetime64[D]")
+        else:
+            dates = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")
+
+        # Synonymous labels ("food ", "Groceries") share their canonical category's ID
+        codes, categories = default_category_index.encode(df.get("Category", pd.Series(index=df.index, dtype=object)))
+
+        amounts = df["Amount"].to_numpy(dtype=float, na_value=0.0) if "Amount" in df.columns else np.zeros(len(df))
+        cents = np.round(amounts * 100).astype(np.int64)
+        category_hashes = label_hashes(pd.Series(list(categories), dtype=object), len(categories))[codes]
+        fingerprints = transaction_fingerprints(dates, cents, category_hashes, df.get("Description"), df.get("Account"))
+        return cls(dates, codes, categories, cents, fingerprints)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "TransactionTable":
+        """Build from list-of-dict transactions, as sent to the JSON API.
+
+        Transactions without a Category are categorized from their description.
+        """
+        df = pd.DataFrame.from_records(records)
+        if "Date" in df.columns:
+            df["Date"] = parse_dates(df["Date"])
+        if "Amount" in df.columns:
+            df["Amount"] = parse_amounts(df["Amount"])[0] / 100
+        fill_categories(df)
+        return cls.from_frame(df)
+
+    @classmethod
+    def concat(cls, tables: List["TransactionTable"]) -> "TransactionTable":
+        """Concatenate tables, merging their category dictionaries"""
+        if not tables:
+            return cls.empty()
+        index: Dict[str, int] = {}
+        codes = []
+        for table in tables:
+            remap = np.array([index.setdefault(label, len(index)) for label in table.categories], dtype=np.int32)
+            codes.append(remap[table.category_codes] if len(remap) else table.category_codes)
+        return cls(
+            np.concatenate([table.dates for table in tables]),
+            np.concatenate(codes).astype(np.int32),
+            list(index),
+            np.concatenate([table.amount_cents for table in tables]),
+            np.concatenate([table.fingerprints for table in tables]),
+        )
+
+    def take(self, indices: np.ndarray) -> "TransactionTable":
+        """Rows at the given positions (or boolean mask), sharing the category dictionary"""
+        return TransactionTable(self.dates[indices], self.category_codes[indices], self.categories,
+                                self.amount_cents[indices], self.fingerprints[indices])
+
+    def sort_by_date(self) -> "TransactionTable":
+        """Rows in date order (stable, unknown dates last)"""
+        return self.take(np.argsort(self.dates, kind="stable"))
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.category_codes.nbytes + self.amount_cents.nbytes + self.fingerprints.nbytes
+
+    def category_totals(self) -> Dict[str, float]:
+        """Total amount per category with at least one row, canonical categories first in reporting order"""
+        cents = np.bincount(self.category_codes, weights=self.amount_cents, minlength=len(self.categories))
+        rows = np.bincount(self.category_codes, minlength=len(self.categories))
+        return {label: float(total) / 100
+                for label, total, count in zip(self.categories, np.round(cents), rows) if count}
+
+    def total_amount(self) -> float:
+        return float(self.amount_cents.sum()) / 100
+
+    def date_range(self) -> Dict[str, Optional[str]]:
+        known = self.dates[~np.isnat(self.dates)]
+        if not len(known):
+            return {"first_date": None, "last_date": None}
+        return {"first_date": str(known.min()), "last_date": str(known.max())}
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-friendly digest: count, date range and spending per category"""
+        return {"transaction_count": len(self), **self.date_range(), "category_totals": self.category_totals()}
+
+
+class TransactionTableBuilder:
+    """Appends tables into preallocated columns, merging their category dictionaries.
+
+    Unlike collecting tables for TransactionTable.concat, the rows are never
+    held twice: columns grow (and are finally trimmed) in place with
+    ``ndarray.resize``, which large allocations serve by remapping pages
+    rather than copying.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.length = 0
+        self.index: Dict[str, int] = {}
+        self.columns = {"dates": np.empty(capacity, dtype="datetime64[D]"),
+                        "category_codes": np.empty(capacity, dtype=np.int32),
+                        "amount_cents": np.empty(capacity, dtype=np.int64),
+                        "fingerprints": np.empty(capacity, dtype=np.uint64)}
+
+    def append(self, table: TransactionTable) -> None:
+        end = self.length + len(table)
+        if end > len(self.columns["dates"]):
+            self._resize(max(end, len(self.columns["dates"]) * 3 // 2))
+        remap = np.array([self.index.setdefault(label, len(self.index)) for label in table.categories], dtype=np.int32)
+        self.columns["dates"][self.length:end] = table.dates
+        self.columns["category_codes"][self.length:end] = remap[table.category_codes] if len(remap) else 0
+        self.columns["amount_cents"][self.length:end] = table.amount_cents
+        self.columns["fingerprints"][self.length:end] = table.fingerprints
+        self.length = end
+
+    def _resize(self, capacity: int) -> None:
+        for column in self.columns.values():
+            # The builder holds the only reference to its columns
+            column.resize(capacity, refcheck=False)
+
+    def build(self) -> TransactionTable:
+        """The appended rows as one table; the builder must not be appended to afterwards"""
+        self._resize(self.length)
+        columns = self.columns
+        return TransactionTable(columns["dates"], columns["category_codes"], list(self.index),
+                                columns["amount_cents"], columns["fingerprints"])
+
+
+def as_transaction_table(transactions: Union[None, TransactionTable, List[Dict[str, Any]]]) -> Optional[TransactionTable]:
+    """Accept either a TransactionTable or list-of-dict transactions; None when there are none"""
+    if transactions is None or isinstance(transactions, TransactionTable):
+        return transactions if transactions is not None and len(transactions) else None
+    if not transactions:
+        return None
+    return TransactionTable.from_records(transactions)
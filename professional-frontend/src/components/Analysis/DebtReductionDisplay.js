@@ -296,7 +296,7 @@ const DebtReductionDisplay = ({ reduction }) => {
                       Time to Debt Freedom
                     </Typography>
                     <Typography variant="h4" fontWeight="bold" color="primary">
-                      {avalanche.months_to_payoff || 0} months
+                      {avalanche.paid_off === false ? 'Not paid off' : `${avalanche.months_to_payoff || 0} months`}
                     </Typography>
                   </Box>
                   <Box>
@@ -379,7 +379,7 @@ const DebtReductionDisplay = ({ reduction }) => {
                       Time to Debt Freedom
                     </Typography>
                     <Typography variant="h4" fontWeight="bold" color="primary">
-                      {snowball.months_to_payoff || 0} months
+                      {snowball.paid_off === false ? 'Not paid off' : `${snowball.months_to_payoff || 0} months`}
                     </Typography>
                   </Box>
                   <Box>
@@ -111,11 +111,12 @@ const FinancialAnalysis = () => {
   // Handle CSV file upload
   const handleFileUpload = (event) => {
     const file = event.target.files[0];
-    if (file && file.type === 'text/csv') {
+    // OFX/QIF files have no reliable MIME type, so check the extension
+    if (file && (file.type === 'text/csv' || /\.(csv|ofx|qfx|qif)$/i.test(file.name))) {
       setCsvFile(file);
       setError('');
     } else {
-      setError('Please upload a valid CSV file');
+      setError('Please upload a valid CSV, OFX/QFX or QIF file');
     }
   };
 
@@ -304,7 +305,7 @@ const FinancialAnalysis = () => {
                     <input
                       type="file"
                       hidden
-                      accept=".csv"
+                      accept=".csv,.ofx,.qfx,.qif"
                       onChange={handleFileUpload}
                     />
                     <Upload sx={{ fontSize: 48, color: 'grey.400', mb: 1 }} />
@@ -312,7 +313,7 @@ const FinancialAnalysis = () => {
                       {csvFile ? csvFile.name : 'Click to upload CSV file'}
                     </Typography>
                     <Typography variant="body2" color="text.secondary">
-                      Supports CSV files with Date, Category, and Amount columns
+                      Supports CSV files with Date and Amount columns (Category is optional; it is inferred from the description), or OFX/QFX and QIF bank statements
                     </Typography>
                   </Box>
                 </Box>
@@ -90,6 +90,37 @@ export const analyzeFinancesBasic = async (financialData) => {
   }
 };
 
+export const sweepDebtPayments = async (debts, minExtra = 0, maxExtra = 500, steps = 11) => {
+  try {
+    // Payoff curves for a range of extra monthly payments in one request
+    const response = await api.post('/debt/sweep', {
+      debts,
+      min_extra: minExtra,
+      max_extra: maxExtra,
+      steps,
+    });
+    return response;
+  } catch (error) {
+    console.error('Debt Sweep Error:', error);
+    throw error;
+  }
+};
+
+export const evaluateConsolidationOffers = async (debts, offers, extraPayment = 0) => {
+  try {
+    // Rank consolidation loans and balance transfers by net savings
+    const response = await api.post('/debt/consolidation', {
+      debts,
+      offers,
+      extra_payment: extraPayment,
+    });
+    return response;
+  } catch (error) {
+    console.error('Consolidation Offers Error:', error);
+    throw error;
+  }
+};
+
 export const uploadCSV = async (file, monthlyIncome, dependants) => {
   try {
     const formData = new FormData();
@@ -109,6 +140,45 @@ export const uploadCSV = async (file, monthlyIncome, dependants) => {
   }
 };
 
+export const uploadCSVBulk = async (files, monthlyIncome, dependants) => {
+  try {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    formData.append('monthly_income', monthlyIncome.toString());
+    formData.append('dependants', dependants.toString());
+
+    const response = await api.post('/upload-csv/bulk', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    return response;
+  } catch (error) {
+    console.error('Bulk CSV Upload Error:', error);
+    throw error;
+  }
+};
+
+export const getCategorizationRules = async () => {
+  try {
+    const response = await api.get('/categorization/rules');
+    return response;
+  } catch (error) {
+    console.error('Categorization Rules Error:', error);
+    throw error;
+  }
+};
+
+export const saveCategorizationRules = async (rules) => {
+  try {
+    const response = await api.put('/categorization/rules', { rules });
+    return response;
+  } catch (error) {
+    console.error('Save Categorization Rules Error:', error);
+    throw error;
+  }
+};
+
 export const sendChatMessage = async (message) => {
   try {
     const response = await api.post('/chat', { message });